@@ -1,3 +1,5 @@
+from importlib.metadata import PackageNotFoundError, version
+
 from poincare import (
     Constant,
     Independent,
@@ -28,6 +30,11 @@
     volume,
 )
 
+try:
+    __version__ = version("simbio")
+except PackageNotFoundError:
+    __version__ = "unknown"
+
 __all__ = [
     "Constant",
     "Independent",
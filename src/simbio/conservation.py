@@ -0,0 +1,397 @@
+"""
+simbio.conservation
+~~~~~~~~~~~~~~~~~~~
+
+Conserved moieties of a reaction network,
+and model reduction by eliminating dependent species.
+
+Conservation laws ``L @ S = 0`` are computed exactly
+from the left null space of the stoichiometry matrix,
+by fraction-free integer elimination.
+Each law is normalized so that one species, the dependent one,
+can be computed from the conserved total and the other species.
+``ReducedSimulator`` chooses as dependent the most abundant species
+of each law, so that small species are not computed by cancellation,
+e.g. a free enzyme from its total and a large substrate pool.
+
+Only deterministic simulation is reduced. The stochastic simulators
+in ``simbio.rebop`` update the copy numbers changed by each firing,
+so their cost scales with the number of reactions and propensity updates,
+which eliminating dependent species would not reduce.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from fractions import Fraction
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from poincare.reactions.reactions import compensate_volume
+from poincare.simulator import Components, Problem
+from poincare.types import Initial
+from scipy import sparse
+from symbolite import substitute
+from symbolite.core.symbolite_object import get_symbolite_info
+
+from . import System, Variable
+from .derivative import yield_leaves
+from .stoichiometry import (
+    SparseSimulator,
+    StoichiometricRHS,
+    StoichiometryCompiler,
+    compile_kernel,
+    replace_algebraic,
+    yield_net_stoichiometry,
+)
+
+
+def _integer_rows(matrix: NDArray) -> NDArray:
+    """Scale each row of a matrix of rationals to integers."""
+    matrix = np.asarray(matrix, dtype=float)
+    out = np.rint(matrix).astype(np.int64)
+    for i in np.flatnonzero(np.any(out != matrix, axis=1)):
+        nonzero = np.flatnonzero(matrix[i])
+        fractions = [Fraction(x).limit_denominator() for x in matrix[i, nonzero]]
+        scale = math.lcm(*(f.denominator for f in fractions))
+        out[i] = 0
+        out[i, nonzero] = [int(f * scale) for f in fractions]
+    return out
+
+
+def _primitive(rows: NDArray) -> NDArray:
+    """Divide each integer row by the gcd of its entries."""
+    gcd = np.gcd.reduce(rows, axis=1)
+    gcd[gcd == 0] = 1
+    return rows // gcd[:, None]
+
+
+def _rref(matrix: NDArray) -> tuple[NDArray, list[int]]:
+    """Integer reduced row echelon form and pivot columns.
+
+    Rows are eliminated fraction-free and kept primitive,
+    so that the result is exact. Pivots are positive,
+    but not necessarily 1. Entries are Python integers
+    if they would overflow int64.
+    """
+    rows = _primitive(np.array(matrix))
+    pivots = []
+    r = 0
+    for c in range(rows.shape[1]):
+        if r == rows.shape[0]:
+            break
+        candidates = np.flatnonzero(rows[r:, c])
+        if candidates.size == 0:
+            continue
+        rows[[r, r + candidates[0]]] = rows[[r + candidates[0], r]]
+        others = np.flatnonzero(rows[:, c])
+        others = others[others != r]
+        if others.size > 0:
+            if rows.dtype != object:
+                largest = int(np.abs(rows).max())
+                if 2 * largest * largest > np.iinfo(np.int64).max:
+                    rows = rows.astype(object)
+            rows[others] = _primitive(
+                rows[r, c] * rows[others] - rows[others, c, None] * rows[r]
+            )
+        pivots.append(c)
+        r += 1
+    rows = rows[:r]
+    rows *= np.sign(rows[np.arange(r), pivots])[:, None]
+    return rows, pivots
+
+
+def _null_space(matrix: NDArray) -> NDArray:
+    """Integer basis of the (right) null space of an integer matrix."""
+    n_cols = matrix.shape[1]
+    reduced, pivots = _rref(matrix)
+    free = np.setdiff1d(np.arange(n_cols), pivots)
+    basis = np.zeros((free.size, n_cols), dtype=reduced.dtype)
+    if free.size == 0:
+        return basis
+    # For each free column f, x[f] = scale and x[p] = -reduced[k, f] * scale / d[k],
+    # with d[k] the pivot of row k and scale a common multiple of them.
+    d = [int(x) for x in reduced[np.arange(len(pivots)), pivots]]
+    scale = math.lcm(*d)
+    factors = np.array([scale // x for x in d], dtype=object)
+    largest = int(np.abs(reduced).max(initial=0)) * scale
+    if largest > np.iinfo(np.int64).max:
+        basis = basis.astype(object)
+    else:
+        factors = factors.astype(np.int64)
+    basis[np.arange(free.size), free] = scale
+    basis[:, pivots] = -(reduced[:, free] * factors[:, None]).T
+    return _primitive(basis)
+
+
+def _normalized(reduced: NDArray, pivots: Sequence[int]) -> NDArray:
+    """Rows of an integer reduced row echelon form, divided by their pivots."""
+    d = reduced[np.arange(len(pivots)), pivots]
+    return reduced.astype(float) / d.astype(float)[:, None]
+
+
+@dataclass(frozen=True, kw_only=True)
+class ConservationLaws:
+    """Conservation laws ``matrix @ species = totals``.
+
+    ``matrix`` is in reduced row echelon form, up to a permutation
+    of the species, with ``matrix[k, dependent[k]] == 1``.
+    Amounts are in the units of each reaction's rate law.
+    """
+
+    species: Sequence[Variable]
+    matrix: NDArray
+    dependent: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.dependent)
+
+    @property
+    def independent(self) -> list[int]:
+        dependent = set(self.dependent)
+        return [i for i in range(len(self.species)) if i not in dependent]
+
+    def select_dependent(self, abundance: ArrayLike) -> ConservationLaws:
+        """Equivalent laws where each dependent species is the most abundant one
+        that is not determined by the dependent species of the previous laws.
+
+        Ties keep the order of ``species``.
+        """
+        if len(self) == 0:
+            return self
+        abundance = np.asarray(abundance, dtype=float)
+        order = np.argsort(-abundance, kind="stable")
+        reduced, pivots = _rref(_integer_rows(self.matrix[:, order]))
+        matrix = np.empty_like(self.matrix)
+        matrix[:, order] = _normalized(reduced, pivots)
+        return ConservationLaws(
+            species=self.species,
+            matrix=matrix,
+            dependent=tuple(int(order[c]) for c in pivots),
+        )
+
+    def __str__(self):
+        lines = []
+        for row in self.matrix:
+            terms = [
+                f"{'' if c == 1 else f'{c:g} * '}{s}"
+                for c, s in zip(row, self.species)
+                if c != 0
+            ]
+            lines.append(" + ".join(terms))
+        return "\n".join(lines)
+
+
+def conservation_laws(model: System | type[System], /) -> ConservationLaws:
+    """Find the conserved moieties of a model from its stoichiometry.
+
+    Only species that take part in reactions and have no other equations
+    are considered.
+    """
+    return _conservation_laws(StoichiometryCompiler(model))
+
+
+def _conservation_laws(compiler: StoichiometryCompiler) -> ConservationLaws:
+    st = compiler.stoichiometry
+    rhs: StoichiometricRHS = compiler.compiled.func
+    extra = set(rhs.extra_index.tolist())
+    matrix = st.matrix.tocsr()
+    rows = [
+        i
+        for i in range(st.shape[0])
+        if i not in extra and matrix.indptr[i] != matrix.indptr[i + 1]
+    ]
+    species = [st.species[i] for i in rows]
+
+    # Left null space of S, i.e. null space of S.T
+    basis = _null_space(_integer_rows(matrix[rows].toarray().T))
+    reduced, pivots = _rref(basis)
+    return ConservationLaws(
+        species=species,
+        matrix=_normalized(reduced, pivots),
+        dependent=tuple(pivots),
+    )
+
+
+def _volume_factors(compiler: StoichiometryCompiler, species: Sequence[Variable]):
+    """Compile the factors ``g`` that convert from the units of the rate laws
+    to the units of each species, as in ``dy[i] = g[i] * (S @ v)[i]``."""
+    factors = {}
+    for r in compiler.stoichiometry.reactions:
+        for s, coeff in yield_net_stoichiometry(r):
+            if coeff == 0:
+                continue
+            f = compensate_volume(s, 1, reaction_is_concentration=r.concentration)
+            if s in factors and str(factors[s]) != str(f):
+                raise NotImplementedError(
+                    f"{s} takes part in reactions with different units"
+                )
+            factors[s] = f
+
+    rhs: StoichiometricRHS = compiler.compiled.func
+    changing = set(rhs.extra_index.tolist()) | set(
+        compiler.stoichiometry.matrix.tocoo().row.tolist()
+    )
+    y = get_symbolite_info(compiler.mapping["y"]).value
+    expressions = replace_algebraic(
+        compiler.equation_maps, {s: factors[s] for s in species}
+    )
+    for s, expr in expressions.items():
+        for x in yield_leaves(substitute(expr, compiler.mapping)):
+            if isinstance(x, tuple) and x[0] == y and x[1] in changing:
+                raise NotImplementedError(
+                    f"conservation laws with changing volumes: {s}"
+                )
+    return compile_kernel(
+        "g",
+        [expressions[s] for s in species],
+        compiler.mapping,
+        compiler.libsl,
+        cse=compiler.cse,
+    )
+
+
+@dataclass(frozen=True, kw_only=True)
+class ReducedRHS:
+    """Evaluates a StoichiometricRHS on the independent species only.
+
+    Dependent species are reconstructed as
+    ``y[dependent] = scale * (totals - coupling @ y[independent])``.
+    """
+
+    rhs: StoichiometricRHS
+    size: int
+    independent: NDArray[np.intp]
+    dependent: NDArray[np.intp]
+    coupling: NDArray
+    scale: NDArray
+    totals: NDArray
+
+    def reconstruct(self, z: NDArray) -> NDArray:
+        """Full state from the independent species,
+        with an optional trailing batch (or time) dimension."""
+        z = np.asarray(z)
+        batch = (1,) * (z.ndim - 1)
+        y = np.empty((self.size, *z.shape[1:]))
+        y[self.independent] = z
+        y[self.dependent] = self.scale.reshape(-1, *batch) * (
+            self.totals.reshape(-1, *batch) - self.coupling @ z
+        )
+        return y
+
+    def __call__(self, t: float, z: NDArray, p: NDArray, dz: NDArray) -> NDArray:
+        y = self.reconstruct(z)
+        dy = self.rhs(t, y, p, np.empty_like(y))
+        dz[...] = dy[self.independent]
+        return dz
+
+    @property
+    def jacobian(self) -> ReducedJacobian | None:
+        # Used by simbio.solvers, if available.
+        if self.rhs.jacobian is None:
+            return None
+        return ReducedJacobian(rhs=self)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ReducedJacobian:
+    """Jacobian of a ReducedRHS, by the chain rule on the full Jacobian.
+
+    ``J_z = J[ind, ind] - J[ind, dep] @ diag(scale) @ coupling``
+    """
+
+    rhs: ReducedRHS
+
+    def __call__(self, t: float, z: NDArray, p: NDArray, *args) -> sparse.csr_array:
+        r = self.rhs
+        jac = r.rhs.jacobian(t, r.reconstruct(z), p)[r.independent]
+        dependent = jac[:, r.dependent] @ (r.scale[:, None] * r.coupling)
+        return sparse.csr_array(jac[:, r.independent] - dependent)
+
+
+class _ReconstructTransform:
+    """Applies a transform on the full state reconstructed from a ReducedRHS."""
+
+    def __init__(self, rhs: ReducedRHS, transform):
+        self.rhs = rhs
+        self.transform = transform
+
+    def __call__(self, t, z, p, out):
+        return self.transform(t, self.rhs.reconstruct(z), p, out)
+
+
+class ReducedSimulator(SparseSimulator):
+    """A SparseSimulator that integrates only independent species.
+
+    Dependent species of each conservation law are computed algebraically
+    from the conserved totals, which are fixed by the initial conditions.
+    They are the most abundant species of each law at the default
+    initial conditions (see ``ConservationLaws.select_dependent``).
+    The output contains all variables, as with Simulator.
+
+    Volumes of the compartments involved must be constant.
+    """
+
+    def __init__(
+        self,
+        system: System | type[System],
+        /,
+        *,
+        transform=None,
+        cse: bool = True,
+        jacobian: bool = False,
+    ):
+        super().__init__(system, transform=transform, cse=cse, jacobian=jacobian)
+        laws = _conservation_laws(self.compiler)
+        self._factors = _volume_factors(self.compiler, laws.species)
+
+        index = {v: i for i, v in enumerate(self.compiled.variables)}
+        self._size = len(index)
+        self._columns = np.array([index[s] for s in laws.species], dtype=np.intp)
+
+        # Amounts in the units of the laws, at the default initial conditions.
+        problem = super().create_problem()
+        g = np.empty(self._columns.size)
+        self._factors(problem.t[0], problem.y, problem.p, g)
+        abundance = np.abs(np.asarray(problem.y, dtype=float)[self._columns] / g)
+        self.conservation_laws = laws = laws.select_dependent(abundance)
+        self._dependent = self._columns[list(laws.dependent)]
+        self._independent = np.setdiff1d(np.arange(self._size), self._dependent)
+
+    def create_problem(
+        self,
+        values: Mapping[Components, Initial] = {},
+        *,
+        t_span: tuple[float, float] = (0, np.inf),
+        transform=None,
+    ) -> Problem:
+        problem = super().create_problem(values, t_span=t_span, transform=transform)
+
+        # Conservation laws in the units of y: matrix @ y = totals
+        g = np.ones(self._size)
+        g_columns = np.empty(self._columns.size)
+        self._factors(problem.t[0], problem.y, problem.p, g_columns)
+        g[self._columns] = g_columns
+        matrix = np.zeros((len(self.conservation_laws), self._size))
+        matrix[:, self._columns] = self.conservation_laws.matrix
+        matrix /= g
+
+        rhs = ReducedRHS(
+            rhs=problem.rhs,
+            size=self._size,
+            independent=self._independent,
+            dependent=self._dependent,
+            coupling=matrix[:, self._independent],
+            scale=g[self._dependent],
+            totals=matrix @ problem.y,
+        )
+        return Problem(
+            rhs=rhs,
+            t=problem.t,
+            y=problem.y[self._independent],
+            p=problem.p,
+            transform=_ReconstructTransform(rhs, problem.transform),
+            scale=problem.scale,
+        )
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -34,15 +37,78 @@ def is_instance_or_subclass(obj: Any, cls: type):
         return isinstance(obj, cls)
 
 
-def first_system_parent(obj: Node | None) -> System | type[System] | None:
-    if isinstance(obj, Node):
-        parent = getattr(obj, "parent", None)
+SystemParent = System | type[System] | None
+
+_system_parents: ContextVar[Mapping[Node, SystemParent] | None] = ContextVar(
+    "system_parents", default=None
+)
+
+
+def first_system_parent(obj: Node | None) -> SystemParent:
+    """Return the closest System in the parent chain of obj.
+
+    Inside :func:`system_parent_index`, it is looked up in the index instead.
+    """
+    if not isinstance(obj, Node):
+        return None
+
+    index = _system_parents.get()
+    if index is not None and obj in index:
+        return index[obj]
+
+    node = obj
+    while isinstance(node, Node):
+        parent = getattr(node, "parent", None)
         if is_instance_or_subclass(parent, System):
             return parent
-        else:
-            return first_system_parent(parent)
-    else:
-        return None
+        node = parent
+    return None
+
+
+def system_parents(nodes: Iterable[Node]) -> dict[Node, SystemParent]:
+    """Map each node to the closest System in its parent chain.
+
+    Nodes sharing part of their chain, e.g. the species of a Reaction,
+    walk that part only once.
+    """
+    seen: dict[int, SystemParent] = {}
+    index = {}
+    for obj in nodes:
+        chain = []
+        node = obj
+        while True:
+            if id(node) in seen:
+                system = seen[id(node)]
+                break
+            chain.append(node)
+            parent = getattr(node, "parent", None)
+            if is_instance_or_subclass(parent, System):
+                system = parent
+                break
+            elif not isinstance(parent, Node):
+                system = None
+                break
+            node = parent
+        for node in chain:
+            seen[id(node)] = system
+        index[obj] = system
+    return index
+
+
+@contextmanager
+def system_parent_index(nodes: Iterable[Node]) -> Iterator[dict[Node, SystemParent]]:
+    """Index the System parents of nodes once for the duration of the context.
+
+    Volume compensation and concentration conversion are looked up for every
+    species of every reaction while compiling, through poincare hooks
+    which only receive the species.
+    """
+    index = system_parents(nodes)
+    token = _system_parents.set(index)
+    try:
+        yield index
+    finally:
+        _system_parents.reset(token)
 
 
 def concentration(*, default: Initial | None = None):
@@ -0,0 +1,126 @@
+"""
+simbio.cse
+~~~~~~~~~~
+
+Common subexpression elimination for compiled kernels.
+
+Rate laws of large models repeat the same terms,
+such as volume factors or saturation denominators.
+Expressions are hash-consed into a DAG,
+and every operation used more than once
+is hoisted into a temporary that is computed once per evaluation.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Hashable, Sequence
+from typing import Any
+
+from symbolite.abstract.lang import Assign
+from symbolite.core.call import Call
+from symbolite.core.symbolite_object import get_symbolite_info
+from symbolite.core.value import Value
+
+# Indexing into the state or parameter vectors is as cheap as a temporary.
+_NOT_HOISTED = {"getitem"}
+
+
+def _call_info(x: Any):
+    if isinstance(x, Value):
+        value = get_symbolite_info(x).value
+        if isinstance(value, Call):
+            return get_symbolite_info(value)
+    return None
+
+
+def _leaf_key(x: Any) -> Hashable:
+    if isinstance(x, Value):
+        # Symbolic equality is not a boolean, compare the underlying info.
+        return (type(x), get_symbolite_info(x))
+    try:
+        hash(x)
+    except TypeError:
+        return (type(x), id(x))
+    return (type(x), x)
+
+
+class _DAG:
+    """Unique subexpressions, in topological order (children first)."""
+
+    def __init__(self):
+        self.index: dict[Hashable, int] = {}
+        self.exprs: list[Any] = []
+        self.children: list[tuple[int, ...]] = []
+
+    def add(self, expr: Any) -> int:
+        # Iterative post-order traversal, as expressions can be deep.
+        memo: dict[int, int] = {}
+        stack = [(expr, False)]
+        while stack:
+            x, expanded = stack.pop()
+            if id(x) in memo:
+                continue
+
+            info = _call_info(x)
+            if info is None:
+                memo[id(x)] = self._intern(_leaf_key(x), x, ())
+            elif not expanded:
+                stack.append((x, True))
+                stack.extend((a, False) for a in reversed(info.args))
+            else:
+                children = tuple(memo[id(a)] for a in info.args)
+                key = (info.func, children, info.kwargs_items)
+                memo[id(x)] = self._intern(key, x, children)
+        return memo[id(expr)]
+
+    def _intern(self, key: Hashable, expr: Any, children: tuple[int, ...]) -> int:
+        try:
+            return self.index[key]
+        except KeyError:
+            self.index[key] = i = len(self.exprs)
+            self.exprs.append(expr)
+            self.children.append(children)
+            return i
+
+
+def eliminate_common_subexpressions(
+    expressions: Sequence[Any],
+    /,
+    *,
+    prefix: str = "_cse_",
+) -> tuple[list[Assign], list[Any]]:
+    """Hoist repeated subexpressions into temporaries.
+
+    Returns the assignments of the temporaries, in evaluation order,
+    and the expressions rewritten in terms of them.
+    """
+    dag = _DAG()
+    roots = [dag.add(expr) for expr in expressions]
+
+    uses = [0] * len(dag.exprs)
+    for i in roots:
+        uses[i] += 1
+    for children in dag.children:
+        for c in children:
+            uses[c] += 1
+
+    assignments: list[Assign] = []
+    rewritten: list[Any] = []
+    for i, (expr, children) in enumerate(zip(dag.exprs, dag.children)):
+        info = _call_info(expr)
+        if info is None:
+            rewritten.append(expr)
+            continue
+
+        args = tuple(rewritten[c] for c in children)
+        if any(a is not b for a, b in zip(args, info.args)):
+            expr = type(expr)(Call(info.func, args, info.kwargs_items))
+
+        name = getattr(get_symbolite_info(info.func), "name", None)
+        if uses[i] > 1 and name not in _NOT_HOISTED:
+            temporary = type(expr)(f"{prefix}{len(assignments)}")
+            assignments.append(Assign(temporary, expr))
+            expr = temporary
+        rewritten.append(expr)
+
+    return assignments, [rewritten[i] for i in roots]
@@ -0,0 +1,397 @@
+"""
+simbio.decomposition
+~~~~~~~~~~~~~~~~~~~~
+
+Split a model into independent subsystems and solve them separately.
+
+Two variables are coupled if the derivative of one depends on the other,
+i.e. if the Jacobian has a structurally non-zero entry,
+found from the leaves of the rate laws without differentiating them. Besides shared
+reactions, this accounts for modifiers, volumes and equations
+that do not come from reactions.
+Weakly connected components of the coupling graph evolve independently,
+and are solved as smaller ODE problems, with their own step sizes,
+across a pool of workers.
+Strongly connected blocks, in topological order,
+describe how information flows within each component.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+from collections import deque
+from collections.abc import Callable, Hashable, Mapping, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pint
+import xarray as xr
+from numpy.typing import ArrayLike, NDArray
+from poincare import solvers
+from poincare.compile import identity_transform
+from poincare.simulator import Components, Problem
+from poincare.types import Initial
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy_events import Events
+from symbolite.core.symbolite_object import get_symbolite_info
+
+from . import System, Variable
+from .derivative import yield_leaves
+from .stoichiometry import (
+    SparseKernel,
+    SparseSimulator,
+    StoichiometricJacobian,
+    StoichiometricRHS,
+    StoichiometryCompiler,
+    _no_reactions,
+    compile_kernel,
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class Decomposition:
+    """Independent components and strongly connected blocks of a model.
+
+    Both are sorted arrays of indices into ``variables``.
+    Blocks are in topological order:
+    each block only depends on itself and on previous blocks.
+    """
+
+    variables: Sequence[Variable]
+    components: Sequence[NDArray[np.intp]]
+    blocks: Sequence[NDArray[np.intp]]
+
+
+def _groups(labels: NDArray[np.intp], n: int) -> list[NDArray[np.intp]]:
+    order = np.argsort(labels, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(labels, minlength=n))[:-1])
+
+
+def _decompose(
+    variables: Sequence[Variable], sparsity: sparse.csr_array
+) -> Decomposition:
+    # sparsity[k, i] means that dy[k]/dt depends on y[i], an edge from i to k.
+    adjacency = sparse.csr_array(sparsity.T)
+    n, labels = connected_components(adjacency, directed=True, connection="weak")
+    components = _groups(labels, n)
+
+    n, labels = connected_components(adjacency, directed=True, connection="strong")
+    coo = adjacency.tocoo()
+    edges = {(a, b) for a, b in zip(labels[coo.row].tolist(), labels[coo.col].tolist())}
+    successors: list[list[int]] = [[] for _ in range(n)]
+    in_degree = np.zeros(n, dtype=np.intp)
+    for a, b in edges:
+        if a != b:
+            successors[a].append(b)
+            in_degree[b] += 1
+    queue = deque(np.flatnonzero(in_degree == 0).tolist())
+    order = []
+    while queue:
+        a = queue.popleft()
+        order.append(a)
+        for b in sorted(successors[a]):
+            in_degree[b] -= 1
+            if in_degree[b] == 0:
+                queue.append(b)
+    groups = _groups(labels, n)
+
+    return Decomposition(
+        variables=variables,
+        components=components,
+        blocks=[groups[a] for a in order],
+    )
+
+
+def _dependencies(
+    compiler: StoichiometryCompiler, keys: Sequence[Hashable]
+) -> SparseKernel | None:
+    """The variables y[i] that each expression depends on, as a kernel
+    with the sparsity of its derivative but nothing to evaluate."""
+    if len(keys) == 0:
+        return None
+    y = get_symbolite_info(compiler.mapping["y"]).value
+    indptr, indices = [0], []
+    for k in keys:
+        indices.extend(
+            sorted(
+                {
+                    x[1]
+                    for x in yield_leaves(compiler.expressions[k])
+                    if isinstance(x, tuple) and x[0] == y
+                }
+            )
+        )
+        indptr.append(len(indices))
+    return SparseKernel(
+        shape=(len(keys), len(compiler.compiled.variables)),
+        indices=np.array(indices, dtype=np.intp),
+        indptr=np.array(indptr, dtype=np.intp),
+        func=None,
+    )
+
+
+def _coupling(compiler: StoichiometryCompiler) -> sparse.csr_array:
+    """Structural sparsity of the Jacobian, without differentiating."""
+    keys = compiler.keys
+    rates = _dependencies(compiler, keys["rate"])
+    if rates is None:
+        rates = SparseKernel.empty((0, len(compiler.compiled.variables)))
+    return StoichiometricJacobian(
+        rhs=compiler.compiled.func,
+        rates=rates,
+        factors=_dependencies(compiler, keys["factor"]),
+        extra=_dependencies(compiler, keys["extra"]),
+    ).sparsity
+
+
+def decompose(model: System | type[System], /) -> Decomposition:
+    """Find the independent components and strongly connected blocks
+    of the coupling graph of a model."""
+    compiler = StoichiometryCompiler(model)
+    return _decompose(compiler.compiled.variables, _coupling(compiler))
+
+
+@dataclass(frozen=True, kw_only=True)
+class SubsystemRHS:
+    """Right-hand side of the variables ``index`` of a larger model.
+
+    ``rhs`` evaluates their derivatives from the full state,
+    which is kept in ``y``. The other variables are not coupled
+    to the subsystem, and keep their initial values.
+    """
+
+    rhs: StoichiometricRHS
+    index: NDArray[np.intp]
+    y: NDArray
+    # Used by simbio.solvers, if available.
+    jacobian: Callable[..., sparse.csr_array] | None = None
+
+    def __call__(self, t: float, z: NDArray, p: NDArray, dz: NDArray) -> NDArray:
+        self.y[self.index] = z
+        return self.rhs(t, self.y, p, dz)
+
+
+class DecomposedSimulator(SparseSimulator):
+    """Solve the independent components of a model as separate ODE problems.
+
+    Components are grouped into one task per worker, balanced by size,
+    and solved across a process pool unless ``max_workers=1``.
+    The model must be importable by the workers,
+    i.e. defined at the module level.
+
+    The results match ``Simulator`` up to the solver tolerances,
+    but each component takes its own steps, so that a stiff
+    or fast component does not slow down the others.
+    Trajectories are stitched together at ``save_at``,
+    and the output transform is applied to the full state.
+    """
+
+    def __init__(
+        self,
+        system: System | type[System],
+        /,
+        *,
+        transform=None,
+        cse: bool = True,
+        jacobian: bool = False,
+        max_workers: int | None = None,
+    ):
+        super().__init__(system, transform=transform, cse=cse, jacobian=jacobian)
+        self.max_workers = max_workers
+        self._jacobian = jacobian
+        self.decomposition = _decompose(
+            self.compiled.variables, _coupling(self.compiler)
+        )
+        self._subsystems = [
+            self._restrict(index) for index in self.decomposition.components
+        ]
+
+    def _restrict(self, index: NDArray[np.intp]) -> StoichiometricRHS:
+        compiler = self.compiler
+        rhs: StoichiometricRHS = self.compiled.func
+        matrix = rhs.matrix[index]
+        scaled = [m[index] for m in rhs.scaled]
+        reactions = np.unique(
+            np.concatenate([m.indices for m in (matrix, *scaled)])
+        ).astype(np.intp)
+
+        def kernel(name: str, keys: Sequence):
+            if len(keys) == 0:
+                return None
+            return compile_kernel(
+                name,
+                [compiler.expressions[k] for k in keys],
+                compiler.mapping,
+                compiler.libsl,
+                cse=compiler.cse,
+            )
+
+        extra = np.flatnonzero(np.isin(rhs.extra_index, index))
+        return StoichiometricRHS(
+            matrix=sparse.csr_array(matrix[:, reactions]),
+            rates=kernel("v", [compiler.keys["rate"][j] for j in reactions])
+            or _no_reactions,
+            scaled=tuple(sparse.csr_array(m[:, reactions]) for m in scaled),
+            factors=rhs.factors,
+            extra=kernel("e", [compiler.keys["extra"][k] for k in extra]),
+            extra_index=np.searchsorted(index, rhs.extra_index[extra]).astype(np.intp),
+        )
+
+    def create_subproblems(self, problem: Problem) -> list[Problem]:
+        """Split a Problem created by ``create_problem``,
+        one per independent component, with an identity transform."""
+        full_jacobian = getattr(problem.rhs, "jacobian", None)
+        subproblems = []
+        for index, rhs in zip(self.decomposition.components, self._subsystems):
+            y = problem.y.copy()
+            jacobian = None
+            if full_jacobian is not None:
+
+                def jacobian(t, z, p, *args, y=y, index=index):
+                    y[index] = z
+                    return sparse.csr_array(full_jacobian(t, y, p)[index][:, index])
+
+            subproblems.append(
+                Problem(
+                    rhs=SubsystemRHS(rhs=rhs, index=index, y=y, jacobian=jacobian),
+                    t=problem.t,
+                    y=problem.y[index],
+                    p=problem.p,
+                    transform=identity_transform,
+                    scale=[1] * index.size,
+                )
+            )
+        return subproblems
+
+    def solve_components(
+        self,
+        values: Mapping[Components, Initial] = {},
+        components: Sequence[int] | None = None,
+        *,
+        t_span: tuple[float, float] | None = None,
+        save_at: NDArray,
+        solver: solvers.Solver | None = None,
+    ) -> dict[int, NDArray]:
+        """Trajectories (time, variable) of the given components,
+        or all of them, solved one after the other in this process."""
+        if solver is None:
+            solver = self.default_solver()
+        if t_span is None:
+            t_span = (0, save_at[-1])
+        problem = self.create_problem(values, t_span=t_span)
+        subproblems = self.create_subproblems(problem)
+        if components is None:
+            components = range(len(subproblems))
+        return {i: solver(subproblems[i], save_at=save_at).y for i in components}
+
+    def _tasks(self, n_tasks: int) -> list[list[int]]:
+        # Largest components first, each to the least loaded task.
+        sizes = [c.size for c in self.decomposition.components]
+        tasks: list[list[int]] = [[] for _ in range(min(n_tasks, len(sizes)))]
+        load = [0] * len(tasks)
+        for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+            k = load.index(min(load))
+            tasks[k].append(i)
+            load[k] += sizes[i]
+        return tasks
+
+    def solve(
+        self,
+        values: Mapping[Components, Initial] = {},
+        *,
+        t_span: tuple[float, float] | None = None,
+        save_at: ArrayLike | None = None,
+        solver: solvers.Solver | None = None,
+        events: Sequence[Events] = (),
+        executor: Executor | None = None,
+        n_tasks: int | None = None,
+    ) -> xr.Dataset:
+        """Solve every component and stitch the trajectories at ``save_at``.
+
+        ``save_at`` is required, as components take different steps.
+        Events are not supported.
+        Components are grouped into ``n_tasks`` tasks,
+        by default ``max_workers`` or the number of CPUs.
+        """
+        if save_at is None:
+            raise TypeError("must provide save_at, as components take different steps")
+        if len(events) > 0:
+            raise NotImplementedError("Events are not supported")
+        save_at = np.asarray(save_at, dtype=float)
+        if t_span is None:
+            t_span = (0, save_at[-1])
+        if solver is None:
+            solver = self.default_solver()
+        else:
+            self.check_solver(solver)
+        problem = self.create_problem(values, t_span=t_span)
+        for s in problem.scale:
+            if isinstance(s, pint.Quantity | pint.Unit):
+                raise TypeError("Decomposed simulation doesn't support units")
+
+        if executor is None and self.max_workers == 1:
+            results = self.solve_components(
+                values, t_span=t_span, save_at=save_at, solver=solver
+            )
+        else:
+            results = {}
+            own_executor = executor is None
+            if own_executor:
+                executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            if n_tasks is None:
+                n_tasks = self.max_workers or os.cpu_count() or 1
+            try:
+                futures = [
+                    executor.submit(
+                        _solve_components,
+                        self.model,
+                        values,
+                        task,
+                        t_span=t_span,
+                        save_at=save_at,
+                        solver=solver,
+                        cse=self.compiler.cse,
+                        jacobian=self._jacobian,
+                    )
+                    for task in self._tasks(n_tasks)
+                ]
+                for future in as_completed(futures):
+                    results.update(future.result())
+            finally:
+                if own_executor:
+                    executor.shutdown(cancel_futures=True)
+
+        y = np.empty((save_at.size, problem.y.size))
+        for i, index in enumerate(self.decomposition.components):
+            y[:, index] = results[i]
+        out = np.empty((save_at.size, len(problem.scale)))
+        out = problem.transform(save_at, y.T, problem.p, out.T).T
+        return xr.Dataset(
+            {
+                str(k): xr.DataArray(data=x * s, dims="time", coords={"time": save_at})
+                for k, s, x in zip(self.transform.output.keys(), problem.scale, out.T)
+            }
+        )
+
+
+@functools.lru_cache(maxsize=8)
+def _simulator(model: type[System], cse: bool, jacobian: bool) -> DecomposedSimulator:
+    # Compiled once per worker process, for the last few models.
+    return DecomposedSimulator(model, cse=cse, jacobian=jacobian, max_workers=1)
+
+
+def _solve_components(
+    model: type[System],
+    values: Mapping[Components, Initial],
+    components: Sequence[int],
+    /,
+    *,
+    cse: bool,
+    jacobian: bool,
+    **kwargs,
+) -> dict[int, NDArray]:
+    simulator = _simulator(model, cse, jacobian)
+    return simulator.solve_components(values, components, **kwargs)
@@ -0,0 +1,239 @@
+"""
+simbio.derivative
+~~~~~~~~~~~~~~~~~
+
+Symbolic differentiation of compiled expressions.
+
+Expressions are differentiated after substitution into vector form,
+with respect to items such as ``y[i]`` or ``p[j]``.
+Zeros are propagated eagerly, so derivatives of sparse rate laws stay small.
+
+Functions which are not differentiable everywhere, such as ``abs``,
+``min``, ``max`` and ``piecewise``, are differentiated piecewise,
+taking the derivative of the selected branch.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Hashable, Iterator
+from typing import Any
+
+from symbolite import Real
+from symbolite.abstract import real
+from symbolite.core.call import Call
+from symbolite.core.function import BinaryFunction
+from symbolite.core.symbolite_object import get_symbolite_info
+from symbolite.core.value import Name, Value
+
+# real.copysign is declared with a single argument.
+_copysign = BinaryFunction("copysign", "real", output_type=Real)
+
+
+def _call_info(x: Any):
+    if isinstance(x, Value):
+        value = get_symbolite_info(x).value
+        if isinstance(value, Call):
+            return get_symbolite_info(value)
+    return None
+
+
+def _call(x: Any):
+    info = _call_info(x)
+    if info is None:
+        return None, ()
+    return getattr(get_symbolite_info(info.func), "name", None), info.args
+
+
+def leaf_key(x: Any) -> Hashable | None:
+    """A hashable identifier for a named value or a vector item, e.g. ``y[0]``."""
+    if isinstance(x, Value):
+        value = get_symbolite_info(x).value
+        if isinstance(value, Name):
+            return value
+        name, args = _call(x)
+        if name == "getitem":
+            vector, index = args
+            return (get_symbolite_info(vector).value, index)
+    return None
+
+
+def yield_leaves(expr: Any) -> Iterator[Hashable]:
+    """Yield the keys of named values and vector items in an expression."""
+    stack = [expr]
+    while stack:
+        x = stack.pop()
+        key = leaf_key(x)
+        if key is not None:
+            yield key
+        else:
+            stack.extend(_call(x)[1])
+
+
+def _add(a, b):
+    if isinstance(a, int | float) and a == 0:
+        return b
+    if isinstance(b, int | float) and b == 0:
+        return a
+    return a + b
+
+
+def _sub(a, b):
+    if isinstance(b, int | float) and b == 0:
+        return a
+    if isinstance(a, int | float) and a == 0:
+        return -b
+    return a - b
+
+
+def _mul(a, b):
+    for x, y in ((a, b), (b, a)):
+        if isinstance(x, int | float):
+            if x == 0:
+                return 0
+            elif x == 1:
+                return y
+    return a * b
+
+
+def _div(a, b):
+    if isinstance(a, int | float) and a == 0:
+        return 0
+    if isinstance(b, int | float) and b == 1:
+        return a
+    return a / b
+
+
+def _pow(a, b):
+    if isinstance(b, int | float):
+        if b == 0:
+            return 1
+        elif b == 1:
+            return a
+    return a**b
+
+
+# d f(u) / du for unary functions.
+_unary = {
+    "neg": lambda u: -1,
+    "pos": lambda u: 1,
+    "exp": real.exp,
+    "log": lambda u: 1 / u,
+    "log10": lambda u: 1 / (u * math.log(10)),
+    "log2": lambda u: 1 / (u * math.log(2)),
+    "sqrt": lambda u: 1 / (2 * real.sqrt(u)),
+    "sin": real.cos,
+    "cos": lambda u: -real.sin(u),
+    "tan": lambda u: 1 / real.cos(u) ** 2,
+    "sinh": real.cosh,
+    "cosh": real.sinh,
+    "tanh": lambda u: 1 - real.tanh(u) ** 2,
+    "asin": lambda u: 1 / real.sqrt(1 - u**2),
+    "acos": lambda u: -1 / real.sqrt(1 - u**2),
+    "atan": lambda u: 1 / (1 + u**2),
+}
+
+
+def _step(x):
+    """1 if x >= 0, else 0."""
+    return (1 + _copysign(1, x)) / 2
+
+
+def _select(step, a, b):
+    """a where step is 1, b where it is 0."""
+    return _add(_mul(step, a), _mul(_sub(1, step), b))
+
+
+# Piecewise constant functions and comparisons.
+_constant = {"ceil", "floor", "trunc", "eq", "ne", "lt", "le", "gt", "ge"}
+
+
+def derivative(expr: Any, wrt: Any, /) -> Any:
+    """Derivative of expr with respect to a named value or vector item.
+
+    Returns 0 if expr does not depend on it.
+    """
+    target = leaf_key(wrt)
+    if target is None:
+        raise TypeError(f"cannot differentiate with respect to {wrt}")
+
+    contains: dict[int, bool] = {}
+
+    def depends(x) -> bool:
+        try:
+            return contains[id(x)]
+        except KeyError:
+            key = leaf_key(x)
+            if key is not None:
+                result = key == target
+            else:
+                result = any(depends(arg) for arg in _call(x)[1])
+            contains[id(x)] = result
+            return result
+
+    memo: dict[int, Any] = {}
+
+    def d(x):
+        try:
+            return memo[id(x)]
+        except KeyError:
+            memo[id(x)] = result = _derivative(x)
+            return result
+
+    def _derivative(x):
+        # Before dispatching, so that any function of constants is supported.
+        if not depends(x):
+            return 0
+        key = leaf_key(x)
+        if key is not None:
+            return 1
+
+        name, args = _call(x)
+        if name is None:
+            return 0  # a number or a constant
+        elif name == "add":
+            return _add(d(args[0]), d(args[1]))
+        elif name == "sub":
+            return _sub(d(args[0]), d(args[1]))
+        elif name == "mul":
+            a, b = args
+            return _add(_mul(d(a), b), _mul(a, d(b)))
+        elif name == "truediv":
+            a, b = args
+            da, db = d(a), d(b)
+            return _sub(_div(da, b), _div(_mul(a, db), _mul(b, b)))
+        elif name == "pow":
+            a, b = args
+            da, db = d(a), d(b)
+            result = _mul(_mul(b, _pow(a, _sub(b, 1))), da)
+            if not (isinstance(db, int | float) and db == 0):
+                result = _add(result, _mul(_mul(x, real.log(a)), db))
+            return result
+        elif name in _unary:
+            (u,) = args
+            return _mul(_unary[name](u), d(u))
+        elif name in ("abs", "fabs"):
+            (u,) = args
+            return _mul(_copysign(1, u), d(u))
+        elif name == "copysign":
+            a, b = args
+            return _mul(_mul(_copysign(1, a), _copysign(1, b)), d(a))
+        elif name in ("min", "max"):
+            # Folded pairwise, selecting the derivative of the extreme argument.
+            func = _call_info(x).func
+            value, result = args[0], d(args[0])
+            for arg in args[1:]:
+                diff = arg - value if name == "min" else value - arg
+                result = _select(_step(diff), result, d(arg))
+                value = func(value, arg)
+            return result
+        elif name == "piecewise":
+            # piecewise(value, condition, ..., [otherwise])
+            func = _call_info(x).func
+            return func(*(d(a) if i % 2 == 0 else a for i, a in enumerate(args)))
+        elif name in _constant:
+            return 0
+        else:
+            raise NotImplementedError(f"derivative of {name}")
+
+    return d(expr)
@@ -0,0 +1,323 @@
+"""
+simbio.ensemble
+~~~~~~~~~~~~~~~
+
+Solve a model for many parameter sets or initial conditions in a single call.
+
+All runs are stacked along a trailing batch axis
+and integrated together as one vectorized problem,
+reusing the compiled stoichiometry across the batch.
+Runs are not coupled, so the Jacobian of the batch is block diagonal,
+and is passed as a sparse matrix to the solvers in ``simbio.solvers``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from functools import cached_property
+
+import numpy as np
+import pint
+import xarray as xr
+from numpy.typing import ArrayLike, NDArray
+from poincare import solvers
+from poincare.compile import Compiled, identity_transform
+from poincare.simulator import Components, Problem
+from poincare.types import Initial
+from scipy import sparse
+from symbolite import Real
+from symbolite.ops import yield_named
+
+from . import System
+from .solvers import BDF
+from .stoichiometry import (
+    SparseKernel,
+    SparseSimulator,
+    StoichiometricJacobian,
+    StoichiometricRHS,
+)
+
+
+def has_dependents(compiled: Compiled, component: Components) -> bool:
+    """Whether other values in the model are computed from component."""
+    for v in compiled.mapper.values():
+        if isinstance(v, Real) and any(named == component for named in yield_named(v)):
+            return True
+    return False
+
+
+class BatchedRHS:
+    """Evaluates a StoichiometricRHS on a flattened (species, run) state."""
+
+    def __init__(self, rhs: StoichiometricRHS, /, *, shape: tuple[int, int]):
+        self.rhs = rhs
+        self.shape = shape
+
+    def __call__(self, t: float, y: NDArray, p: NDArray, dy: NDArray) -> NDArray:
+        self.rhs(t, y.reshape(self.shape), p, dy.reshape(self.shape))
+        return dy
+
+    @cached_property
+    def jacobian(self) -> BatchedJacobian | None:
+        # Used by simbio.solvers, if available.
+        if self.rhs.jacobian is None:
+            return None
+        return BatchedJacobian(self.rhs.jacobian, shape=self.shape)
+
+
+def _positions(
+    pattern: sparse.csr_array, rows: NDArray[np.intp], cols: NDArray[np.intp]
+) -> NDArray[np.intp]:
+    """Index in pattern.data of the entries at (rows, cols), which must exist."""
+    n_cols = pattern.shape[1]
+    pattern_rows = np.repeat(np.arange(pattern.shape[0]), np.diff(pattern.indptr))
+    keys = pattern_rows * n_cols + pattern.indices
+    return np.searchsorted(keys, rows * n_cols + cols)
+
+
+def _ranges(starts: NDArray[np.intp], counts: NDArray[np.intp]) -> NDArray[np.intp]:
+    """Concatenation of range(start, start + count) for each pair."""
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+def _entry_map(
+    pattern: sparse.csr_array, rows: NDArray[np.intp], cols: NDArray[np.intp], weights
+) -> sparse.csr_array:
+    """Matrix adding weighted terms to the entries at (rows, cols) of pattern."""
+    q = _positions(pattern, rows, cols)
+    return sparse.csr_array(
+        (weights, (q, np.arange(q.size))), shape=(pattern.nnz, q.size)
+    )
+
+
+def _product_map(
+    matrix: sparse.csr_array, kernel: SparseKernel, pattern: sparse.csr_array
+) -> sparse.csr_array:
+    """A such that ``A @ m.data`` is the data of ``matrix @ m`` in pattern,
+    for a matrix m with the sparsity of kernel."""
+    coo = sparse.coo_array(matrix)
+    counts = np.diff(kernel.indptr)[coo.col]
+    entries = _ranges(kernel.indptr[coo.col], counts)
+    q = _positions(pattern, np.repeat(coo.row, counts), kernel.indices[entries])
+    return sparse.csr_array(
+        (np.repeat(coo.data, counts), (q, entries)),
+        shape=(pattern.nnz, kernel.indices.size),
+    )
+
+
+def _kernel_data(kernel: SparseKernel, t: float, y: NDArray, p: NDArray) -> NDArray:
+    data = np.zeros((kernel.indices.size, y.shape[1]))
+    if kernel.func is not None:
+        kernel.func(t, y, p, data)
+    return data
+
+
+class BatchedJacobian:
+    """Block diagonal Jacobian of a BatchedRHS, one block per run.
+
+    In the flattened (species, run) state, ``y[i, r]`` is at ``i * n_runs + r``.
+
+    The kernels of the StoichiometricJacobian are evaluated for all runs at once,
+    and their entries are mapped to those of the Jacobian by sparse matrices
+    built once. Every run shares the sparsity pattern of the Jacobian,
+    so the indices of the block diagonal matrix are also built once.
+    """
+
+    def __init__(self, jacobian: StoichiometricJacobian, /, *, shape: tuple[int, int]):
+        self.jacobian = jacobian
+        self.shape = shape
+        rhs = jacobian.rhs
+
+        pattern = jacobian.sparsity
+        pattern.sum_duplicates()
+        self._rates = _product_map(rhs.matrix, jacobian.rates, pattern)
+
+        # J += sum_k f_k S_k @ dv/dy + (S_k @ v) df_k/dy
+        self._scaled: list[sparse.csr_array] = []
+        if jacobian.factors is not None:
+            factors = jacobian.factors
+            self._scaled = [
+                _product_map(m, jacobian.rates, pattern) for m in rhs.scaled
+            ]
+            ks, rows, entries = [], [], []
+            for k, matrix in enumerate(rhs.scaled):
+                i = np.unique(sparse.coo_array(matrix).row)
+                e = np.arange(factors.indptr[k], factors.indptr[k + 1])
+                ks.append(np.full(i.size * e.size, k))
+                rows.append(np.repeat(i, e.size))
+                entries.append(np.tile(e, i.size))
+            self._k, self._i, self._e = (
+                np.concatenate(x).astype(np.intp) for x in (ks, rows, entries)
+            )
+            self._factors = _entry_map(
+                pattern, self._i, factors.indices[self._e], np.ones(self._i.size)
+            )
+
+        # J[extra_index] += de/dy
+        if jacobian.extra is not None:
+            extra = jacobian.extra
+            rows = np.repeat(np.arange(extra.shape[0]), np.diff(extra.indptr))
+            self._extra = _entry_map(
+                pattern,
+                rhs.extra_index[rows],
+                extra.indices,
+                np.ones(extra.indices.size),
+            )
+
+        # Block diagonal layout: row i * n_runs + r holds the entries of row i,
+        # at columns j * n_runs + r.
+        n_runs = shape[1]
+        counts = np.repeat(np.diff(pattern.indptr), n_runs)
+        self._indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.intp)
+        batched_rows = np.repeat(np.arange(counts.size), counts)
+        self._run = batched_rows % n_runs
+        self._entry = (
+            pattern.indptr[batched_rows // n_runs]
+            + np.arange(counts.sum())
+            - self._indptr[batched_rows]
+        )
+        self._indices = (pattern.indices[self._entry] * n_runs + self._run).astype(
+            np.intp
+        )
+
+    def __call__(self, t: float, y: NDArray, p: NDArray, *args) -> sparse.csr_array:
+        jacobian, rhs = self.jacobian, self.jacobian.rhs
+        y = y.reshape(self.shape)
+        dv = _kernel_data(jacobian.rates, t, y, p)
+        data = self._rates @ dv
+        if jacobian.factors is not None:
+            f = np.empty((len(rhs.scaled), self.shape[1]))
+            rhs.factors(t, y, p, f)
+            for factor, matrix in zip(f, self._scaled):
+                data += factor * (matrix @ dv)
+            df = _kernel_data(jacobian.factors, t, y, p)
+            v = rhs.rate_vector(t, y, p)
+            sv = np.stack([matrix @ v for matrix in rhs.scaled])
+            data += self._factors @ (sv[self._k, self._i] * df[self._e])
+        if jacobian.extra is not None:
+            data += self._extra @ _kernel_data(jacobian.extra, t, y, p)
+
+        size = y.size
+        return sparse.csr_array(
+            (data[self._entry, self._run], self._indices, self._indptr),
+            shape=(size, size),
+        )
+
+
+class EnsembleSimulator:
+    """Solve a model for a batch of values in one vectorized integration.
+
+    ``EnsembleSimulator(Model).solve([Model.k, Model.A], values, save_at=t)``
+    takes a 2-D array of values with one row per run,
+    and returns a DataArray with dimensions (run, time, variable).
+
+    With ``jacobian=True``, the default solver is ``simbio.solvers.BDF``
+    with the block diagonal analytic Jacobian. Otherwise, it is LSODA,
+    which estimates a dense Jacobian of the whole batch.
+    """
+
+    def __init__(self, system: System | type[System], /, *, jacobian: bool = True):
+        self.sim = SparseSimulator(system, jacobian=jacobian)
+        self.model = self.sim.model
+        self.compiled = self.sim.compiled
+
+    def _has_dependents(self, component: Components) -> bool:
+        return has_dependents(self.compiled, component)
+
+    def create_problem(
+        self,
+        components: Sequence[Components],
+        values: ArrayLike,
+        /,
+        *,
+        common: Mapping[Components, Initial] = {},
+        t_span: tuple[float, float] = (0, np.inf),
+    ) -> Problem:
+        """Create a batched Problem.
+
+        ``values[i, j]`` is the value of ``components[j]`` for the i-th run,
+        while ``common`` values are shared by all runs.
+        """
+        values = np.asarray(values, dtype=float)
+        if values.ndim != 2 or values.shape[1] != len(components):
+            raise ValueError(
+                f"values must have shape (runs, {len(components)}), got {values.shape}"
+            )
+        n_runs = values.shape[0]
+
+        base = self.sim.create_problem(common, t_span=t_span)
+        for s in base.scale:
+            if isinstance(s, pint.Quantity | pint.Unit):
+                raise TypeError("Ensemble simulation doesn't support units")
+
+        y = np.repeat(base.y[:, None], n_runs, axis=1)
+        p = np.repeat(base.p[:, None], n_runs, axis=1)
+        var_index = {v: i for i, v in enumerate(self.compiled.variables)}
+        par_index = {v: i for i, v in enumerate(self.compiled.parameters)}
+        if all(
+            (c in var_index or c in par_index) and not self._has_dependents(c)
+            for c in components
+        ):
+            for c, column in zip(components, values.T):
+                if c in var_index:
+                    y[var_index[c]] = column
+                else:
+                    p[par_index[c]] = column
+        else:
+            # Other initials depend on these components, evaluate each run.
+            for i, row in enumerate(values):
+                problem = self.sim.create_problem(
+                    {**common, **dict(zip(components, row))}, t_span=t_span
+                )
+                y[:, i] = problem.y
+                p[:, i] = problem.p
+
+        return Problem(
+            rhs=BatchedRHS(self.compiled.func, shape=y.shape),
+            t=t_span,
+            y=y.ravel(),
+            p=p,
+            transform=identity_transform,
+            scale=[1] * y.size,
+        )
+
+    def solve(
+        self,
+        components: Sequence[Components],
+        values: ArrayLike,
+        /,
+        *,
+        common: Mapping[Components, Initial] = {},
+        t_span: tuple[float, float] | None = None,
+        save_at: ArrayLike | None = None,
+        solver: solvers.Solver | None = None,
+    ) -> xr.DataArray:
+        if save_at is not None:
+            save_at = np.asarray(save_at)
+
+        if t_span is None:
+            if save_at is None:
+                raise TypeError("must provide t_span and/or save_at.")
+            t_span = (0, save_at[-1])
+
+        if solver is None:
+            if self.compiled.func.jacobian is None:
+                solver = solvers.LSODA()
+            else:
+                solver = BDF()
+        else:
+            self.sim.check_solver(solver)
+        problem = self.create_problem(components, values, common=common, t_span=t_span)
+        solution = solver(problem, save_at=save_at)
+
+        n_variables = len(self.compiled.variables)
+        data = solution.y.reshape(solution.t.size, n_variables, -1).transpose(2, 0, 1)
+        return xr.DataArray(
+            data,
+            dims=("run", "time", "variable"),
+            coords={
+                "time": solution.t,
+                "variable": [str(v) for v in self.compiled.variables],
+            },
+        )
@@ -0,0 +1,286 @@
+"""
+simbio.fitting
+~~~~~~~~~~~~~~
+
+Estimate parameters from observed time courses.
+
+The negative log-likelihood of Gaussian measurement noise
+is minimized with L-BFGS-B, using gradients from the adjoint method.
+The model is compiled, and its initial state and parameters built,
+once per ``Fitter``. Each evaluation of the objective
+only updates the values of the fitted parameters.
+Multistart runs are fanned out across a process pool,
+compiling the model once per chunk of starts.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from numbers import Number
+
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike, NDArray
+from poincare.simulator import Components
+from poincare.types import Initial
+from scipy.optimize import minimize
+
+from . import System
+from .ensemble import has_dependents
+from .sensitivity import AdjointSensitivity
+
+
+@dataclass(frozen=True, kw_only=True)
+class FitResult:
+    """Result of a local optimization."""
+
+    parameters: Mapping[str, float]
+    loss: float
+    success: bool
+    message: str
+    n_evaluations: int
+
+
+class Fitter:
+    """Fit parameters of a model to observed time courses.
+
+    ``data`` is a DataFrame indexed by time, with one column per observed
+    variable, named as in the model. Missing values (NaN) are ignored.
+    ``sigma`` is the standard deviation of the measurement noise,
+    either shared or per column.
+
+    With ``log=True``, parameters are optimized in log space,
+    which keeps them positive. Their initial values and bounds
+    must then be strictly positive.
+    """
+
+    def __init__(
+        self,
+        model: System | type[System],
+        data: pd.DataFrame,
+        parameters: Sequence[Components],
+        /,
+        *,
+        values: Mapping[Components, Initial] = {},
+        sigma: float | Mapping[str, float] = 1,
+        log: bool = True,
+        rtol: float = 1e-6,
+        atol: float = 1e-9,
+    ):
+        self.model = model
+        self.parameters = list(parameters)
+        self.values = values
+        self.log = log
+        self.sensitivity = AdjointSensitivity(model, rtol=rtol, atol=atol)
+
+        names = [str(v) for v in self.sensitivity.compiled.variables]
+        for column in data.columns:
+            if column not in names:
+                raise ValueError(f"{column} is not a variable of the model")
+        data = data.sort_index()
+        self.data = data
+        self.save_at = data.index.to_numpy(dtype=float)
+        self._columns = np.array([names.index(c) for c in data.columns], dtype=np.intp)
+
+        if isinstance(sigma, Number):
+            sigma = {c: sigma for c in data.columns}
+        self.sigma = sigma
+        observed = data.to_numpy(dtype=float)
+        weights = np.array([1 / sigma[c] ** 2 for c in data.columns])
+        self._observed = np.nan_to_num(observed)
+        self._weights = np.where(np.isnan(observed), 0, weights)
+        self.n_evaluations = 0
+
+        # Components without dependents are set directly in y0 or p,
+        # where their input Jacobian is 1. Otherwise, the problem
+        # is rebuilt for each evaluation.
+        self._problem, self._dy0, self._dp = self.sensitivity.input_jacobian(
+            self.parameters, values
+        )
+        self._direct = not any(
+            has_dependents(self.sensitivity.compiled, c) for c in self.parameters
+        )
+
+    def initial_guess(self) -> NDArray:
+        """Current values of the parameters, in optimization space."""
+        sim = self.sensitivity
+        problem = self._problem
+        current = {
+            **dict(zip(sim.compiled.variables, problem.y)),
+            **dict(zip(sim.compiled.parameters, problem.p)),
+        }
+        theta = np.array(
+            [
+                self.values.get(c, current.get(c, sim.compiled.mapper.get(c)))
+                for c in self.parameters
+            ],
+            dtype=float,
+        )
+        return self._to_x(theta, "initial value")
+
+    def _to_x(self, theta: ArrayLike, what: str) -> NDArray:
+        theta = np.asarray(theta, dtype=float)
+        if not self.log:
+            return theta
+        for c, value in zip(self.parameters, theta):
+            if not value > 0:
+                raise ValueError(
+                    f"the {what} of {c} must be positive to fit in log space,"
+                    f" got {value}"
+                )
+        return np.log(theta)
+
+    def _to_theta(self, x: NDArray) -> NDArray:
+        return np.exp(x) if self.log else np.asarray(x, dtype=float)
+
+    def objective(self, x: NDArray) -> tuple[float, NDArray]:
+        """Negative log-likelihood (up to a constant) and its gradient."""
+        self.n_evaluations += 1
+        theta = self._to_theta(x)
+        columns, observed, weights = self._columns, self._observed, self._weights
+
+        def loss_gradient(y):
+            g = np.zeros_like(y)
+            g[:, columns] = weights * (y[:, columns] - observed)
+            return g
+
+        try:
+            if self._direct:
+                problem, dy0, dp = self._problem, self._dy0, self._dp
+                y = np.array(problem.y, dtype=float)
+                p = np.array(problem.p, dtype=float)
+                index, j = np.nonzero(dy0)
+                y[index] = theta[j]
+                index, j = np.nonzero(dp)
+                p[index] = theta[j]
+                problem = replace(problem, y=y, p=p)
+            else:
+                problem, dy0, dp = self.sensitivity.input_jacobian(
+                    self.parameters,
+                    {**self.values, **dict(zip(self.parameters, theta))},
+                )
+            result = self.sensitivity.solve_problem(
+                problem,
+                dy0,
+                dp,
+                parameters=self.parameters,
+                save_at=self.save_at,
+                loss_gradient=loss_gradient,
+            )
+        except RuntimeError:
+            return np.inf, np.zeros_like(x)
+
+        residuals = result["y"].values[:, columns] - observed
+        loss = 0.5 * float(np.sum(weights * residuals**2))
+        gradient = result["gradient"].values
+        if self.log:
+            gradient = gradient * theta
+        return loss, gradient
+
+    def fit(
+        self,
+        x0: NDArray | None = None,
+        /,
+        *,
+        bounds: Sequence[tuple[float, float]] | None = None,
+        options: Mapping = {},
+    ) -> FitResult:
+        """Minimize the objective from x0, in optimization space.
+
+        ``bounds`` are given for the parameters themselves.
+        """
+        if x0 is None:
+            x0 = self.initial_guess()
+        if bounds is not None:
+            low, high = np.asarray(bounds, dtype=float).T
+            bounds = list(
+                zip(self._to_x(low, "lower bound"), self._to_x(high, "upper bound"))
+            )
+
+        start = self.n_evaluations
+        result = minimize(
+            self.objective,
+            x0,
+            jac=True,
+            method="L-BFGS-B",
+            bounds=bounds,
+            options=dict(options),
+        )
+        return FitResult(
+            parameters={
+                str(c): float(v)
+                for c, v in zip(self.parameters, self._to_theta(result.x))
+            },
+            loss=float(result.fun),
+            success=bool(result.success),
+            message=str(result.message),
+            n_evaluations=self.n_evaluations - start,
+        )
+
+    def multistart(
+        self,
+        n_starts: int,
+        /,
+        *,
+        bounds: Sequence[tuple[float, float]],
+        seed: int | np.random.SeedSequence | None = None,
+        options: Mapping = {},
+        max_workers: int | None = None,
+        chunk_size: int = 1,
+        executor: Executor | None = None,
+    ) -> list[FitResult]:
+        """Fit from ``n_starts`` random starts within bounds,
+        uniformly distributed in optimization space.
+
+        Returns the results sorted by loss.
+        The model must be importable by the workers,
+        i.e. defined at the module level.
+        """
+        low, high = np.asarray(bounds, dtype=float).T
+        rng = np.random.default_rng(seed)
+        low, high = self._to_x(low, "lower bound"), self._to_x(high, "upper bound")
+        starts = rng.uniform(low, high, (n_starts, low.size))
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [
+                executor.submit(
+                    _fit_chunk,
+                    self.model,
+                    self.data,
+                    self.parameters,
+                    starts[i : i + chunk_size],
+                    values=self.values,
+                    sigma=self.sigma,
+                    log=self.log,
+                    rtol=self.sensitivity.rtol,
+                    atol=self.sensitivity.atol,
+                    bounds=bounds,
+                    options=options,
+                )
+                for i in range(0, n_starts, chunk_size)
+            ]
+            results = [r for f in as_completed(futures) for r in f.result()]
+        finally:
+            if own_executor:
+                executor.shutdown()
+        return sorted(results, key=lambda r: r.loss)
+
+
+def _fit_chunk(
+    model: type[System],
+    data: pd.DataFrame,
+    parameters: Sequence[Components],
+    starts: NDArray,
+    /,
+    *,
+    bounds: Sequence[tuple[float, float]],
+    options: Mapping,
+    **kwargs,
+) -> list[FitResult]:
+    fitter = Fitter(model, data, parameters, **kwargs)
+    return [fitter.fit(x0, bounds=bounds, options=options) for x0 in starts]
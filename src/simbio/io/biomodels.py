@@ -1,8 +1,131 @@
-from typing import Sequence
+"""
+simbio.io.biomodels
+~~~~~~~~~~~~~~~~~~~
+
+Load models from BioModels,
+either from the network or from a local mirror.
+
+A mirror is a directory of OMEX archives (``<id>.omex``)
+or extracted SBML files (``<id>.xml``),
+and can be populated in bulk with :func:`prefetch`::
+
+    python -m simbio.io.biomodels prefetch mirror/ BIOMD1 BIOMD12
+"""
+
+import argparse
+import json
+import os
+import zipfile
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import Protocol
 
 import biomodels
+from biomodels.common import fix_id
+from biomodels.omex import Manifest
+
+from .sbml import ModelCache, loads
+
+INDEX = "index.json"
+
+
+class Repository(Protocol):
+    def get_sbml(self, model_id: str) -> str: ...
+
+
+class RemoteRepository:
+    """Downloads models from BioModels, caching the OMEX archives with pooch."""
+
+    def get_sbml(self, model_id: str) -> str:
+        return biomodels.get_omex(model_id).master.read_text()
+
+
+class LocalRepository:
+    """Reads models from a local mirror, without network access."""
+
+    def __init__(self, directory: str | PathLike):
+        self.directory = Path(directory)
+        if not self.directory.is_dir():
+            raise NotADirectoryError(self.directory)
+
+        index = self.directory / INDEX
+        if index.exists():
+            self.files = json.loads(index.read_text())
+        else:
+            self.files = _scan(self.directory)
+
+    def __contains__(self, model_id: str) -> bool:
+        return fix_id(model_id) in self.files
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def get_sbml(self, model_id: str) -> str:
+        model_id = fix_id(model_id)
+        try:
+            file = self.directory / self.files[model_id]
+        except KeyError:
+            raise FileNotFoundError(
+                f"{model_id} not found in {self.directory}"
+            ) from None
 
-from .sbml import loads
+        if file.suffix == ".omex":
+            root = zipfile.Path(file)
+            manifest = Manifest.from_xml((root / "manifest.xml").read_bytes())
+            for c in manifest.contents:
+                if c.master:
+                    return (root / c.location).read_text()
+            raise ValueError(f"no master file in {file}")
+        return file.read_text()
+
+
+def _scan(directory: Path) -> dict[str, str]:
+    files = {}
+    # Extracted SBML takes precedence over archives.
+    for suffix in (".omex", ".xml"):
+        for file in directory.glob(f"*{suffix}"):
+            files[fix_id(file.stem)] = file.name
+    return files
+
+
+def build_index(directory: str | PathLike) -> dict[str, str]:
+    """Scan a mirror and write its index, mapping model ids to files."""
+    directory = Path(directory)
+    files = dict(sorted(_scan(directory).items()))
+    (directory / INDEX).write_text(json.dumps(files, indent=1))
+    return files
+
+
+def prefetch(
+    model_ids: Iterable[str],
+    directory: str | PathLike,
+    *,
+    max_workers: int = 8,
+    overwrite: bool = False,
+) -> dict[str, str]:
+    """Download models concurrently into a mirror as extracted SBML,
+    and update its index."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    remote = RemoteRepository()
+
+    def fetch(model_id: str):
+        file = directory / f"{fix_id(model_id)}.xml"
+        if overwrite or not file.exists():
+            tmp = file.with_suffix(".xml.tmp")
+            tmp.write_text(remote.get_sbml(model_id))
+            os.replace(tmp, file)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Consume the iterator to raise download errors.
+        for _ in executor.map(fetch, model_ids):
+            pass
+    return build_index(directory)
 
 
 def load(
@@ -10,12 +133,56 @@ def load(
     *,
     name: str | None = None,
     ignore_namespaces: Sequence[str] = [],
+    cache: ModelCache | str | PathLike | None = None,
+    repository: Repository | str | PathLike | None = None,
 ):
-    omex = biomodels.get_omex(model_id)
-    text = omex.master.read_text()
+    """Load a model from BioModels.
+
+    ``repository`` can be a local mirror directory,
+    in which case the network is never used.
+    """
+    if repository is None:
+        repository = RemoteRepository()
+    elif isinstance(repository, str | PathLike):
+        repository = LocalRepository(repository)
+
+    text = repository.get_sbml(model_id)
     model = loads(
         text,
         name=name,
         ignore_namespaces=ignore_namespaces,
+        cache=cache,
     )
     return model
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m simbio.io.biomodels")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("prefetch", help="download models into a mirror")
+    p.add_argument("directory")
+    p.add_argument("model_ids", nargs="*", help="defaults to all BioModels")
+    p.add_argument("--max-workers", type=int, default=8)
+    p.add_argument("--overwrite", action="store_true")
+
+    p = commands.add_parser("index", help="rebuild the index of a mirror")
+    p.add_argument("directory")
+
+    args = parser.parse_args(argv)
+    match args.command:
+        case "prefetch":
+            model_ids = args.model_ids or biomodels.get_all_identifiers()
+            files = prefetch(
+                model_ids,
+                args.directory,
+                max_workers=args.max_workers,
+                overwrite=args.overwrite,
+            )
+        case "index":
+            files = build_index(args.directory)
+    print(f"{len(files)} models in {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+simbio.io.graph.array
+~~~~~~~~~~~~~~~~~~~~~
+
+Array-backed graphs of species and reactions.
+
+Nodes are integer ids into the ``species`` and ``reactions`` sequences,
+and edges are sparse matrices. Projections are computed
+by sparse matrix products, instead of by traversing a networkx graph,
+so that they scale to models with tens of thousands of reactions.
+networkx is only required to export them.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, assert_never
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy import sparse
+
+from ... import RateLaw, Variable
+from ...core import Compartment, Species
+
+if TYPE_CHECKING:
+    from networkx import DiGraph, Graph
+
+
+@dataclass(frozen=True, kw_only=True)
+class ProjectedGraph:
+    """A graph with a boolean adjacency matrix,
+    where ``adjacency[i, k]`` is an edge from ``nodes[i]`` to ``nodes[k]``.
+
+    Undirected graphs have a symmetric adjacency matrix.
+    """
+
+    nodes: Sequence
+    adjacency: sparse.csr_array
+    directed: bool
+    # Attributes of each node, exported to networkx.
+    node_data: Sequence[Mapping] | None = None
+
+    def neighbors(self, i: int) -> NDArray[np.intp]:
+        """Successors of node i, or its neighbors if undirected."""
+        a = self.adjacency
+        return a.indices[a.indptr[i] : a.indptr[i + 1]]
+
+    def degree(self) -> NDArray[np.intp]:
+        """Out-degree of each node, or its degree if undirected."""
+        return np.diff(self.adjacency.indptr)
+
+    def to_networkx(self) -> Graph | DiGraph:
+        from networkx import DiGraph, Graph
+
+        g = DiGraph() if self.directed else Graph()
+        if self.node_data is None:
+            g.add_nodes_from(self.nodes)
+        else:
+            g.add_nodes_from(zip(self.nodes, self.node_data))
+        edges = self.adjacency if self.directed else sparse.triu(self.adjacency, k=1)
+        edges = sparse.coo_array(edges)
+        g.add_edges_from(
+            (self.nodes[i], self.nodes[k]) for i, k in zip(edges.row, edges.col)
+        )
+        return g
+
+
+@dataclass(frozen=True, kw_only=True)
+class ReactionGraph:
+    """A directed bipartite graph of species and reactions.
+
+    ``reactants[i, j]`` and ``products[i, j]`` are the stoichiometries
+    of ``species[i]`` as a reactant and as a product of ``reactions[j]``.
+    """
+
+    species: Sequence[Variable]
+    reactions: Sequence[RateLaw]
+    reactants: sparse.csr_array
+    products: sparse.csr_array
+
+    @property
+    def incidence(self) -> sparse.csr_array:
+        """Boolean matrix of species taking part in each reaction."""
+        return sparse.csr_array((self.reactants != 0) + (self.products != 0))
+
+    def to_species_graph(self, *, directed: bool = True) -> ProjectedGraph:
+        """Project into the species graph.
+
+        If directed, as in ``simbio.io.graph.networkx.to_species_graph``,
+        there is an edge from each reactant to each product of a reaction.
+        Otherwise, two species are connected
+        if they take part in the same reaction.
+        """
+        if directed:
+            adjacency = _binary(self.reactants) @ _binary(self.products).T
+        else:
+            incidence = _binary(self.incidence)
+            adjacency = incidence @ incidence.T
+        return ProjectedGraph(
+            nodes=self.species,
+            adjacency=_without_diagonal(adjacency),
+            directed=directed,
+        )
+
+    def to_reaction_graph(self, *, directed: bool = True) -> ProjectedGraph:
+        """Project into the reaction graph, with nodes named as the reactions.
+
+        If directed, as in ``simbio.io.graph.networkx.to_reaction_graph``,
+        there is an edge from each reaction to those consuming its products.
+        Otherwise, two reactions are connected if they share a common species.
+        """
+        if directed:
+            adjacency = _binary(self.products).T @ _binary(self.reactants)
+        else:
+            incidence = _binary(self.incidence)
+            adjacency = incidence.T @ incidence
+        return ProjectedGraph(
+            nodes=[str(r) for r in self.reactions],
+            adjacency=_without_diagonal(adjacency),
+            directed=directed,
+            node_data=[{"reaction": r} for r in self.reactions],
+        )
+
+    def to_networkx(self) -> DiGraph:
+        """Export to the networkx graph of ``simbio.io.graph.networkx.graph``."""
+        from networkx import DiGraph
+
+        g = DiGraph()
+        g.add_nodes_from(self.species)
+        names = [str(r) for r in self.reactions]
+        for name, r in zip(names, self.reactions):
+            g.add_node(name, reaction=r)
+        for matrix, reverse in ((self.reactants, False), (self.products, True)):
+            coo = matrix.tocoo()
+            for i, j, s in zip(coo.row, coo.col, coo.data):
+                edge = (
+                    (names[j], self.species[i])
+                    if reverse
+                    else (self.species[i], names[j])
+                )
+                g.add_edge(*edge, stoichiometry=s)
+        return g
+
+
+def _binary(matrix: sparse.csr_array) -> sparse.csr_array:
+    return sparse.csr_array(matrix != 0, dtype=np.int32)
+
+
+def _without_diagonal(matrix: sparse.csr_array) -> sparse.csr_array:
+    matrix = sparse.csr_array(matrix, dtype=bool)
+    matrix.setdiag(False)
+    matrix.eliminate_zeros()
+    matrix.sort_indices()
+    return matrix
+
+
+def graph(model: type[Compartment], /) -> ReactionGraph:
+    """Construct a directed bipartite graph of Species and Reactions."""
+    species: dict[Variable, int] = {}
+    reactions: list[RateLaw] = []
+    entries: tuple[list, list] = ([], [])  # reactants, products
+    for x in model._yield(Species | RateLaw):  # type: ignore
+        match x:
+            case Species():
+                species.setdefault(x, len(species))
+            case RateLaw():
+                j = len(reactions)
+                reactions.append(x)
+                for side, edges in zip(entries, (x.reactants, x.products)):
+                    for e in edges:
+                        i = species.setdefault(e.variable, len(species))
+                        side.append((i, j, e.stoichiometry))
+            case _:
+                assert_never(x)
+
+    shape = (len(species), len(reactions))
+
+    def matrix(entries: list) -> sparse.csr_array:
+        if len(entries) == 0:
+            return sparse.csr_array(shape)
+        rows, cols, data = zip(*entries)
+        return sparse.csr_array(
+            (np.asarray(data, dtype=float), (rows, cols)), shape=shape
+        )
+
+    return ReactionGraph(
+        species=list(species),
+        reactions=reactions,
+        reactants=matrix(entries[0]),
+        products=matrix(entries[1]),
+    )
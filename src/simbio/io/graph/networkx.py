@@ -2,7 +2,8 @@
 
 from networkx import DiGraph, Graph, bipartite
 
-from ...core import Compartment, RateLaw, Species
+from ... import RateLaw
+from ...core import Compartment, Species
 
 
 def graph(model: type[Compartment], /) -> DiGraph:
@@ -0,0 +1,82 @@
+import numpy as np
+from pytest import importorskip
+
+from ... import MassAction
+from ...core import Compartment, Species, Volume, concentration, volume
+from .array import graph
+
+
+class Model(Compartment):
+    V: Volume = volume(default=1)
+    A: Species = concentration(default=1)
+    B: Species = concentration(default=1)
+    C: Species = concentration(default=1)
+    D: Species = concentration(default=1)
+    E: Species = concentration(default=1)
+    forward = MassAction(reactants=[2 * A, B], products=[C], rate=1)
+    reverse = MassAction(reactants=[C], products=[2 * A, B], rate=1)
+    conversion = MassAction(reactants=[C], products=[D], rate=1)
+    creation = MassAction(reactants=[], products=[E], rate=1)
+
+
+def test_graph():
+    g = graph(Model)
+    assert g.species == [Model.A, Model.B, Model.C, Model.D, Model.E]
+    assert g.reactions == [
+        Model.forward,
+        Model.reverse,
+        Model.conversion,
+        Model.creation,
+    ]
+    np.testing.assert_array_equal(
+        g.reactants.toarray(),
+        [[2, 0, 0, 0], [1, 0, 0, 0], [0, 1, 1, 0], [0, 0, 0, 0], [0, 0, 0, 0]],
+    )
+    np.testing.assert_array_equal(
+        g.products.toarray(),
+        [[0, 2, 0, 0], [0, 1, 0, 0], [1, 0, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]],
+    )
+
+
+def test_projections():
+    g = graph(Model)
+    species = g.to_species_graph(directed=False)
+    np.testing.assert_array_equal(species.neighbors(0), [1, 2])
+    np.testing.assert_array_equal(species.degree(), [2, 2, 3, 1, 0])
+
+    reactions = g.to_reaction_graph(directed=False)
+    assert reactions.nodes == [str(r) for r in g.reactions]
+    np.testing.assert_array_equal(reactions.neighbors(2), [0, 1])
+    np.testing.assert_array_equal(reactions.degree(), [2, 2, 2, 0])
+
+
+def test_directed_projections():
+    g = graph(Model)
+    species = g.to_species_graph()
+    # A -> C, B -> C, C -> A, C -> B, C -> D
+    np.testing.assert_array_equal(species.neighbors(0), [2])
+    np.testing.assert_array_equal(species.neighbors(2), [0, 1, 3])
+    np.testing.assert_array_equal(species.degree(), [1, 1, 3, 0, 0])
+
+    reactions = g.to_reaction_graph()
+    # forward produces C, consumed by reverse and conversion
+    np.testing.assert_array_equal(reactions.neighbors(0), [1, 2])
+    np.testing.assert_array_equal(reactions.neighbors(1), [0])
+    np.testing.assert_array_equal(reactions.degree(), [2, 1, 0, 0])
+
+
+def test_networkx():
+    nx = importorskip("networkx")
+    from . import networkx
+
+    expected = networkx.graph(Model)
+    result = graph(Model).to_networkx()
+    assert nx.utils.graphs_equal(result, expected)
+    assert nx.utils.graphs_equal(
+        graph(Model).to_species_graph().to_networkx(),
+        networkx.to_species_graph(expected),
+    )
+    assert nx.utils.graphs_equal(
+        graph(Model).to_reaction_graph().to_networkx(),
+        networkx.to_reaction_graph(expected),
+    )
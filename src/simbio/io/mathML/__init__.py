@@ -1,4 +1,4 @@
-from .exporter import to_mathML
+from .exporter import MathMLWriter, to_mathML, to_mathML_strings
 from .importer import mathMLImporter
 
-__all__ = ["mathMLImporter", "to_mathML"]
+__all__ = ["MathMLWriter", "mathMLImporter", "to_mathML", "to_mathML_strings"]
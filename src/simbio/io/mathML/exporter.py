@@ -1,9 +1,19 @@
+import math
+from collections.abc import Callable, Iterable, Mapping
 from functools import singledispatch as dispatch
+from numbers import Integral, Number
+from typing import Any
+from xml.sax.saxutils import escape
 
 import libsbml
+from poincare import Independent
+from poincare._node import Node
 from symbolite import Real
 from symbolite.abstract import real
+from symbolite.abstract.boolean import Boolean
+from symbolite.core.call import Call
 from symbolite.core.symbolite_object import get_symbolite_info
+from symbolite.core.value import Name
 
 mapper = {
     real.add: libsbml.AST_PLUS,
@@ -12,6 +22,7 @@
     real.mul: libsbml.AST_TIMES,
     real.truediv: libsbml.AST_DIVIDE,
     real.pow: libsbml.AST_POWER,
+    real.pow_op: libsbml.AST_POWER,
     "libsbml.AST_INTEGER": libsbml.AST_INTEGER,
     "libsbml.AST_REAL": libsbml.AST_REAL,
     "libsbml.AST_REAL_E": libsbml.AST_REAL_E,
@@ -188,18 +199,220 @@ def float_to_mathML(x: float):
     return node
 
 
-@to_mathML.register
-def real_to_mathML(x: Real):
-    if x.expression is None:
+@to_mathML.register(Boolean)
+@to_mathML.register(Real)
+def real_to_mathML(x: Real | Boolean):
+    value = get_symbolite_info(x).value
+    if isinstance(value, Name):
         node = libsbml.ASTNode(libsbml.AST_NAME)
         node.setId(str(x))
-        node.setName(get_symbolite_info(x).value.name)
+        node.setName(value.name)
         return node
+    elif not isinstance(value, Call):
+        return to_mathML(value)
 
-    if len(x.expression.kwargs) > 0:
+    expression = get_symbolite_info(value)
+    if len(expression.kwargs_items) > 0:
         raise NotImplementedError("mathML does not support functions with kwargs")
 
-    node = libsbml.ASTNode(to_mathML(x.expression.func))
-    for arg in x.expression.args:
+    node = libsbml.ASTNode(to_mathML(expression.func))
+    for arg in expression.args:
         node.addChild(to_mathML(arg))
     return node
+
+
+MATHML_NS = "http://www.w3.org/1998/Math/MathML"
+TIME_URL = "http://www.sbml.org/sbml/symbols/time"
+
+# MathML element of each symbolite operator or function, by name.
+elements = {
+    "add": "plus",
+    "sub": "minus",
+    "neg": "minus",
+    "mul": "times",
+    "truediv": "divide",
+    "pow": "power",
+    "exp": "exp",
+    "log": "ln",
+    "log10": "log",  # base 10 by default
+    "sqrt": "root",  # degree 2 by default
+    "abs": "abs",
+    "floor": "floor",
+    "ceil": "ceiling",
+    "factorial": "factorial",
+    "sin": "sin",
+    "cos": "cos",
+    "tan": "tan",
+    "sinh": "sinh",
+    "cosh": "cosh",
+    "tanh": "tanh",
+    "asin": "arcsin",
+    "acos": "arccos",
+    "atan": "arctan",
+    "asinh": "arcsinh",
+    "acosh": "arccosh",
+    "atanh": "arctanh",
+    "eq": "eq",
+    "ne": "neq",
+    "lt": "lt",
+    "le": "leq",
+    "gt": "gt",
+    "ge": "geq",
+    "and_": "and",
+    "or_": "or",
+    "xor": "xor",
+    "invert": "not",
+}
+constants = {"pi": "<pi/>", "e": "<exponentiale/>"}
+# Chains of associative operators are written as a single n-ary apply.
+nary = {"add", "mul", "and_", "or_"}
+
+
+def _call(x):
+    info = get_symbolite_info(x)
+    value = getattr(info, "value", None)
+    if isinstance(value, Call):
+        call = get_symbolite_info(value)
+        if len(call.kwargs_items) > 0:
+            raise NotImplementedError("mathML does not support functions with kwargs")
+        return get_symbolite_info(call.func).name, call.args
+    return None, ()
+
+
+def number_to_mathML(x: Number) -> str:
+    if isinstance(x, bool):
+        return "<true/>" if x else "<false/>"
+    elif isinstance(x, Integral):
+        return f'<cn type="integer">{int(x)}</cn>'
+    x = float(x)
+    if math.isnan(x):
+        return "<notanumber/>"
+    elif math.isinf(x):
+        return "<infinity/>" if x > 0 else "<apply><minus/><infinity/></apply>"
+    return f"<cn>{x!r}</cn>"
+
+
+class MathMLWriter:
+    """Serialize symbolite expressions as MathML text.
+
+    Unlike ``to_mathML``, no libsbml AST is built.
+    Expressions are traversed with an explicit stack, so that deep
+    expressions do not hit the recursion limit, and written as a list
+    of fragments, joined once. Only the text of subexpressions that are
+    referenced more than once, within or across expressions, is kept
+    and reused.
+
+    Symbols are written with ``names``, e.g. a mapping to SBML ids,
+    or by default with their own name. Independents are written as time.
+    """
+
+    def __init__(self, names: Mapping[Any, str] | Callable[[Any], str] | None = None):
+        self.names = names
+        # Subexpressions already written, by id,
+        # keeping a reference so that ids are not reused.
+        self._seen: dict[int, Any] = {}
+        # Those referenced more than once, and their text.
+        self._shared: set[int] = set()
+        self._cache: dict[int, str] = {}
+
+    def name(self, x) -> str:
+        if isinstance(self.names, Mapping):
+            return self.names[x]
+        elif self.names is not None:
+            return self.names(x)
+        elif isinstance(x, Node):
+            return str(x)
+        return get_symbolite_info(x).value.name
+
+    def _leaf(self, x) -> str:
+        value = get_symbolite_info(x).value
+        if isinstance(x, Independent):
+            return f'<csymbol encoding="text" definitionURL="{TIME_URL}">time</csymbol>'
+        elif isinstance(value, Name) and value.namespace == "real":
+            try:
+                return constants[value.name]
+            except KeyError:
+                raise NotImplementedError(f"constant {value.name}") from None
+        return f"<ci>{escape(self.name(x))}</ci>"
+
+    def _count(self, expr) -> None:
+        """Mark the subexpressions of expr that were already seen as shared."""
+        seen = self._seen
+        stack = [expr]
+        while stack:
+            x = stack.pop()
+            if isinstance(x, Number):
+                continue
+            name, args = _call(x)
+            if name is None:
+                continue
+            elif seen.get(id(x)) is x:
+                # Its own subexpressions were counted the first time.
+                self._shared.add(id(x))
+                continue
+            seen[id(x)] = x
+            stack.extend(_operands(x, name) if name in nary else args)
+
+    def content(self, expr) -> str:
+        """MathML content of expr, without the enclosing math element."""
+        self._count(expr)
+        shared, cache = self._shared, self._cache
+        out: list[str] = []
+        # An expression to write, or the end of one started at out[start].
+        stack: list[tuple[Any, int | None]] = [(expr, None)]
+        while stack:
+            x, start = stack.pop()
+            if start is not None:
+                if _call(x)[0] != "pos":
+                    out.append("</apply>")
+                if id(x) in shared:
+                    cache[id(x)] = text = "".join(out[start:])
+                    del out[start:]
+                    out.append(text)
+                continue
+
+            if isinstance(x, Number):
+                out.append(number_to_mathML(x))
+                continue
+            text = cache.get(id(x))
+            if text is not None:
+                out.append(text)
+                continue
+
+            name, args = _call(x)
+            if name is None:
+                out.append(self._leaf(x))
+                continue
+            elif name not in elements and name != "pos":
+                raise NotImplementedError(f"mathML does not support {name}")
+            elif name in nary:
+                args = list(_operands(x, name))
+            stack.append((x, len(out)))
+            if name != "pos":
+                out.append(f"<apply><{elements[name]}/>")
+            stack.extend((a, None) for a in reversed(args))
+        return "".join(out)
+
+    def math(self, expr) -> str:
+        """A MathML math element, e.g. for an SBML kinetic law."""
+        return f'<math xmlns="{MATHML_NS}">{self.content(expr)}</math>'
+
+
+def _operands(x, name: str):
+    """Operands of x, flattening nested calls of the same operator, in order."""
+    stack = [x]
+    while stack:
+        y = stack.pop()
+        if y is x or (not isinstance(y, Number) and _call(y)[0] == name):
+            stack.extend(reversed(_call(y)[1]))
+        else:
+            yield y
+
+
+def to_mathML_strings(
+    expressions: Iterable,
+    names: Mapping[Any, str] | Callable[[Any], str] | None = None,
+) -> list[str]:
+    """MathML math elements of many expressions, sharing a single cache."""
+    writer = MathMLWriter(names)
+    return [writer.math(expr) for expr in expressions]
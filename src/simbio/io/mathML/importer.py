@@ -6,7 +6,6 @@
 from libsbml import ASTNode
 from symbolite import Real
 from symbolite.abstract import real
-from symbolite.core import as_function
 
 from .symbol import MathMLSpecialSymbol, MathMLSymbol
 
@@ -36,6 +35,11 @@ def minus(*args):
         raise TypeError("Received AST_MINUS with more than 2 children.")
 
 
+def power(base, exponent):
+    # As the ** operator, which differs from real.pow in symbolite >= 1.1.
+    return base**exponent
+
+
 def root(*args):
     match args:
         case (arg,) | (2, arg):
@@ -66,7 +70,7 @@ def impl(*args):
     libsbml.AST_MINUS: minus,
     libsbml.AST_TIMES: real.mul,
     libsbml.AST_DIVIDE: real.truediv,
-    libsbml.AST_POWER: real.pow,
+    libsbml.AST_POWER: power,
     libsbml.AST_INTEGER: get_value(int),
     libsbml.AST_REAL: get_value(float),
     libsbml.AST_REAL_E: get_value(float),
@@ -107,7 +111,7 @@ def impl(*args):
     libsbml.AST_FUNCTION_LN: real.log,
     libsbml.AST_FUNCTION_LOG: log,
     libsbml.AST_FUNCTION_PIECEWISE: "AST_FUNCTION_PIECEWISE",
-    libsbml.AST_FUNCTION_POWER: real.pow,
+    libsbml.AST_FUNCTION_POWER: power,
     libsbml.AST_FUNCTION_ROOT: root,
     libsbml.AST_FUNCTION_SEC: "AST_FUNCTION_SEC",
     libsbml.AST_FUNCTION_SECH: "AST_FUNCTION_SECH",
@@ -221,19 +225,78 @@ def impl(*args):
 }
 
 
+# Associative operators are flattened across nested nodes of the same type,
+# and rebuilt as balanced trees instead of left-deep chains.
+associative = {
+    libsbml.AST_PLUS: (real.add, 0),
+    libsbml.AST_TIMES: (real.mul, 1),
+    libsbml.AST_LOGICAL_AND: (real.and_, True),
+    libsbml.AST_LOGICAL_OR: (real.or_, False),
+}
+
+
+def balanced(func, identity, args: list):
+    if len(args) == 0:
+        return identity
+    while len(args) > 1:
+        reduced_args = [func(x, y) for x, y in zip(args[::2], args[1::2])]
+        if len(args) % 2 == 1:
+            reduced_args.append(args[-1])
+        args = reduced_args
+    return args[0]
+
+
+def yield_operands(node: libsbml.ASTNode):
+    """Yield the children of node, flattening nested nodes of the same
+    associative type, in order."""
+    node_type = node.getType()
+    stack = [node]
+    while stack:
+        x = stack.pop()
+        if x is node or (x.getType() == node_type and x.getNumChildren() > 1):
+            stack.extend(x.getChild(i) for i in reversed(range(x.getNumChildren())))
+        else:
+            yield x
+
+
 class mathMLImporter:
     def __init__(self) -> None:
         self.mapper = ChainMap({}, mapper)
 
     def convert(self, node: libsbml.ASTNode):
-        func = self.mapper[node.getType()]
-        if isinstance(func, str):
-            raise NotImplementedError(func)
-        elif isinstance(func, dict):
-            func = func[node.getName()]
-
-        if node.getNumChildren() > 0:
-            return func(*self.yield_children(node))
+        """Convert an AST with an explicit stack, without recursion."""
+        stack: list[tuple[libsbml.ASTNode, object, int | None]] = [(node, None, None)]
+        results = []
+        while stack:
+            node, func, n_args = stack.pop()
+            if n_args is not None:
+                args = results[len(results) - n_args :]
+                del results[len(results) - n_args :]
+                results.append(self._apply(node, func, args))
+                continue
+
+            node_type = node.getType()
+            if node_type in associative:
+                func = associative[node_type]
+                children = list(yield_operands(node))
+            else:
+                func = self.mapper[node_type]
+                if isinstance(func, str):
+                    raise NotImplementedError(func)
+                elif isinstance(func, dict):
+                    func = func[node.getName()]
+                children = [node.getChild(i) for i in range(node.getNumChildren())]
+
+            stack.append((node, func, len(children)))
+            stack.extend((c, None, None) for c in reversed(children))
+        return results[0]
+
+    @staticmethod
+    def _apply(node: libsbml.ASTNode, func, args: list):
+        if node.getType() in associative:
+            return balanced(*func, args)
+        elif len(args) > 0:
+            return func(*args)
         elif callable(func):
             return func(node)
         else:
@@ -256,6 +319,12 @@ def compile_function(self, func_name: str, node: libsbml.ASTNode):
             params = name_mapping.values()
             body = body.subs_by_name(**name_mapping)
 
+        try:
+            # Not available in symbolite >= 1.1
+            from symbolite.core import as_function
+        except ImportError:
+            raise NotImplementedError("function definitions") from None
+
         func = as_function(
             body, func_name, tuple(map(str, params)), libsl=abstract
         )  # TODO: change to new symbolite
@@ -1,32 +1,105 @@
+import libsbml
 from pytest import mark
 from symbolite.abstract import real
 
-from . import mathMLImporter, to_mathML
+from . import MathMLWriter, mathMLImporter, to_mathML, to_mathML_strings
+from .importer import balanced
 from .symbol import MathMLSymbol as Symbol
 
 x, y = map(Symbol, ["x", "y"])
 
 
-@mark.parametrize(
-    "expr",
-    [
-        1,
-        x,
-        x * y,
-        x + y,
-        x * 2,
-        2 * x,
-        2 * x + y,
-        x**2,
-        x**0.5,
-        real.cos(x),
-        real.sqrt(x),
-        x < 1,
-        x < y,
-        ~x,
-    ],
-)
+EXPRESSIONS = [
+    1,
+    x,
+    x * y,
+    x + y,
+    x * 2,
+    2 * x,
+    2 * x + y,
+    x**2,
+    x**0.5,
+    real.cos(x),
+    real.sqrt(x),
+    x < 1,
+    x < y,
+    ~x,
+]
+
+
+@mark.parametrize("expr", EXPRESSIONS)
 def test_mathML_roundtrip(expr: Symbol):
     node = to_mathML(expr)
     expr2 = mathMLImporter().convert(node)
     assert expr2 == expr
+
+
+def test_long_sum():
+    a, b, c, d, e = map(Symbol, "abcde")
+    node = libsbml.parseL3Formula("a + b + c + d + e")
+    assert mathMLImporter().convert(node) == ((a + b) + (c + d)) + e
+
+    # Deeper than the recursion limit if converted recursively.
+    terms = [Symbol(f"x{i}") for i in range(5_000)]
+    node = libsbml.parseL3Formula(" + ".join(f"x{i}" for i in range(5_000)))
+    assert mathMLImporter().convert(node) == balanced(real.add, 0, terms)
+
+
+def test_nary():
+    node = libsbml.readMathMLFromString(
+        """<math xmlns="http://www.w3.org/1998/Math/MathML">
+        <apply><plus/><ci>x</ci><ci>y</ci><apply><times/><ci>x</ci></apply></apply>
+        </math>"""
+    )
+    assert mathMLImporter().convert(node) == (x + y) + x
+
+    node = libsbml.readMathMLFromString(
+        """<math xmlns="http://www.w3.org/1998/Math/MathML">
+        <apply><times/></apply>
+        </math>"""
+    )
+    assert mathMLImporter().convert(node) == 1
+
+
+@mark.parametrize("expr", EXPRESSIONS)
+def test_writer_roundtrip(expr: Symbol):
+    node = libsbml.readMathMLFromString(MathMLWriter().math(expr))
+    assert node is not None
+    assert mathMLImporter().convert(node) == expr
+
+
+def test_writer_nary():
+    a, b, c, d = map(Symbol, "abcd")
+    text = MathMLWriter().content(a + b + c + d)
+    assert text.count("<plus/>") == 1
+    node = libsbml.readMathMLFromString(MathMLWriter().math(a + b + c + d))
+    assert mathMLImporter().convert(node) == (a + b) + (c + d)
+
+
+def test_writer_deep():
+    terms = [Symbol(f"x{i}") for i in range(5_000)]
+    expr = terms[0]
+    for t in terms[1:]:
+        expr = expr - t
+    # Deeper than the recursion limit if written recursively.
+    writer = MathMLWriter()
+    text = writer.content(expr)
+    assert text.count("<minus/>") == len(terms) - 1
+    # Only shared subexpressions are cached.
+    assert writer._cache == {}
+
+
+def test_writer_names():
+    writer = MathMLWriter({x: "species_1", y: "k"})
+    assert (
+        writer.content(x * y) == "<apply><times/><ci>species_1</ci><ci>k</ci></apply>"
+    )
+
+    shared = x + y
+    writer = MathMLWriter()
+    writer.content(shared * shared)
+    assert id(shared) in writer._cache
+
+    first, second = to_mathML_strings([x, shared])
+    assert first.startswith("<math") and "<ci>x</ci>" in first
+    assert libsbml.readMathMLFromString(second) is not None
@@ -1,3 +1,19 @@
+from .bulk import LoadFailure, load_many
+from .cache import ModelCache
 from .importer import load, loads
+from .profiling import profile
+from .roundtrip import RoundTrip, benchmark
+from .writer import dump, dumps
 
-__all__ = ["load", "loads"]
+__all__ = [
+    "LoadFailure",
+    "ModelCache",
+    "RoundTrip",
+    "benchmark",
+    "dump",
+    "dumps",
+    "load",
+    "load_many",
+    "loads",
+    "profile",
+]
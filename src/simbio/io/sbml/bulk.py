@@ -0,0 +1,152 @@
+"""
+simbio.io.sbml.bulk
+~~~~~~~~~~~~~~~~~~~
+
+Import many SBML files concurrently.
+
+Parsing with libsbml, conversion to :mod:`types`
+and registration of simbio nodes run in a process pool.
+Models are dynamically created classes which cannot be pickled,
+so workers return the namespace of each class,
+which is built in the calling process.
+"""
+
+from __future__ import annotations
+
+import traceback
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+
+from ... import System
+from .cache import ModelCache
+from .importer import SBMLImporter, build, from_document, parse_document
+from .profiling import phase
+
+
+@dataclass(frozen=True, kw_only=True)
+class LoadFailure:
+    """Why a file could not be imported."""
+
+    path: Path
+    # "read", "cache", "parse", "convert", "register", "build" or "worker",
+    # or a stage of a round trip
+    stage: str
+    error: str  # exception type name, e.g. "NotImplementedError"
+    message: str
+    traceback: str
+
+    @classmethod
+    def from_exception(cls, path: Path, stage: str, e: BaseException):
+        return cls(
+            path=path,
+            stage=stage,
+            error=type(e).__name__,
+            message=str(e),
+            traceback="".join(traceback.format_exception(e)),
+        )
+
+
+def _identity(x: str) -> str:
+    return x
+
+
+def _import_file(
+    path: Path,
+    *,
+    identity_mapper: Callable[[str], str],
+    ignore_namespaces: Sequence[str],
+    cache: ModelCache | None,
+) -> tuple[str, dict] | LoadFailure:
+    try:
+        text = path.read_text()
+    except Exception as e:
+        return LoadFailure.from_exception(path, "read", e)
+
+    model = None
+    if cache is not None:
+        try:
+            key = cache.key(text, ignore_namespaces=ignore_namespaces)
+            model = cache.get(key)
+        except Exception as e:
+            return LoadFailure.from_exception(path, "cache", e)
+
+    if model is None:
+        try:
+            document = parse_document(text, ignore_namespaces=ignore_namespaces)
+        except Exception as e:
+            return LoadFailure.from_exception(path, "parse", e)
+        try:
+            model = from_document(document)
+        except Exception as e:
+            return LoadFailure.from_exception(path, "convert", e)
+        if cache is not None:
+            try:
+                cache.set(key, model)
+            except Exception as e:
+                return LoadFailure.from_exception(path, "cache", e)
+
+    try:
+        name = model.name if model.name is not None else path.stem
+        importer = SBMLImporter(model, identity_mapper=identity_mapper)
+        return name, importer.simbio.namespace
+    except Exception as e:
+        return LoadFailure.from_exception(path, "register", e)
+
+
+def load_many(
+    paths: Sequence[str | PathLike],
+    *,
+    max_workers: int | None = None,
+    identity_mapper: Callable[[str], str] = _identity,
+    ignore_namespaces: Sequence[str] = [],
+    cache: ModelCache | str | PathLike | None = None,
+    executor: Executor | None = None,
+) -> list[type[System] | LoadFailure]:
+    """Load SBML files in parallel.
+
+    Returns, in the order of ``paths``, either the built model
+    or a LoadFailure describing the error. Models without a name
+    are named after their file.
+    """
+    paths = [Path(p) for p in paths]
+    if cache is not None and not isinstance(cache, ModelCache):
+        cache = ModelCache(cache)
+
+    out: list = [None] * len(paths)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(
+                _import_file,
+                path,
+                identity_mapper=identity_mapper,
+                ignore_namespaces=ignore_namespaces,
+                cache=cache,
+            ): i
+            for i, path in enumerate(paths)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                out[i] = future.result()
+            except Exception as e:
+                # e.g. a crashed worker
+                out[i] = LoadFailure.from_exception(paths[i], "worker", e)
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+    for i, (path, result) in enumerate(zip(paths, out)):
+        if isinstance(result, LoadFailure):
+            continue
+        try:
+            with phase("build"):
+                out[i] = build(*result)
+        except Exception as e:
+            out[i] = LoadFailure.from_exception(path, "build", e)
+    return out
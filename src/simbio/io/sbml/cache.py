@@ -0,0 +1,77 @@
+"""
+simbio.io.sbml.cache
+~~~~~~~~~~~~~~~~~~~~
+
+A content-addressed on-disk cache of converted SBML models.
+
+Parsing with libsbml and converting to :mod:`types` dominates import time,
+so the resulting ``types.Model`` is pickled under a hash of the SBML text
+and of the versions of simbio and libsbml that converted it.
+Building the Compartment from it is cheap and is not cached.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from os import PathLike
+from pathlib import Path
+from typing import Sequence
+
+import libsbml
+
+from ... import __version__
+from . import types
+
+# Bump when types.Model or the converter change in an incompatible way.
+CACHE_VERSION = 1
+
+
+class ModelCache:
+    """Stores converted models as ``<directory>/<sha256>.pickle``.
+
+    Writes are atomic, so a cache directory can be shared between processes.
+    """
+
+    def __init__(self, directory: str | PathLike):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(sbml: str, *, ignore_namespaces: Sequence[str] = ()) -> str:
+        h = hashlib.sha256()
+        h.update(f"{CACHE_VERSION}\0".encode())
+        h.update(f"{__version__}\0{libsbml.getLibSBMLDottedVersion()}\0".encode())
+        h.update("\0".join(sorted(ignore_namespaces)).encode())
+        h.update(b"\0")
+        h.update(sbml.encode())
+        return h.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.pickle"
+
+    def get(self, key: str) -> types.Model | None:
+        try:
+            with self.path(key).open("rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Corrupt or stale entry, it will be overwritten.
+            return None
+
+    def set(self, key: str, model: types.Model) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def clear(self) -> None:
+        for file in self.directory.glob("*.pickle"):
+            file.unlink()
@@ -5,37 +5,44 @@
 
 from ..mathML import mathMLImporter
 from . import types
+from .profiling import is_active, phase
 
 
 class Converter:
     def __init__(self):
         self.mathML = mathMLImporter()
 
-    @singledispatchmethod
     def convert(self, x):
+        if not is_active():
+            return self._convert(x)
+        with phase(f"convert.{type(x).__name__}"):
+            return self._convert(x)
+
+    @singledispatchmethod
+    def _convert(self, x):
         raise NotImplementedError(type(x))
 
-    @convert.register
+    @_convert.register
     def NoneType(self, x: None):
         return None
 
-    @convert.register
+    @_convert.register
     def ListOf(self, x: libsbml.ListOf) -> list:
         return list(map(self.convert, x))
 
-    @convert.register
+    @_convert.register
     def Math(self, x: libsbml.ASTNode):
-        return self.mathML.convert(x)
+        with phase("mathml"):
+            return self.mathML.convert(x)
 
-    @convert.register
+    @_convert.register
     def FunctionDefinition(
         self, x: libsbml.FunctionDefinition
     ) -> types.FunctionDefinition:
         # x.isSetMath()
-        return types.FunctionDefinition(
-            **asdict(self.Base(x)),
-            math=self.mathML.compile_function(x.getId(), x.getMath()),
-        )
+        with phase("mathml"):
+            math = self.mathML.compile_function(x.getId(), x.getMath())
+        return types.FunctionDefinition(**asdict(self.Base(x)), math=math)
 
     def Base(self, x: libsbml.SBase) -> types.Base:
         return types.Base(
@@ -47,7 +54,7 @@ def Base(self, x: libsbml.SBase) -> types.Base:
             annotation=x.getAnnotationString() if x.isSetAnnotation() else None,
         )
 
-    @convert.register
+    @_convert.register
     def Model(self, x: libsbml.Model) -> types.Model:
         return types.Model(
             **asdict(self.Base(x)),
@@ -72,7 +79,7 @@ def Model(self, x: libsbml.Model) -> types.Model:
             events=self.convert(x.getListOfEvents()),
         )
 
-    @convert.register
+    @_convert.register
     def Parameter(self, x: libsbml.Parameter) -> types.Parameter:
         # x.isSetConstant()
         return types.Parameter(
@@ -82,7 +89,7 @@ def Parameter(self, x: libsbml.Parameter) -> types.Parameter:
             constant=x.getConstant(),
         )
 
-    @convert.register
+    @_convert.register
     def LocalParameter(self, x: libsbml.LocalParameter) -> types.LocalParameter:
         return types.LocalParameter(
             **asdict(self.Base(x)),
@@ -90,7 +97,7 @@ def LocalParameter(self, x: libsbml.LocalParameter) -> types.LocalParameter:
             units=x.getUnits() if x.isSetUnits() else None,
         )
 
-    @convert.register
+    @_convert.register
     def Species(self, x: libsbml.Species) -> types.Species:
         # x.isSetCompartment()
         # x.isSetHasOnlySubstanceUnits()
@@ -112,7 +119,7 @@ def Species(self, x: libsbml.Species) -> types.Species:
             else None,
         )
 
-    @convert.register
+    @_convert.register
     def Compartment(self, x: libsbml.Compartment) -> types.Compartment:
         # x.isSetConstant()
         return types.Compartment(
@@ -125,7 +132,7 @@ def Compartment(self, x: libsbml.Compartment) -> types.Compartment:
             constant=x.getConstant(),
         )
 
-    @convert.register
+    @_convert.register
     def Event(self, x: libsbml.Event) -> types.Event:
         # x.isSetUseValuesFromTriggerTime()
         return types.Event(
@@ -137,7 +144,7 @@ def Event(self, x: libsbml.Event) -> types.Event:
             assignments=self.convert(x.getListOfEventAssignments()),
         )
 
-    @convert.register
+    @_convert.register
     def Priority(self, x: libsbml.Priority) -> types.Priority:
         # x.isSetMath()
         return types.Priority(
@@ -145,7 +152,7 @@ def Priority(self, x: libsbml.Priority) -> types.Priority:
             math=self.convert(x.getMath()),
         )
 
-    @convert.register
+    @_convert.register
     def Delay(self, x: libsbml.Delay) -> types.Delay:
         # x.isSetMath()
         return types.Delay(
@@ -153,7 +160,7 @@ def Delay(self, x: libsbml.Delay) -> types.Delay:
             math=self.convert(x.getMath()),
         )
 
-    @convert.register
+    @_convert.register
     def EventAssignment(self, x: libsbml.EventAssignment) -> types.EventAssignment:
         # x.isSetMath()
         return types.EventAssignment(
@@ -161,7 +168,7 @@ def EventAssignment(self, x: libsbml.EventAssignment) -> types.EventAssignment:
             math=self.convert(x.getMath()),
         )
 
-    @convert.register
+    @_convert.register
     def InitialAssignment(
         self, x: libsbml.InitialAssignment
     ) -> types.InitialAssignment:
@@ -173,7 +180,7 @@ def InitialAssignment(
             math=self.convert(x.getMath()),
         )
 
-    @convert.register
+    @_convert.register
     def Rule(self, x: libsbml.Rule) -> types.Rule:
         # x.isSetMath()
         return types.Rule(
@@ -181,7 +188,7 @@ def Rule(self, x: libsbml.Rule) -> types.Rule:
             math=self.convert(x.getMath()),
         )
 
-    @convert.register
+    @_convert.register
     def AlgebraicRule(self, x: libsbml.AlgebraicRule) -> types.AlgebraicRule:
         # x.isSetMath()
         return types.AlgebraicRule(
@@ -189,7 +196,7 @@ def AlgebraicRule(self, x: libsbml.AlgebraicRule) -> types.AlgebraicRule:
             math=self.convert(x.getMath()),
         )
 
-    @convert.register
+    @_convert.register
     def AssignmentRule(self, x: libsbml.AssignmentRule) -> types.AssignmentRule:
         # x.isSetMath()
         # x.isSetVariable()
@@ -199,7 +206,7 @@ def AssignmentRule(self, x: libsbml.AssignmentRule) -> types.AssignmentRule:
             variable=x.getVariable(),
         )
 
-    @convert.register
+    @_convert.register
     def RateRule(self, x: libsbml.RateRule) -> types.RateRule:
         # x.isSetMath()
         # x.isSetVariable()
@@ -209,7 +216,7 @@ def RateRule(self, x: libsbml.RateRule) -> types.RateRule:
             variable=x.getVariable(),
         )
 
-    @convert.register
+    @_convert.register
     def Constraint(self, x: libsbml.Constraint) -> types.Constraint:
         # x.isSetMath()
         # x.isSetMessageString()
@@ -219,7 +226,7 @@ def Constraint(self, x: libsbml.Constraint) -> types.Constraint:
             message=x.getMessageString(),
         )
 
-    @convert.register
+    @_convert.register
     def Reaction(self, x: libsbml.Reaction) -> types.Reaction:
         # x.isSetReversible()
         return types.Reaction(
@@ -233,7 +240,7 @@ def Reaction(self, x: libsbml.Reaction) -> types.Reaction:
             kinetic_law=self.convert(x.getKineticLaw()),
         )
 
-    @convert.register
+    @_convert.register
     def SimpleSpeciesReference(
         self,
         x: libsbml.SimpleSpeciesReference,
@@ -243,7 +250,7 @@ def SimpleSpeciesReference(
             species=types.ID(x.getSpecies()),
         )
 
-    @convert.register
+    @_convert.register
     def ModifierSpeciesReference(
         self,
         x: libsbml.ModifierSpeciesReference,
@@ -253,7 +260,7 @@ def ModifierSpeciesReference(
             species=types.ID(x.getSpecies()),
         )
 
-    @convert.register
+    @_convert.register
     def SpeciesReference(self, x: libsbml.SpeciesReference) -> types.SpeciesReference:
         if x.isSetStoichiometry():
             stoichiometry = x.getStoichiometry()
@@ -270,7 +277,7 @@ def SpeciesReference(self, x: libsbml.SpeciesReference) -> types.SpeciesReferenc
             constant=x.getConstant(),
         )
 
-    @convert.register
+    @_convert.register
     def KineticLaw(self, x: libsbml.KineticLaw) -> types.KineticLaw:
         # x.isSetMath()
         return types.KineticLaw(
@@ -279,7 +286,7 @@ def KineticLaw(self, x: libsbml.KineticLaw) -> types.KineticLaw:
             parameters=self.convert(x.getListOfParameters()),
         )
 
-    @convert.register
+    @_convert.register
     def Trigger(self, x: libsbml.Trigger) -> types.Trigger:
         # x.isSetInitialValue()
         # x.isSetPersistent()
@@ -291,14 +298,14 @@ def Trigger(self, x: libsbml.Trigger) -> types.Trigger:
             math=self.convert(x.getMath()),
         )
 
-    @convert.register
+    @_convert.register
     def UnitDefinition(self, x: libsbml.UnitDefinition) -> types.UnitDefinition:
         return types.UnitDefinition(
             **asdict(self.Base(x)),
             units=self.convert(x.getListOfUnits()),
         )
 
-    @convert.register
+    @_convert.register
     def Unit(self, x: libsbml.Unit) -> types.Unit:
         # x.isSetKind()
         # x.isSetExponent()
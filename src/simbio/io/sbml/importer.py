@@ -10,18 +10,26 @@
 import pint
 from poincare.compile import depends_on_at_least_one_variable_or_time
 from symbolite import Real, substitute
+from symbolite.core.symbolite_object import get_symbolite_info
 
 from ... import (
+    AbsoluteRateLaw,
     Compartment,
     Constant,
     Independent,
     Parameter,
     RateLaw,
+    Reactant,
     Species,
+    System,
+    Variable,
+    Volume,
     initial,
 )
 from ..mathML.importer import MathMLSpecialSymbol, MathMLSymbol
 from . import from_libsbml, types
+from .cache import ModelCache
+from .profiling import phase
 
 T = TypeVar("T")
 
@@ -32,6 +40,10 @@ class _Namespaces:
     UNSUPPORTED = {"comp", "fbc", "groups", "multi", "qual"}
 
 
+def symbol_name(x: MathMLSymbol | MathMLSpecialSymbol) -> str:
+    return get_symbolite_info(x).value.name
+
+
 def nan_to_none(x):
     if x is None or math.isnan(x):
         return None
@@ -39,6 +51,17 @@ def nan_to_none(x):
         return x
 
 
+def build(name: str, namespace: dict) -> type[System]:
+    """Build the class from the namespace of a DynamicCompartment.
+
+    The namespace can be pickled, unlike the built class.
+    """
+    # A Compartment needs its Volume, other models are Systems.
+    if any(isinstance(v, Volume) for v in namespace.values()):
+        return type(name, (Compartment,), namespace)
+    return type(name, (System,), namespace)
+
+
 class DynamicCompartment:
     def __init__(self, *, name_mapper: Callable[[str], str] = lambda x: x):
         self.name_mapping: dict[str, str] = {}
@@ -46,8 +69,8 @@ def __init__(self, *, name_mapper: Callable[[str], str] = lambda x: x):
         self.namespace = Compartment.__prepare__(None, ())
         self._annotations = self.namespace.setdefault("__annotations__", {})
 
-    def build(self, name: str):
-        return type(name, (Compartment,), self.namespace)
+    def build(self, name: str) -> type[System]:
+        return build(name, self.namespace)
 
     def add(self, name: str, value, *, init: bool = True):
         self.name_mapping[name] = new_name = self.name_mapper(name)
@@ -68,10 +91,18 @@ def load(
     *,
     name: str | None = None,
     identity_mapper: Callable[[str], str] = lambda x: x,
+    ignore_namespaces: Sequence[str] = [],
+    cache: ModelCache | str | PathLike | None = None,
 ):
     with open(file) as f:
         text = f.read()
-    return loads(text, name=name, identity_mapper=identity_mapper)
+    return loads(
+        text,
+        name=name,
+        identity_mapper=identity_mapper,
+        ignore_namespaces=ignore_namespaces,
+        cache=cache,
+    )
 
 
 def loads(
@@ -80,8 +111,30 @@ def loads(
     name: str | None = None,
     identity_mapper: Callable[[str], str] = lambda x: x,
     ignore_namespaces: Sequence[str] = [],
+    cache: ModelCache | str | PathLike | None = None,
 ):
-    document: libsbml.SBMLDocument = libsbml.readSBMLFromString(sbml)
+    if cache is None:
+        converted_model = parse(sbml, ignore_namespaces=ignore_namespaces)
+    else:
+        if not isinstance(cache, ModelCache):
+            cache = ModelCache(cache)
+        key = cache.key(sbml, ignore_namespaces=ignore_namespaces)
+        converted_model = cache.get(key)
+        if converted_model is None:
+            converted_model = parse(sbml, ignore_namespaces=ignore_namespaces)
+            cache.set(key, converted_model)
+    return convert(converted_model, name=name, identity_mapper=identity_mapper)
+
+
+def parse(sbml: str, *, ignore_namespaces: Sequence[str] = []) -> types.Model:
+    return from_document(parse_document(sbml, ignore_namespaces=ignore_namespaces))
+
+
+def parse_document(
+    sbml: str, *, ignore_namespaces: Sequence[str] = []
+) -> libsbml.SBMLDocument:
+    with phase("parse"):
+        document: libsbml.SBMLDocument = libsbml.readSBMLFromString(sbml)
     if document.getNumErrors() != 0:
         raise RuntimeError("error reading the SBML file")
 
@@ -92,10 +145,13 @@ def loads(
     namespaces.difference_update(ignore_namespaces)
     if len(namespaces) > 0:
         raise NotImplementedError(f"Unsupported SBML namespaces: {namespaces}")
+    return document
+
 
+def from_document(document: libsbml.SBMLDocument) -> types.Model:
     model: libsbml.Model = document.getModel()
-    converted_model: types.Model = from_libsbml.Converter().convert(model)
-    return convert(converted_model, name=name, identity_mapper=identity_mapper)
+    with phase("convert"):
+        return from_libsbml.Converter().convert(model)
 
 
 def convert(
@@ -103,12 +159,14 @@ def convert(
     *,
     name: str | None = None,
     identity_mapper: Callable[[str], str] = lambda x: x,
-) -> type[Compartment]:
+) -> type[System]:
     if name is None:
         name = model.name
         if name is None:
             raise ValueError("must provide a name for the model")
-    return SBMLImporter(model, identity_mapper=identity_mapper).simbio.build(name=name)
+    importer = SBMLImporter(model, identity_mapper=identity_mapper)
+    with phase("build"):
+        return importer.simbio.build(name=name)
 
 
 def _extra_check(func: Callable[[str], str]):
@@ -160,31 +218,26 @@ def __init__(
                 case _:
                     raise NotImplementedError(type(r))
 
-        for x in model.compartments:
-            self.add_compartment(x)
-        for x in model.parameters:
-            self.add_parameter(x)
-        for x in model.species:
-            self.add_species(x)
-        for x in model.initial_assignments:
-            self.add_initial_assignment(x)
-        for x in model.reactions:
-            self.add_reaction(x)
-        for r in model.rules:
-            self.add(r)
-        for a in model.constraints:
-            self.add_constaint(a)
-        for a in model.events:
-            self.add_event(a)
+        for kind, items in [
+            ("compartments", model.compartments),
+            ("parameters", model.parameters),
+            ("species", model.species),
+            ("initial_assignments", model.initial_assignments),
+            ("reactions", model.reactions),
+            ("rules", model.rules),
+            ("constraints", model.constraints),
+            ("events", model.events),
+        ]:
+            with phase(f"register.{kind}"):
+                for x in items:
+                    self.add(x)
 
     def get(self, item, default=None):
         match item:
-            case Real(name=None):
-                return item
-            case MathMLSymbol(name=name):
-                return getattr(self.simbio, name)
-            case MathMLSpecialSymbol(name=name):
-                return self.get_or_create_independent(name)
+            case MathMLSymbol():
+                return getattr(self.simbio, symbol_name(item))
+            case MathMLSpecialSymbol():
+                return self.get_or_create_independent(symbol_name(item))
             case _:
                 return item
 
@@ -212,10 +265,14 @@ def add_compartment(self, c: types.Compartment):
         if self.use_units and c.units is not None and size is not None:
             size *= self.units[c.units]
 
-        if size != 1:
+        # A Compartment has a single Volume. Several compartments are
+        # parameters of a System, which does not compensate for volumes.
+        if len(self.model.compartments) == 1:
+            self.simbio.add(c.id, Volume(initial=size))
+        elif size != 1:
             raise NotImplementedError(f"compartment with size = {size} != 1.")
-
-        self.simbio.add(c.id, Parameter(default=size))
+        else:
+            self.simbio.add(c.id, Parameter(default=size))
 
     @add.register
     def add_parameter(self, p: types.Parameter):
@@ -241,38 +298,63 @@ def add_species(self, s: types.Species):
         if s.conversion_factor is not None:
             raise NotImplementedError("conversion_factor in species")
 
-        match [nan_to_none(s.initial_amount), nan_to_none(s.initial_concentration)]:
-            case [None, None]:
-                default = None
-            case [default, None]:
-                pass
-            case [None, default]:
-                if self.use_units and s.substance_units is not None:
-                    default *= self.units[s.substance_units]
-            case _:
-                raise ValueError(
-                    f"both amount an concentration specified for Species {s.id}"
-                )
+        amount = nan_to_none(s.initial_amount)
+        concentration = nan_to_none(s.initial_concentration)
+        if amount is not None and concentration is not None:
+            raise ValueError(
+                f"both amount an concentration specified for Species {s.id}"
+            )
+        elif (
+            self.use_units
+            and concentration is not None
+            and s.substance_units is not None
+        ):
+            concentration *= self.units[s.substance_units]
+
+        # The species is in amount if it has only substance units,
+        # and in concentration otherwise, as its symbol in math.
+        if s.has_only_substance_units and concentration is not None:
+            default = concentration * self.compartment_size(s)
+        elif not s.has_only_substance_units and amount is not None:
+            default = amount / self.compartment_size(s)
+        elif amount is not None:
+            default = amount
+        else:
+            default = concentration
 
         if s.id in self.assignment_rules:
             value = Parameter(default=default)
         else:
-            value = initial(default=default)
+            value = Species(
+                initial=default, concentration=not s.has_only_substance_units
+            )
         self.simbio.add(s.id, value)
 
+    def compartment_size(self, s: types.Species) -> float:
+        size = None
+        for c in self.model.compartments:
+            if c.id == s.compartment:
+                size = nan_to_none(c.size)
+        if size is None:
+            raise NotImplementedError(
+                f"converting between amount and concentration for Species {s.id}"
+                " in a compartment without size"
+            )
+        return size
+
     def get_symbol(self, name: str, expected_type: type[T] = object) -> T:
         value = getattr(self.simbio, name)
         if not isinstance(value, expected_type):
             raise TypeError(f"unexpected type: {type(value)}")
         return value
 
-    def get_species_reference(self, s: types.SimpleSpeciesReference) -> Species:
+    def get_species_reference(self, s: types.SimpleSpeciesReference) -> Reactant:
         # s.constant: bool
         species = self.get_symbol(s.species, Species)
         if isinstance(s, types.SpeciesReference) and s.stoichiometry is not None:
-            return Species(species, s.stoichiometry)
+            return Reactant(species, s.stoichiometry)
         else:
-            return Species(species)
+            return Reactant(species)
 
     @add.register
     def add_reaction(self, r: types.Reaction):
@@ -288,28 +370,26 @@ def yield_species(references: Sequence[types.SimpleSpeciesReference]):
                 ):
                     yield self.get_species_reference(r)
 
+        # Modifiers only appear in the rate law.
         reactants = list(yield_species(r.reactants))
         products = list(yield_species(r.products))
-        modifiers = list(yield_species(r.modifiers))
-        for m in modifiers:
-            reactants.append(m)
-            products.append(m)
         kinetic_law = r.kinetic_law
-        formula: Real = kinetic_law.math
-        if len(kinetic_law.parameters) > 0:
-            mapping = {}
-            for p in kinetic_law.parameters:
-                new_id = f"{r.id}__{p.id}"
-                self.add_parameter(replace(p, id=new_id))
-                mapping[p.id] = MathMLSymbol(new_id)  # TODO: replace substitute by name
-            # formula = substitute_by_name(
-            #     formula, **mapping
-            # )
-        # formula = substitute(formula, GetAsVariable(self.get))
-
+        local = {}
+        for p in kinetic_law.parameters:
+            new_id = f"{r.id}__{p.id}"
+            self.add_parameter(replace(p, id=new_id))
+            local[p.id] = getattr(self.simbio, new_id)
+
+        def get(item, default=None):
+            if isinstance(item, MathMLSymbol) and symbol_name(item) in local:
+                return local[symbol_name(item)]
+            return self.get(item)
+
+        formula: Real = substitute(kinetic_law.math, GetAsVariable(get))
+        # SBML kinetic laws are in amount per time.
         self.simbio.add(
             r.id,
-            RateLaw(reactants=reactants, products=products, rate_law=formula),
+            AbsoluteRateLaw(reactants=reactants, products=products, rate_law=formula),
         )
         return
 
@@ -367,7 +447,7 @@ def add_initial_assignment(self, a: types.InitialAssignment):
 
         if value is None:
             return
-        if isinstance(component, Species):
+        if isinstance(component, Variable):
             component.initial = value
         elif isinstance(component, Constant | Parameter):
             component.default = value
@@ -392,7 +472,7 @@ def add_assignment_rule(self, r: types.AssignmentRule):
 
     @add.register
     def add_rate_rule(self, r: types.RateRule):
-        species = self.get_symbol(r.variable, Species)
+        species = self.get_symbol(r.variable, Variable)
         value: Real = substitute(r.math, GetAsVariable(self.get))
         if value is None:
             return
@@ -0,0 +1,115 @@
+"""
+simbio.io.sbml.profiling
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Opt-in timing of the SBML import pipeline::
+
+    with profile() as prof:
+        loads(text)
+    print(prof.report())
+
+Phases nest (e.g. ``mathml`` inside ``convert.KineticLaw``),
+so each one records its inclusive time and its self time,
+excluding nested phases. With ``memory=True``,
+net memory allocated in each phase is traced with :mod:`tracemalloc`.
+When no profiler is active, :func:`phase` is a no-op,
+and hot paths can check :func:`is_active` to skip building phase names.
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import ContextManager, Iterator
+
+_active: ContextVar[Profiler | None] = ContextVar("profiler", default=None)
+_null = nullcontext()
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    total: float = 0.0  # seconds, including nested phases
+    self: float = 0.0  # seconds, excluding nested phases
+    allocated: int = 0  # bytes, including nested phases
+
+
+@dataclass
+class _Frame:
+    name: str
+    start: float
+    memory: int
+    children: float = 0.0
+
+
+class Profiler:
+    def __init__(self, *, memory: bool = False):
+        self.memory = memory
+        self.stats: dict[str, PhaseStats] = {}
+        self._stack: list[_Frame] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        memory = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        frame = _Frame(name, time.perf_counter(), memory)
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - frame.start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1].children += elapsed
+
+            stats = self.stats.setdefault(name, PhaseStats())
+            stats.calls += 1
+            stats.total += elapsed
+            stats.self += elapsed - frame.children
+            if self.memory:
+                stats.allocated += tracemalloc.get_traced_memory()[0] - memory
+
+    def report(self) -> str:
+        """A table of phases sorted by self time."""
+        rows = sorted(self.stats.items(), key=lambda x: x[1].self, reverse=True)
+        width = max((len(name) for name in self.stats), default=5)
+        lines = [f"{'phase':<{width}}  {'calls':>8}  {'total':>9}  {'self':>9}"]
+        if self.memory:
+            lines[0] += f"  {'allocated':>11}"
+        for name, s in rows:
+            line = f"{name:<{width}}  {s.calls:>8}  {s.total:>8.4f}s  {s.self:>8.4f}s"
+            if self.memory:
+                line += f"  {s.allocated / 1024:>9.1f}kB"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile(*, memory: bool = False) -> Iterator[Profiler]:
+    """Profile SBML imports performed in this context."""
+    profiler = Profiler(memory=memory)
+    start_tracing = memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+        if start_tracing:
+            tracemalloc.stop()
+
+
+def phase(name: str) -> ContextManager[None]:
+    """Record a phase in the active profiler, if any."""
+    profiler = _active.get()
+    if profiler is None:
+        return _null
+    return profiler.phase(name)
+
+
+def is_active() -> bool:
+    """Whether a profiler is recording phases."""
+    return _active.get() is not None
@@ -0,0 +1,203 @@
+"""
+simbio.io.sbml.roundtrip
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Benchmark the SBML writer against a corpus of SBML files::
+
+    python -m simbio.io.sbml.roundtrip models/*.xml --save-at 10
+
+Each file is imported, exported with :func:`dumps` and imported again,
+timing each stage. Fidelity is measured by the components
+lost in the round trip and, if ``save_at`` is given, by the largest
+relative difference between simulations of both models.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from ... import Parameter, Simulator, Variable
+from .bulk import LoadFailure
+from .importer import convert, parse
+from .writer import dumps, sbml_id
+
+
+@dataclass(frozen=True, kw_only=True)
+class RoundTrip:
+    """Timings, in seconds, and fidelity of an import-export-import round trip."""
+
+    path: Path
+    import_time: float
+    export_time: float
+    reimport_time: float
+    size: int  # characters of the exported SBML
+    missing: Sequence[str]  # variables and parameters lost in the round trip
+    max_error: float | None  # None if not simulated
+
+
+def _names(model) -> set[str]:
+    return {str(x) for x in model._yield(Variable | Parameter)}
+
+
+def _max_error(expected, result, *, atol: float) -> float:
+    error = 0.0
+    for k, x in expected.data_vars.items():
+        a = np.asarray(x, dtype=float)
+        b = np.asarray(result[sbml_id(str(k))], dtype=float)
+        scale = np.maximum(np.abs(a), atol)
+        error = max(error, float(np.nanmax(np.abs(a - b) / scale, initial=0)))
+    return error
+
+
+def roundtrip(
+    path: str | PathLike,
+    *,
+    save_at: ArrayLike | None = None,
+    atol: float = 1e-12,
+    identity_mapper: Callable[[str], str] = lambda x: x,
+) -> RoundTrip | LoadFailure:
+    """Import a file, export it and import it again.
+
+    Errors are returned as a LoadFailure, with stage
+    "import", "export", "reimport" or "simulate".
+    """
+    path = Path(path)
+    stage = "import"
+    try:
+        start = time.perf_counter()
+        types_model = parse(path.read_text())
+        name = types_model.name if types_model.name is not None else path.stem
+        model = convert(types_model, name=name, identity_mapper=identity_mapper)
+        import_time = time.perf_counter() - start
+
+        stage = "export"
+        start = time.perf_counter()
+        text = dumps(model)
+        export_time = time.perf_counter() - start
+
+        stage = "reimport"
+        start = time.perf_counter()
+        new = convert(parse(text), name=name)
+        reimport_time = time.perf_counter() - start
+
+        reimported = _names(new)
+        missing = sorted(n for n in _names(model) if sbml_id(n) not in reimported)
+
+        max_error = None
+        if save_at is not None:
+            stage = "simulate"
+            expected = Simulator(model).solve(save_at=save_at)
+            result = Simulator(new).solve(save_at=save_at)
+            max_error = _max_error(expected, result, atol=atol)
+    except Exception as e:
+        return LoadFailure.from_exception(path, stage, e)
+
+    return RoundTrip(
+        path=path,
+        import_time=import_time,
+        export_time=export_time,
+        reimport_time=reimport_time,
+        size=len(text),
+        missing=missing,
+        max_error=max_error,
+    )
+
+
+def benchmark(
+    paths: Sequence[str | PathLike],
+    *,
+    save_at: ArrayLike | None = None,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+) -> list[RoundTrip | LoadFailure]:
+    """Round trip SBML files in parallel, returning results in the order of paths.
+
+    Timings are measured within each worker.
+    """
+    paths = [Path(p) for p in paths]
+    out: list = [None] * len(paths)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(roundtrip, path, save_at=save_at): i
+            for i, path in enumerate(paths)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                out[i] = future.result()
+            except Exception as e:
+                # e.g. a crashed worker
+                out[i] = LoadFailure.from_exception(paths[i], "import", e)
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+    return out
+
+
+def report(results: Sequence[RoundTrip | LoadFailure]) -> str:
+    """A table of the results, followed by the failures and totals."""
+    header = (
+        f"{'file':<30} {'import':>9} {'export':>9} {'reimport':>9}"
+        f" {'size':>10} {'missing':>8} {'max error':>10}"
+    )
+    lines = [header]
+    failures = []
+    for r in results:
+        if isinstance(r, LoadFailure):
+            failures.append(f"{r.path.name:<30} {r.stage}: {r.error}: {r.message}")
+            continue
+        error = "-" if r.max_error is None else f"{r.max_error:.2e}"
+        lines.append(
+            f"{r.path.name:<30} {r.import_time:>9.4f} {r.export_time:>9.4f}"
+            f" {r.reimport_time:>9.4f} {r.size:>10} {len(r.missing):>8} {error:>10}"
+        )
+
+    ok = [r for r in results if isinstance(r, RoundTrip)]
+    lossless = [r for r in ok if not r.missing]
+    errors = [r.max_error for r in ok if r.max_error is not None]
+    lines.append("")
+    lines.extend(failures)
+    lines.append(
+        f"{len(ok)}/{len(results)} round trips, {len(lossless)} without missing"
+        f" components, max error {max(errors, default=math.nan):.2e};"
+        f" export {sum(r.export_time for r in ok):.3f} s"
+        f" for import {sum(r.import_time for r in ok):.3f} s"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m simbio.io.sbml.roundtrip")
+    parser.add_argument("paths", nargs="+", help="SBML files")
+    parser.add_argument(
+        "--save-at",
+        type=float,
+        default=None,
+        help="compare simulations up to this time",
+    )
+    parser.add_argument("--points", type=int, default=11)
+    parser.add_argument("--max-workers", type=int, default=None)
+
+    args = parser.parse_args(argv)
+    save_at = None
+    if args.save_at is not None:
+        save_at = np.linspace(0, args.save_at, args.points)
+    results = benchmark(args.paths, save_at=save_at, max_workers=args.max_workers)
+    print(report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from pytest import mark
+
+from ... import Parameter
+from .bulk import LoadFailure, load_many
+
+SBML = """<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level3/version2/core" level="3" version="2">
+  <model>
+    <listOfParameters>
+      <parameter id="k" value="{value}" constant="true"/>
+    </listOfParameters>
+  </model>
+</sbml>
+"""
+
+# Stoichiometry math is not supported by the conversion to types.
+MATH_STOICHIOMETRY = """<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level2/version4" level="2" version="4">
+  <model>
+    <listOfCompartments><compartment id="c"/></listOfCompartments>
+    <listOfSpecies><species id="A" compartment="c" initialAmount="1"/></listOfSpecies>
+    <listOfReactions>
+      <reaction id="r">
+        <listOfReactants>
+          <speciesReference species="A">
+            <stoichiometryMath>
+              <math xmlns="http://www.w3.org/1998/Math/MathML"><cn>2</cn></math>
+            </stoichiometryMath>
+          </speciesReference>
+        </listOfReactants>
+      </reaction>
+    </listOfReactions>
+  </model>
+</sbml>
+"""
+
+# Multiple compartments of size other than 1 are not supported by the importer.
+COMPARTMENTS = """<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level3/version2/core" level="3" version="2">
+  <model>
+    <listOfCompartments>
+      <compartment id="a" size="2" constant="true"/>
+      <compartment id="b" size="3" constant="true"/>
+    </listOfCompartments>
+  </model>
+</sbml>
+"""
+
+
+def test_load_many(tmp_path):
+    paths = []
+    for value in range(3):
+        paths.append(path := tmp_path / f"model{value}.xml")
+        path.write_text(SBML.format(value=value))
+    paths.insert(1, path := tmp_path / "broken.xml")
+    path.write_text("<sbml")
+
+    with ThreadPoolExecutor() as executor:
+        result = load_many(paths, executor=executor)
+
+    assert len(result) == 4
+    failure = result.pop(1)
+    assert isinstance(failure, LoadFailure)
+    assert failure.path == path
+    assert failure.stage == "parse"
+
+    for value, model in enumerate(result):
+        assert model.__name__ == f"model{value}"
+        assert isinstance(model.k, Parameter)
+        assert model.k.default == value
+
+
+@mark.parametrize(
+    "text, stage",
+    [
+        (None, "read"),
+        ("<sbml", "parse"),
+        (MATH_STOICHIOMETRY, "convert"),
+        (COMPARTMENTS, "register"),
+    ],
+)
+def test_failure_stage(tmp_path, text, stage):
+    path = tmp_path / "model.xml"
+    if text is not None:
+        path.write_text(text)
+
+    with ThreadPoolExecutor() as executor:
+        (failure,) = load_many([path], executor=executor)
+    assert isinstance(failure, LoadFailure)
+    assert failure.stage == stage
+
+
+def test_process_pool(tmp_path):
+    paths = []
+    for value in range(3):
+        paths.append(path := tmp_path / f"model{value}.xml")
+        path.write_text(SBML.format(value=value))
+
+    result = load_many(paths, max_workers=2)
+    for value, model in enumerate(result):
+        assert model.__name__ == f"model{value}"
+        assert model.k.default == value
@@ -0,0 +1,50 @@
+import libsbml
+
+from . import cache as cache_module
+from . import types
+from .cache import ModelCache
+
+model = types.Model(
+    id=types.ID("model"),
+    parameters=[types.Parameter(id=types.ID("k"), value=1.0, constant=True)],
+)
+
+
+def test_roundtrip(tmp_path):
+    cache = ModelCache(tmp_path)
+    key = cache.key("<sbml/>")
+    assert cache.get(key) is None
+
+    cache.set(key, model)
+    assert cache.get(key) == model
+    assert ModelCache(tmp_path).get(key) == model
+
+
+def test_key():
+    cache_key = ModelCache.key
+    assert cache_key("<sbml/>") == cache_key("<sbml/>")
+    assert cache_key("<sbml/>") != cache_key("<sbml />")
+    assert cache_key("<sbml/>") != cache_key("<sbml/>", ignore_namespaces=["layout"])
+    assert cache_key("<sbml/>", ignore_namespaces=["a", "b"]) == cache_key(
+        "<sbml/>", ignore_namespaces=["b", "a"]
+    )
+
+
+def test_key_versions(monkeypatch):
+    key = ModelCache.key("<sbml/>")
+    monkeypatch.setattr(cache_module, "__version__", "0.0.0")
+    assert ModelCache.key("<sbml/>") != key
+    monkeypatch.undo()
+
+    monkeypatch.setattr(libsbml, "getLibSBMLDottedVersion", lambda: "0.0.0")
+    assert ModelCache.key("<sbml/>") != key
+
+
+def test_corrupt_entry(tmp_path):
+    cache = ModelCache(tmp_path)
+    key = cache.key("<sbml/>")
+    cache.path(key).write_bytes(b"not a pickle")
+    assert cache.get(key) is None
+
+    cache.set(key, model)
+    assert cache.get(key) == model
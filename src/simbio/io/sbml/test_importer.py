@@ -1,8 +1,10 @@
 import math
 
-from pytest import mark, param, raises
+import numpy as np
+from pytest import mark, raises
 
-from ...core import Parameter, Species
+from ... import AbsoluteRateLaw, Compartment, Parameter, Simulator, Species, Volume
+from ..mathML.importer import MathMLSymbol
 from . import types
 from .importer import convert, nan_to_none
 
@@ -48,6 +50,7 @@ def test_species(
     name = types.ID("s")
     compartment = types.ID("c")
     model = types.Model(
+        compartments=[types.Compartment(id=compartment, size=1, constant=True)],
         species=[
             types.Species(
                 id=name,
@@ -81,12 +84,7 @@ def test_species(
 @mark.parametrize("spatial_dimensions", [None, 3])
 @mark.parametrize(
     "size",
-    [
-        param(None, marks=mark.xfail(reason="compartment size must be 1")),
-        param(math.nan, marks=mark.xfail(reason="compartment size must be 1")),
-        1,
-        param(1.5, marks=mark.xfail(reason="compartment size must be 1")),
-    ],
+    [None, math.nan, 1, 1.5],
 )
 @mark.parametrize("units", [None])
 @mark.parametrize("constant", [False, True])
@@ -105,6 +103,91 @@ def test_compartment(spatial_dimensions, size, units, constant):
     )
 
     compartment = convert(model, name="model")
-    p = getattr(compartment, name)
-    assert isinstance(p, Parameter)
-    assert p.default == nan_to_none(size)
+    assert issubclass(compartment, Compartment)
+    v = getattr(compartment, name)
+    assert isinstance(v, Volume)
+    assert v.initial == nan_to_none(size)
+
+
+def _compartments(*sizes):
+    return types.Model(
+        compartments=[
+            types.Compartment(id=types.ID(f"c{i}"), size=size, constant=True)
+            for i, size in enumerate(sizes)
+        ],
+        species=[
+            types.Species(
+                id=types.ID(f"s{i}"),
+                compartment=types.ID(f"c{i}"),
+                initial_amount=1.0,
+                has_only_substance_units=False,
+                boundary_condition=False,
+                constant=False,
+            )
+            for i in range(len(sizes))
+        ],
+    )
+
+
+def test_multiple_compartments():
+    model = convert(_compartments(1, 1), name="model")
+    assert not issubclass(model, Compartment)
+    for name in ("c0", "c1"):
+        p = getattr(model, name)
+        assert isinstance(p, Parameter)
+        assert p.default == 1
+    for name in ("s0", "s1"):
+        assert getattr(model, name).initial == 1
+
+
+def test_multiple_compartments_size():
+    with raises(NotImplementedError):
+        convert(_compartments(1, 2), name="model")
+
+
+def _decay(*, size: float):
+    A, B, c, k = map(MathMLSymbol, ["A", "B", "c", "k"])
+    species = [
+        types.Species(
+            id=types.ID(name),
+            compartment=types.ID("c"),
+            initial_concentration=value,
+            has_only_substance_units=False,
+            boundary_condition=False,
+            constant=False,
+        )
+        for name, value in [("A", 1.0), ("B", 2.0)]
+    ]
+    reaction = types.Reaction(
+        id=types.ID("R"),
+        reversible=False,
+        fast=False,
+        reactants=[types.SpeciesReference(species=types.ID("A"), constant=True)],
+        products=[],
+        modifiers=[types.ModifierSpeciesReference(species=types.ID("B"))],
+        kinetic_law=types.KineticLaw(
+            math=k * c * A * B,
+            parameters=[types.LocalParameter(id=types.ID("k"), value=0.5)],
+        ),
+    )
+    return types.Model(
+        compartments=[types.Compartment(id=types.ID("c"), size=size, constant=True)],
+        species=species,
+        reactions=[reaction],
+    )
+
+
+@mark.parametrize("size", [1, 2])
+def test_reaction(size):
+    model = convert(_decay(size=size), name="model")
+    assert isinstance(model.R, AbsoluteRateLaw)
+    # The modifier only appears in the rate law.
+    assert [r.variable for r in model.R.reactants] == [model.A]
+    assert model.R.products == ()
+    assert model.R__k.default == 0.5
+
+    # The kinetic law is in amount per time: dA/dt = -k * A * B.
+    times = np.linspace(0, 1, 5)
+    result = Simulator(model).solve(save_at=times)
+    assert np.allclose(result["A"], np.exp(-times), rtol=1e-2)
+    assert np.allclose(result["B"], 2)
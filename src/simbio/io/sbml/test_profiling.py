@@ -0,0 +1,52 @@
+from .importer import parse
+from .profiling import is_active, phase, profile
+
+SBML = """<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level3/version2/core" level="3" version="2">
+  <model>
+    <listOfParameters>
+      <parameter id="k1" value="1" constant="true"/>
+      <parameter id="k2" value="2" constant="true"/>
+    </listOfParameters>
+  </model>
+</sbml>
+"""
+
+
+def test_nested_phases():
+    with profile(memory=True) as prof:
+        with phase("outer"):
+            for _ in range(2):
+                with phase("inner"):
+                    data = [0] * 10_000  # noqa: F841
+
+    assert set(prof.stats) == {"outer", "inner"}
+    outer, inner = prof.stats["outer"], prof.stats["inner"]
+    assert (outer.calls, inner.calls) == (1, 2)
+    assert outer.total >= inner.total >= inner.self >= 0
+    assert abs(outer.self + inner.total - outer.total) < 1e-6
+    assert "inner" in prof.report()
+
+
+def test_import_phases():
+    with profile() as prof:
+        parse(SBML)
+
+    calls = {name: stats.calls for name, stats in prof.stats.items()}
+    assert calls["parse"] == 1
+    assert calls["convert"] == 1
+    assert calls["convert.Model"] == 1
+    assert calls["convert.Parameter"] == 2
+
+
+def test_inactive():
+    assert not is_active()
+    with phase("ignored"):
+        pass
+
+    with profile() as prof:
+        assert is_active()
+    assert not is_active()
+    with phase("ignored"):
+        pass
+    assert prof.stats == {}
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from ... import (
+    Compartment,
+    MassAction,
+    Parameter,
+    RateLaw,
+    Species,
+    System,
+    Variable,
+    Volume,
+    assign,
+    initial,
+)
+from ...core import amount, concentration, volume
+from .bulk import LoadFailure
+from .roundtrip import RoundTrip, benchmark, report, roundtrip
+from .writer import dumps
+
+
+class Cell(Compartment):
+    V: Volume = volume(default=2)
+    A: Species = concentration(default=1)
+    B: Species = amount(default=0)
+    k: Parameter = assign(default=3)
+    forward = MassAction(reactants=[A], products=[B], rate=k)
+    backward = RateLaw(reactants=[B], products=[A], rate_law=k * B / (1 + B))
+
+
+class Decay(System):
+    x: Variable = initial(default=1)
+    k: Parameter = assign(default=2)
+    k2: Parameter = assign(default=2 * k)
+    kx: Parameter = assign(default=x + 1)
+    eq = x.derive() << -k2 * x + kx / 10
+
+
+def test_roundtrip(tmp_path):
+    save_at = np.linspace(0, 1, 5)
+    for model in (Cell, Decay):
+        path = tmp_path / f"{model.__name__}.xml"
+        path.write_text(dumps(model))
+        result = roundtrip(path, save_at=save_at)
+        assert isinstance(result, RoundTrip)
+        assert result.missing == []
+        assert result.max_error < 1e-9
+
+    path = tmp_path / "broken.xml"
+    path.write_text("<sbml")
+    failure = roundtrip(path)
+    assert isinstance(failure, LoadFailure)
+    assert failure.stage == "import"
+
+
+def test_benchmark(tmp_path):
+    paths = [tmp_path / "Cell.xml", tmp_path / "missing.xml"]
+    paths[0].write_text(dumps(Cell))
+    with ThreadPoolExecutor() as executor:
+        results = benchmark(paths, executor=executor)
+    assert isinstance(results[0], RoundTrip)
+    assert isinstance(results[1], LoadFailure)
+
+
+def test_report():
+    results = [
+        RoundTrip(
+            path=Path("a.xml"),
+            import_time=0.5,
+            export_time=0.1,
+            reimport_time=0.5,
+            size=100,
+            missing=[],
+            max_error=1e-9,
+        ),
+        LoadFailure(
+            path=Path("b.xml"),
+            stage="export",
+            error="NotImplementedError",
+            message="",
+            traceback="",
+        ),
+    ]
+    text = report(results)
+    assert "a.xml" in text
+    assert "export: NotImplementedError" in text
+    assert text.endswith(
+        "1/2 round trips, 1 without missing components,"
+        " max error 1.00e-09; export 0.100 s for import 0.500 s"
+    )
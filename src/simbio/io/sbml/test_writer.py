@@ -0,0 +1,110 @@
+import libsbml
+import pint
+from pytest import raises
+
+from ... import (
+    Compartment,
+    Constant,
+    MassAction,
+    Parameter,
+    RateLaw,
+    Species,
+    System,
+    Variable,
+    Volume,
+    assign,
+    initial,
+)
+from ...core import amount, concentration, volume
+from .writer import dump, dumps
+
+
+class Cell(Compartment):
+    V: Volume = volume(default=2)
+    A: Species = concentration(default=1)
+    B: Species = amount(default=0)
+    E: Species = concentration(default=0.5)
+    k: Parameter = assign(default=3)
+    forward = MassAction(reactants=[A], products=[B], rate=k)
+    backward = RateLaw(reactants=[B], products=[A], rate_law=k * E * B)
+
+
+class Outer(System):
+    cell = Cell()
+    x: Variable = initial(default=1)
+    z: Variable = initial(default=0)
+    k: Parameter = assign(default=2)
+    k2: Parameter = assign(default=2 * k)
+    kx: Parameter = assign(default=x + 1)
+    c: Constant = Constant(default=3)
+    decay = MassAction(reactants=[2 * x], products=[], rate=k2 * c)
+    eq = z.derive() << kx - z
+
+
+def read(text: str) -> libsbml.Model:
+    document = libsbml.readSBMLFromString(text)
+    assert document.getNumErrors() == 0
+    return document.getModel()
+
+
+def formula(math) -> str:
+    return libsbml.formulaToL3String(math)
+
+
+def test_compartment():
+    model = read(dumps(Cell))
+    assert model.getId() == "Cell"
+    assert model.getCompartment("V").getSize() == 2
+
+    A = model.getSpecies("A")
+    assert A.getCompartment() == "V"
+    assert A.getInitialConcentration() == 1
+    assert not A.getHasOnlySubstanceUnits()
+    B = model.getSpecies("B")
+    assert B.getInitialAmount() == 0
+    assert B.getHasOnlySubstanceUnits()
+
+    # Kinetic laws are in amount per time.
+    forward = model.getReaction("forward")
+    assert formula(forward.getKineticLaw().getMath()) == "k * A^1 * V"
+    backward = model.getReaction("backward")
+    assert [m.getSpecies() for m in backward.getListOfModifiers()] == ["E"]
+    assert formula(backward.getKineticLaw().getMath()) == "k * E * B * V"
+
+
+def test_system():
+    model = read(dumps(Outer))
+    assert model.getCompartment("default_compartment").getSize() == 1
+
+    species = model.getSpecies("cell__A")
+    assert species.getName() == "cell.A"
+    assert species.getCompartment() == "cell__V"
+    assert model.getSpecies("x").getCompartment() == "default_compartment"
+
+    reaction = model.getReaction("decay")
+    assert reaction.getReactant("x").getStoichiometry() == 2
+    assert formula(reaction.getKineticLaw().getMath()) == "k2 * c * x^2"
+
+    assert model.getParameter("c").getValue() == 3
+    assert formula(model.getInitialAssignmentBySymbol("k2").getMath()) == "2 * k"
+    assert not model.getParameter("kx").getConstant()
+    assert formula(model.getAssignmentRuleByVariable("kx").getMath()) == "x + 1"
+    assert not model.getParameter("z").getConstant()
+    assert formula(model.getRateRuleByVariable("z").getMath()) == "kx - z"
+
+
+def test_dump(tmp_path):
+    path = tmp_path / "model.xml"
+    dump(Outer, path)
+    assert path.read_text() == dumps(Outer)
+
+
+def test_errors():
+    with raises(ValueError):
+        dumps(Cell, identity_mapper=lambda x: f"1{x}")
+
+    class WithUnits(System):
+        x: Variable = initial(default=pint.Quantity(1, "mM"))
+
+    with raises(TypeError):
+        dumps(WithUnits)
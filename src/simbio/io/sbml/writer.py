@@ -0,0 +1,335 @@
+"""
+simbio.io.sbml.writer
+~~~~~~~~~~~~~~~~~~~~~
+
+Write models as SBML Level 3 Version 2::
+
+    dump(Model, "model.xml")
+
+The document is generated element by element and streamed to the file,
+without building a libsbml document, so that large models
+are not held twice in memory. Expressions are serialized
+with :class:`simbio.io.mathML.MathMLWriter`, sharing a single cache
+across the model.
+
+Volumes become SBML compartments, and variables that take part
+in reactions become species. Kinetic laws are written in amount per time,
+as in SBML, multiplying the rate of reactions in concentration
+by the volume of their species. Models without volume are placed
+in a compartment of unit size. Other parameters and variables become
+SBML parameters, with assignment rules for values that depend on time
+or variables, initial assignments for other expressions,
+and rate rules for equations that do not come from reactions.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from numbers import Number
+from os import PathLike
+from typing import Any, TextIO
+from xml.sax.saxutils import escape
+
+import pint
+from poincare.compile import depends_on_at_least_one_variable_or_time, yield_equations
+from symbolite.ops import yield_named
+
+from ... import Constant, Parameter, RateLaw, Species, System, Variable, Volume
+from ...core import first_system_parent
+from ..mathML.exporter import MathMLWriter
+
+SBML_NS = "http://www.sbml.org/sbml/level3/version2/core"
+DEFAULT_COMPARTMENT = "default_compartment"
+
+_ID = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_quote = {'"': "&quot;"}
+
+
+def sbml_id(name: str) -> str:
+    """Replace the separator of nested systems, which is not valid in SBML ids."""
+    return name.replace(".", "__")
+
+
+def _number(x: float) -> str:
+    if not isinstance(x, float):
+        return str(x)
+    elif math.isnan(x):
+        return "NaN"
+    elif math.isinf(x):
+        return "INF" if x > 0 else "-INF"
+    return repr(float(x))
+
+
+def _bool(x: bool) -> str:
+    return "true" if x else "false"
+
+
+class SBMLWriter:
+    """Write a model as an SBML document.
+
+    Ids are the names of the components, as given by ``identity_mapper``,
+    which must produce valid SBML ids. Nested names are joined with ``__``.
+    Units are not supported.
+    """
+
+    def __init__(
+        self,
+        model: System | type[System],
+        *,
+        name: str | None = None,
+        identity_mapper: Callable[[str], str] = sbml_id,
+    ):
+        self.model = model
+        self.name = model.__name__ if name is None else name
+        self.identity_mapper = identity_mapper
+
+        # An alias of the volume, _simbio_volume, is yielded twice.
+        self.variables: list[Variable] = list(dict.fromkeys(model._yield(Variable)))
+        self.parameters: list[Parameter | Constant] = list(
+            dict.fromkeys(model._yield(Parameter | Constant))
+        )
+        # Reactions are not hashable.
+        self.reactions: list[RateLaw] = list(
+            {id(r): r for r in model._yield(RateLaw)}.values()
+        )
+
+        self.ids: dict[Any, str] = {
+            x: self._id(x) for x in (*self.variables, *self.parameters)
+        }
+        self.mathml = MathMLWriter(self.ids)
+
+        self.volumes = [v for v in self.variables if isinstance(v, Volume)]
+
+        # Equations that do not come from reactions become rate rules.
+        from_reactions = {id(eq) for r in self.reactions for eq in r.equations}
+        self.rate_rules: dict[Variable, list] = defaultdict(list)
+        for eq in yield_equations(model):
+            if id(eq) not in from_reactions:
+                self.rate_rules[eq.lhs.variable].append(eq.rhs)
+
+        # Plain variables in reactions follow the volume compensation of simbio,
+        # which does not scale them, so their reactions must agree.
+        self.species: dict[Variable, bool] = {}  # has only substance units
+        for r in self.reactions:
+            for e in (*r.reactants, *r.products):
+                v = e.variable
+                if isinstance(v, Species):
+                    self.species[v] = not v.concentration
+                elif self.species.setdefault(v, not r.concentration) == r.concentration:
+                    raise NotImplementedError(
+                        f"{v} takes part in reactions both in amount and concentration"
+                    )
+        for v in self.variables:
+            if v.equation_order not in (None, 1):
+                raise NotImplementedError(f"higher order equations: {v}")
+            if v in self.species and v in self.rate_rules:
+                raise NotImplementedError(
+                    f"{v} is changed by both reactions and other equations"
+                )
+            if isinstance(v, Species):
+                self.species.setdefault(v, not v.concentration)
+
+    def _id(self, x) -> str:
+        name = str(x)
+        sid = self.identity_mapper(name)
+        if _ID.fullmatch(sid) is None:
+            raise ValueError(f"invalid SBML id for {name}: {sid}")
+        return sid
+
+    def compartment(self, species: Variable) -> Variable | None:
+        parent = first_system_parent(species)
+        return getattr(parent, "_simbio_volume", None)
+
+    def _value(self, x: Any, attribute: str) -> str:
+        """The attribute for a numeric value, or empty if it is an expression."""
+        if isinstance(x, pint.Quantity | pint.Unit):
+            raise TypeError("SBML writer doesn't support units")
+        elif isinstance(x, bool) or not isinstance(x, Number):
+            return ""
+        return f' {attribute}="{_number(x)}"'
+
+    def _math(self, expr) -> str:
+        if isinstance(expr, pint.Quantity | pint.Unit):
+            raise TypeError("SBML writer doesn't support units")
+        return self.mathml.math(expr)
+
+    def _name(self, x, sid: str) -> str:
+        name = str(x)
+        return "" if name == sid else f' name="{escape(name, _quote)}"'
+
+    def kinetic_law(self, reaction: RateLaw):
+        """Rate of reaction in amount per time."""
+        rate = reaction.rate_law
+        if not reaction.concentration:
+            return rate
+        volumes = {
+            self.compartment(e.variable)
+            for e in (*reaction.reactants, *reaction.products)
+        }
+        if len(volumes) > 1:
+            raise NotImplementedError(
+                f"{reaction} is in concentration, with species in several compartments"
+            )
+        volume = volumes.pop() if volumes else None
+        return rate if volume is None else rate * volume
+
+    def _modifiers(self, reaction: RateLaw) -> list[Variable]:
+        """Species in the rate law which are not changed by the reaction."""
+        participants = {e.variable for e in (*reaction.reactants, *reaction.products)}
+        modifiers = []
+        for x in yield_named(reaction.rate_law):
+            if x in self.species and x not in participants and x not in modifiers:
+                modifiers.append(x)
+        return modifiers
+
+    def yield_chunks(self) -> Iterator[str]:
+        """Yield the document, element by element."""
+        ids = self.ids
+        initial_assignments: list[tuple[str, Any]] = []
+        assignment_rules: list[tuple[str, Any]] = []
+
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield f'<sbml xmlns="{SBML_NS}" level="3" version="2">\n'
+        yield (
+            f'  <model id="{self.identity_mapper(self.name)}" name="{escape(self.name, _quote)}">\n'
+        )
+
+        yield "    <listOfCompartments>\n"
+        if any(self.compartment(v) is None for v in self.species):
+            yield (
+                f'      <compartment id="{DEFAULT_COMPARTMENT}"'
+                ' spatialDimensions="3" size="1" constant="true"/>\n'
+            )
+        for v in self.volumes:
+            size = self._value(v.initial, "size")
+            if size == "" and v.initial is not None:
+                initial_assignments.append((ids[v], v.initial))
+            constant = _bool(v not in self.rate_rules)
+            yield (
+                f'      <compartment id="{ids[v]}"{self._name(v, ids[v])}'
+                f' spatialDimensions="3"{size} constant="{constant}"/>\n'
+            )
+        yield "    </listOfCompartments>\n"
+
+        yield "    <listOfSpecies>\n"
+        for v, amount in self.species.items():
+            volume = self.compartment(v)
+            attribute = "initialAmount" if amount else "initialConcentration"
+            value = self._value(v.initial, attribute)
+            if value == "" and v.initial is not None:
+                initial_assignments.append((ids[v], v.initial))
+            yield (
+                f'      <species id="{ids[v]}"{self._name(v, ids[v])}'
+                f' compartment="{DEFAULT_COMPARTMENT if volume is None else ids[volume]}"'
+                f'{value} hasOnlySubstanceUnits="{_bool(amount)}"'
+                ' boundaryCondition="false" constant="false"/>\n'
+            )
+        yield "    </listOfSpecies>\n"
+
+        yield "    <listOfParameters>\n"
+        for p in self.parameters:
+            default = p.default
+            value = self._value(default, "value")
+            constant = True
+            if value == "" and default is not None:
+                if depends_on_at_least_one_variable_or_time(default):
+                    assignment_rules.append((ids[p], default))
+                    constant = False
+                else:
+                    initial_assignments.append((ids[p], default))
+            yield (
+                f'      <parameter id="{ids[p]}"{self._name(p, ids[p])}{value}'
+                f' constant="{_bool(constant)}"/>\n'
+            )
+        for v in self.variables:
+            if v in self.species or v in self.volumes:
+                continue
+            value = self._value(v.initial, "value")
+            if value == "" and v.initial is not None:
+                initial_assignments.append((ids[v], v.initial))
+            constant = _bool(v not in self.rate_rules)
+            yield (
+                f'      <parameter id="{ids[v]}"{self._name(v, ids[v])}{value}'
+                f' constant="{constant}"/>\n'
+            )
+        yield "    </listOfParameters>\n"
+
+        if initial_assignments:
+            yield "    <listOfInitialAssignments>\n"
+            for sid, expr in initial_assignments:
+                yield f'      <initialAssignment symbol="{sid}">'
+                yield self._math(expr)
+                yield "</initialAssignment>\n"
+            yield "    </listOfInitialAssignments>\n"
+
+        if assignment_rules or self.rate_rules:
+            yield "    <listOfRules>\n"
+            for sid, expr in assignment_rules:
+                yield f'      <assignmentRule variable="{sid}">'
+                yield self._math(expr)
+                yield "</assignmentRule>\n"
+            for v, terms in self.rate_rules.items():
+                yield f'      <rateRule variable="{ids[v]}">'
+                yield self._math(sum(terms[1:], start=terms[0]))
+                yield "</rateRule>\n"
+            yield "    </listOfRules>\n"
+
+        if self.reactions:
+            yield "    <listOfReactions>\n"
+            for r in self.reactions:
+                yield from self._reaction(r)
+            yield "    </listOfReactions>\n"
+
+        yield "  </model>\n"
+        yield "</sbml>\n"
+
+    def _reaction(self, r: RateLaw) -> Iterator[str]:
+        ids = self.ids
+        sid = self._id(r)
+        yield (f'      <reaction id="{sid}"{self._name(r, sid)} reversible="false">\n')
+        for tag, entries in (
+            ("listOfReactants", r.reactants),
+            ("listOfProducts", r.products),
+        ):
+            if entries:
+                yield f"        <{tag}>\n"
+                for e in entries:
+                    yield (
+                        f'          <speciesReference species="{ids[e.variable]}"'
+                        f' stoichiometry="{_number(e.stoichiometry)}"'
+                        ' constant="true"/>\n'
+                    )
+                yield f"        </{tag}>\n"
+        modifiers = self._modifiers(r)
+        if modifiers:
+            yield "        <listOfModifiers>\n"
+            for v in modifiers:
+                yield f'          <modifierSpeciesReference species="{ids[v]}"/>\n'
+            yield "        </listOfModifiers>\n"
+        yield "        <kineticLaw>"
+        yield self._math(self.kinetic_law(r))
+        yield "</kineticLaw>\n"
+        yield "      </reaction>\n"
+
+
+def dump(
+    model: System | type[System],
+    file: str | PathLike | TextIO,
+    /,
+    **kwargs,
+) -> None:
+    """Write a model as SBML to a path or a text file, see ``SBMLWriter``."""
+    writer = SBMLWriter(model, **kwargs)
+    if isinstance(file, str | PathLike):
+        with open(file, "w", encoding="utf-8") as f:
+            f.writelines(writer.yield_chunks())
+    else:
+        file.writelines(writer.yield_chunks())
+
+
+def dumps(model: System | type[System], /, **kwargs) -> str:
+    """A model as an SBML string, see ``SBMLWriter``."""
+    return "".join(SBMLWriter(model, **kwargs).yield_chunks())
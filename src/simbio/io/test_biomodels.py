@@ -0,0 +1,50 @@
+import zipfile
+
+from pytest import raises
+
+from . import biomodels
+from .biomodels import INDEX, LocalRepository, RemoteRepository, prefetch
+
+MANIFEST = """<?xml version="1.0" encoding="UTF-8"?>
+<omexManifest xmlns="http://identifiers.org/combine.specifications/omex-manifest">
+  <content location="./manifest.xml" format="http://identifiers.org/combine.specifications/omex-manifest" master="false"/>
+  <content location="./model.xml" format="http://identifiers.org/combine.specifications/sbml" master="true"/>
+</omexManifest>
+"""
+
+
+def test_local_repository(tmp_path):
+    (tmp_path / "BIOMD0000000001.xml").write_text("<sbml>1</sbml>")
+    with zipfile.ZipFile(tmp_path / "BIOMD0000000002.omex", "w") as z:
+        z.writestr("manifest.xml", MANIFEST)
+        z.writestr("model.xml", "<sbml>2</sbml>")
+
+    repository = LocalRepository(tmp_path)
+    assert len(repository) == 2
+    assert "BIOMD1" in repository
+    assert repository.get_sbml("BIOMD1") == "<sbml>1</sbml>"
+    assert repository.get_sbml("BIOMD0000000002") == "<sbml>2</sbml>"
+    with raises(FileNotFoundError):
+        repository.get_sbml("BIOMD3")
+
+
+def test_prefetch(tmp_path, monkeypatch):
+    def get_sbml(self, model_id):
+        return f"<sbml>{model_id}</sbml>"
+
+    monkeypatch.setattr(RemoteRepository, "get_sbml", get_sbml)
+    files = prefetch(["BIOMD1", "BIOMD12"], tmp_path)
+    assert files == {
+        "BIOMD0000000001": "BIOMD0000000001.xml",
+        "BIOMD0000000012": "BIOMD0000000012.xml",
+    }
+    assert (tmp_path / INDEX).exists()
+
+    def offline(self, model_id):
+        raise AssertionError("network access")
+
+    monkeypatch.setattr(RemoteRepository, "get_sbml", offline)
+    prefetch(["BIOMD1"], tmp_path)  # already present
+
+    monkeypatch.setattr(biomodels, "loads", lambda text, **kwargs: text)
+    assert biomodels.load("BIOMD12", repository=tmp_path) == "<sbml>BIOMD12</sbml>"
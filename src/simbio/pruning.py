@@ -0,0 +1,295 @@
+"""
+simbio.pruning
+~~~~~~~~~~~~~~
+
+Remove the inactive parts of a model.
+
+Starting from the species that are zero initially,
+a reaction is dead if its rate vanishes structurally,
+e.g. a mass action reaction with a reactant that is zero,
+and a species stays zero if it is only changed by dead reactions.
+Both are found at once, as a fixed point over the species/reaction graph.
+
+Dead reactions are removed, as are the species and parameters
+that are no longer referenced. Models imported from databases
+often carry large inactive branches, which would otherwise
+inflate the state and the cost of evaluating the right-hand side.
+"""
+
+from __future__ import annotations
+
+import operator
+from collections import defaultdict, deque
+from collections.abc import Hashable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from numbers import Number
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+from poincare._node import Node
+from poincare.compile import yield_equations
+from poincare.simulator import Components
+from poincare.types import Equation, EquationGroup, Initial
+from symbolite.core.symbolite_object import get_symbolite_info
+from symbolite.ops import yield_named
+
+from . import Parameter, RateLaw, System, Variable
+from .core import Volume
+from .derivative import _call, leaf_key, yield_leaves
+from .stoichiometry import SparseSimulator
+
+# Unary functions with f(0) = 0.
+_odd = {"neg", "pos", "abs", "sqrt", "sin", "tan", "sinh", "tanh", "asin", "atan"}
+
+_arithmetic = {
+    "add": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "truediv": operator.truediv,
+    "pow": operator.pow,
+    "neg": operator.neg,
+    "pos": operator.pos,
+}
+
+
+def vanishes(
+    expr: Any, zeros: set[Hashable], /, constants: Mapping[Hashable, float] = {}
+) -> bool:
+    """Whether expr is structurally zero when the leaves in ``zeros``,
+    as given by ``leaf_key``, are zero.
+
+    A quotient vanishes only if its denominator is provably
+    a non-zero constant, with the leaves in ``constants`` at their values,
+    as 0 / 0 is not zero, e.g. ``x / x``.
+    It is conservative: False when it cannot tell.
+    """
+    memo: dict[int, bool] = {}
+
+    def constant(x) -> float | None:
+        if isinstance(x, Number):
+            return x
+        key = leaf_key(x)
+        if key is not None:
+            return 0 if key in zeros else constants.get(key)
+        name, args = _call(x)
+        func = _arithmetic.get(name)
+        if func is None:
+            return None
+        values = [constant(arg) for arg in args]
+        if any(value is None for value in values):
+            return None
+        try:
+            return func(*values)
+        except (ArithmeticError, ValueError):
+            return None
+
+    def v(x) -> bool:
+        try:
+            return memo[id(x)]
+        except KeyError:
+            memo[id(x)] = result = _vanishes(x)
+            return result
+
+    def _vanishes(x) -> bool:
+        if isinstance(x, Number):
+            return x == 0
+        key = leaf_key(x)
+        if key is not None:
+            return key in zeros
+
+        name, args = _call(x)
+        if name == "mul":
+            return v(args[0]) or v(args[1])
+        elif name == "truediv":
+            numerator, denominator = args
+            d = constant(denominator)
+            return (
+                isinstance(d, int | float)
+                and d != 0
+                and np.isfinite(d)
+                and v(numerator)
+            )
+        elif name in ("add", "sub"):
+            return v(args[0]) and v(args[1])
+        elif name == "pow":
+            base, exponent = args
+            return isinstance(exponent, Number) and exponent > 0 and v(base)
+        elif name in _odd:
+            return v(args[0])
+        return False
+
+    return v(expr)
+
+
+@dataclass(frozen=True, kw_only=True)
+class PruningReport:
+    """What was removed by ``prune``.
+
+    ``species`` maps each removed variable to the constant value it had.
+    """
+
+    reactions: Sequence[str]
+    species: Mapping[str, Initial]
+    parameters: Sequence[str]
+
+    def __len__(self) -> int:
+        return len(self.reactions) + len(self.species) + len(self.parameters)
+
+
+def _live(sim: SparseSimulator, y0: NDArray, p: NDArray) -> tuple[NDArray, NDArray]:
+    """Boolean masks of the reactions, in ``stoichiometry.reactions``,
+    and of the variables, in ``compiled.variables``,
+    that can become non-zero from the initial state y0
+    with parameters p."""
+    compiler = sim.compiler
+    index = {v: i for i, v in enumerate(sim.compiled.variables)}
+    nonzero = y0 != 0
+    # Equations that do not come from reactions are not analyzed.
+    for _, v in compiler.keys["extra"]:
+        nonzero[index[v]] = True
+
+    y = get_symbolite_info(compiler.mapping["y"]).value
+    zeros = {(y, i) for i in np.flatnonzero(~nonzero).tolist()}
+    p_vector = get_symbolite_info(compiler.mapping["p"]).value
+    constants = {(p_vector, j): value for j, value in enumerate(p.tolist())}
+    rates = [compiler.expressions[k] for k in compiler.keys["rate"]]
+    depends: dict[int, list[int]] = defaultdict(list)
+    for j, rate in enumerate(rates):
+        for key in set(yield_leaves(rate)):
+            if key in zeros:
+                depends[key[1]].append(j)
+
+    st = sim.stoichiometry
+    changes = st.matrix.tocsc()
+    rows = np.array([index[s] for s in st.species], dtype=np.intp)
+
+    live = np.array([not vanishes(r, zeros, constants) for r in rates], dtype=bool)
+    queue = deque(np.flatnonzero(live).tolist())
+    while queue:
+        j = queue.popleft()
+        changed = rows[changes.indices[changes.indptr[j] : changes.indptr[j + 1]]]
+        for i in changed[~nonzero[changed]].tolist():
+            nonzero[i] = True
+            zeros.discard((y, i))
+            for k in depends[i]:
+                if not live[k] and not vanishes(rates[k], zeros, constants):
+                    live[k] = True
+                    queue.append(k)
+    return live, nonzero
+
+
+def _references(node: Any) -> Iterator[Node]:
+    """Variables and parameters that a node refers to."""
+    match node:
+        case RateLaw():
+            for e in (*node.reactants, *node.products):
+                yield e.variable
+            yield from _named(node.rate_law)
+        case Equation():
+            yield node.lhs.variable
+            yield from _named(node.rhs)
+        case EquationGroup():
+            for eq in node.equations:
+                yield from _references(eq)
+        case Variable():
+            yield from _named(node.initial)
+        case Parameter():
+            yield from _named(node.default)
+        case System():
+            for x in node._yield(Node):
+                if x is not node:
+                    yield from _references(x)
+
+
+def _named(expr: Any) -> Iterator[Node]:
+    for x in yield_named(expr):
+        if isinstance(x, Variable | Parameter):
+            yield x
+
+
+def prune(
+    model: type[System],
+    values: Mapping[Components, Initial] = {},
+    /,
+) -> tuple[type[System], PruningReport]:
+    """Return a copy of model without dead reactions,
+    and without the species and parameters that are no longer referenced.
+
+    Species that are never produced or consumed are removed
+    unless a remaining rate, equation or assignment refers to them.
+    The result depends on which initial values are zero,
+    so ``values`` should be the ones to be simulated.
+    Only top-level nodes are removed; nested systems are kept whole.
+    """
+    sim = SparseSimulator(model)
+    problem = sim.create_problem(values)
+    y0 = np.asarray(problem.y, dtype=float)
+    live, _ = _live(sim, y0, np.asarray(problem.p, dtype=float))
+    # Variables without equations are compiled as parameters,
+    # or not at all if they are not referenced.
+    constant = {
+        **dict(zip(sim.compiled.parameters, np.asarray(problem.p).tolist())),
+        **dict(zip(sim.compiled.variables, y0.tolist())),
+    }
+    dead = {id(r) for r, x in zip(sim.stoichiometry.reactions, live) if not x}
+
+    top = {
+        name: value
+        for name, value in model.__dict__.items()
+        if isinstance(value, Node) and value.name == name
+    }
+    removable = {
+        name
+        for name, value in top.items()
+        if isinstance(value, Variable | Parameter) and not isinstance(value, Volume)
+    }
+    removed_reactions = {name for name, value in top.items() if id(value) in dead}
+
+    # Everything else is kept, with the nodes it refers to.
+    referenced: set[int] = set()
+    stack = [
+        value
+        for name, value in top.items()
+        if name not in removable and name not in removed_reactions
+    ]
+    while stack:
+        for x in _references(stack.pop()):
+            if id(x) not in referenced:
+                referenced.add(id(x))
+                stack.append(x)
+    removed = {name for name in removable if id(top[name]) not in referenced}
+
+    report = PruningReport(
+        reactions=sorted(removed_reactions),
+        species={
+            name: constant.get(top[name], values.get(top[name], top[name].initial))
+            for name in sorted(removed)
+            if isinstance(top[name], Variable)
+        },
+        parameters=sorted(name for name in removed if isinstance(top[name], Parameter)),
+    )
+    if len(report) == 0:
+        return model, report
+
+    # As in approximate_michaelis_menten, nodes of an instance
+    # are copies that refer to each other, re-parented to the new class.
+    instance = model()
+    namespace = {
+        name: getattr(instance, name)
+        for name in top
+        if name not in removed and name not in removed_reactions
+    }
+    namespace["__annotations__"] = {
+        k: v for k, v in model._annotations.items() if k in namespace
+    }
+    namespace["__module__"] = model.__module__
+    namespace["__qualname__"] = model.__qualname__
+    new = type(model)(model.__name__, model.__bases__, namespace)
+
+    # Variables only changed by dead reactions become constants.
+    derived = {eq.lhs.variable for eq in yield_equations(new)}
+    for v in new._yield(Variable):
+        if v not in derived:
+            v.equation_order = None
+    return new, report
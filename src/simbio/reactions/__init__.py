@@ -7,6 +7,7 @@
     MichaelisMenten,
     MichaelisMentenEqApprox,
     MichaelisMentenQuasiSSAprox,
+    approximate_michaelis_menten,
 )
 from .single import (
     AutoCreation,
@@ -24,6 +25,7 @@
     "MichaelisMenten",
     "MichaelisMentenEqApprox",
     "MichaelisMentenQuasiSSAprox",
+    "approximate_michaelis_menten",
     "Creation",
     "AutoCreation",
     "Destruction",
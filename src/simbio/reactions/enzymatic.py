@@ -1,8 +1,17 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from poincare._node import Node
+from poincare.compile import yield_equations
+from poincare.reactions.reactions import make_concentration
+
 from .. import (
     Parameter,
     RateLaw,
     Reactant,
     System,
+    Variable,
     assign,
     reaction_initial,
 )
@@ -32,29 +41,43 @@ class MichaelisMenten(System):
         rate=catalytic_rate,
     )
 
-    def to_eq_approx(self):
-        raise NotImplementedError
-        # Should we generate a new S species or modify the concentration to add ES
-        # Should we invalidate this reaction (self) because we are using these elsewhere
-        # michaelis_constant = reverse_rate / forward_rate
-        # return MichaelisMentenEqApprox(
-        #     S=S,
-        #     P=P,
-        #     maximum_velocity=catalytic_rate * (E.concentration + ES.concentration),
-        #     michaelis_constant=michaelis_constant,
-        # )
-
-    def to_qss_approx(self):
-        raise NotImplementedError
-        # Should we generate a new S species or modify the concentration to add ES
-        # Should we invalidate this reaction (self) because we are using these elsewhere
-        # michaelis_constant = (reverse_rate + catalytic_rate) / forward_rate
-        # return MichaelisMentenEqApprox(
-        #     S=S,
-        #     P=P,
-        #     maximum_velocity=catalytic_rate * (E.concentration + ES.concentration),
-        #     michaelis_constant=michaelis_constant,
-        # )
+    def _total_enzyme(self):
+        return make_concentration(self.E.variable) + make_concentration(
+            self.ES.variable
+        )
+
+    def _substrate_product(self):
+        return {
+            "S": Reactant(self.S.variable, self.S.stoichiometry),
+            "P": Reactant(self.P.variable, self.P.stoichiometry),
+        }
+
+    def to_eq_approx(self) -> MichaelisMentenEqApprox:
+        """Rapid equilibrium approximation of this reaction,
+        assuming the binding reaction is fast compared to catalysis.
+
+        The total enzyme E + ES is constant,
+        as E and ES no longer take part in the reduced reaction.
+        """
+        return MichaelisMentenEqApprox(
+            **self._substrate_product(),
+            maximum_velocity=self.catalytic_rate * self._total_enzyme(),
+            dissociation_constant=self.reverse_rate / self.forward_rate,
+        )
+
+    def to_qss_approx(self) -> MichaelisMentenQuasiSSAprox:
+        """Quasi-steady state approximation of this reaction,
+        assuming the enzyme-substrate complex ES is at steady state.
+
+        The total enzyme E + ES is constant,
+        as E and ES no longer take part in the reduced reaction.
+        """
+        return MichaelisMentenQuasiSSAprox(
+            **self._substrate_product(),
+            maximum_velocity=self.catalytic_rate * self._total_enzyme(),
+            michaelis_constant=(self.reverse_rate + self.catalytic_rate)
+            / self.forward_rate,
+        )
 
 
 class MichaelisMentenEqApprox(System):
@@ -79,3 +102,60 @@ class MichaelisMentenQuasiSSAprox(System):
         products=[P],
         rate_law=maximum_velocity * S.variable / (michaelis_constant + S.variable),
     )
+
+
+def approximate_michaelis_menten(
+    model: type[System],
+    /,
+    *,
+    method: Literal["qss", "eq"] = "qss",
+) -> type[System]:
+    """Return a copy of model where every MichaelisMenten reaction
+    is replaced by its quasi-steady state (``"qss"``)
+    or rapid equilibrium (``"eq"``) approximation.
+
+    The kinetic constants of each full reaction become the parameters
+    of the reduced one, and enzyme and complex are kept as constants.
+    Removing the fast binding timescale usually makes the model non-stiff.
+    """
+    if method == "qss":
+        approximate, reduced = (
+            MichaelisMenten.to_qss_approx,
+            MichaelisMentenQuasiSSAprox,
+        )
+    elif method == "eq":
+        approximate, reduced = MichaelisMenten.to_eq_approx, MichaelisMentenEqApprox
+    else:
+        raise ValueError(f"unknown approximation method: {method}")
+
+    # Accessing the nodes of an instance creates copies that refer to each other,
+    # which are then re-parented to the new class.
+    instance = model()
+    annotations = dict(model._annotations)
+    namespace = {}
+    for name, value in model.__dict__.items():
+        if not isinstance(value, Node) or value.name != name:
+            continue  # e.g. the _simbio_volume alias
+        value = getattr(instance, name)
+        if isinstance(value, MichaelisMenten):
+            value = approximate(value)
+            annotations[name] = reduced
+        elif isinstance(value, System) and any(value._yield(MichaelisMenten)):
+            raise NotImplementedError(
+                f"MichaelisMenten reactions nested in {name} cannot be approximated"
+            )
+        namespace[name] = value
+
+    namespace["__annotations__"] = {
+        k: annotations[k] for k in annotations if k in namespace
+    }
+    namespace["__module__"] = model.__module__
+    namespace["__qualname__"] = model.__qualname__
+    new = type(model)(model.__name__, model.__bases__, namespace)
+
+    # Enzyme and complex keep the equation order of the full reaction.
+    derived = {eq.lhs.variable for eq in yield_equations(new)}
+    for v in new._yield(Variable):
+        if v not in derived:
+            v.equation_order = None
+    return new
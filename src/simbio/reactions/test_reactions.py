@@ -2,7 +2,7 @@
 from pytest import mark
 
 from .. import Simulator, System, Variable, initial, MassAction
-from ..reactions import compound, enzymatic, single
+from ..reactions import approximate_michaelis_menten, compound, enzymatic, single
 from ..reactions.single import Synthesis
 
 reactions = []
@@ -44,3 +44,48 @@ class Model2(System):
     result2 = np.asarray(sim2.solve(save_at=np.linspace(0, 10, 10)).to_array())
 
     assert np.all(result1 == result2)
+
+
+class Enzymatic(System):
+    E: Variable = initial(default=0.01)
+    S: Variable = initial(default=10)
+    ES: Variable = initial(default=0)
+    P: Variable = initial(default=0)
+
+    mm = enzymatic.MichaelisMenten(
+        E=E, S=S, ES=ES, P=P, forward_rate=10, reverse_rate=10, catalytic_rate=1
+    )
+
+
+@mark.parametrize(
+    "method, reduced",
+    [
+        ("qss", enzymatic.MichaelisMentenQuasiSSAprox),
+        ("eq", enzymatic.MichaelisMentenEqApprox),
+    ],
+)
+def test_approximate_michaelis_menten(method, reduced):
+    model = approximate_michaelis_menten(Enzymatic, method=method)
+    assert isinstance(model.mm, reduced)
+    assert isinstance(Enzymatic.mm, enzymatic.MichaelisMenten)
+    assert len(list(model._yield(MassAction))) == 0
+
+    save_at = np.linspace(0, 100, 11)
+    expected = Simulator(Enzymatic).solve(save_at=save_at)
+    result = Simulator(model).solve(save_at=save_at)
+    # Enzyme and complex are constant, with the total enzyme as E + ES.
+    np.testing.assert_array_equal(result["E"], 0.01)
+    np.testing.assert_array_equal(result["ES"], 0)
+    rtol = 1e-2 if method == "qss" else 1e-1
+    for x in ("S", "P"):
+        np.testing.assert_allclose(result[x], expected[x], rtol=rtol, atol=1e-2)
+
+
+def test_michaelis_menten_approx():
+    qss = Enzymatic.mm.to_qss_approx()
+    assert qss.S.variable == Enzymatic.S
+    assert qss.P.variable == Enzymatic.P
+    assert str(qss.michaelis_constant.default) == str(
+        (Enzymatic.mm.reverse_rate + Enzymatic.mm.catalytic_rate)
+        / Enzymatic.mm.forward_rate
+    )
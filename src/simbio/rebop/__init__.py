@@ -1,3 +1,14 @@
 from poincare.reactions.rebop import RebopSimulator
 
-__all__ = ["RebopSimulator"]
+from .hybrid import HybridSimulator
+from .next_reaction import NextReactionSimulator
+from .parallel import ParallelRebopSimulator
+from .tau_leaping import TauLeapingSimulator
+
+__all__ = [
+    "RebopSimulator",
+    "ParallelRebopSimulator",
+    "HybridSimulator",
+    "TauLeapingSimulator",
+    "NextReactionSimulator",
+]
@@ -0,0 +1,151 @@
+"""
+simbio.rebop.hybrid
+~~~~~~~~~~~~~~~~~~~
+
+Hybrid deterministic/stochastic simulation.
+
+Reactions are partitioned into fast ones, which fire many times per
+sampling interval and only involve abundant species,
+and slow ones, which are simulated exactly.
+Fast reactions are integrated as ODEs in copy numbers,
+together with the integrated propensity of the slow reactions.
+A slow reaction fires when that integral reaches an exponential
+random variate, as in the next reaction method with time-dependent
+propensities.
+
+The partition is recomputed after every slow reaction
+and at every sampled time, as populations change.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy.integrate import solve_ivp
+
+from .. import System
+from .network import NetworkSimulator, sample_reaction
+
+
+class HybridSimulator(NetworkSimulator):
+    """A hybrid ODE/SSA simulator.
+
+    A reaction is fast if it is expected to fire at least ``min_events``
+    times per sampling interval and every species it changes
+    has at least ``min_copies`` molecules.
+    Catalysts, which are not changed, may be scarce.
+    When no reaction is fast, it reduces to Gillespie's direct method.
+    """
+
+    def __init__(
+        self,
+        model: type[System],
+        /,
+        *,
+        min_copies: float = 100,
+        min_events: float = 10,
+        rtol: float = 1e-6,
+        atol: float = 1e-6,
+    ):
+        super().__init__(model)
+        self.min_copies = min_copies
+        self.min_events = min_events
+        self.rtol = rtol
+        self.atol = atol
+
+        change = self.network.change
+        self._changed = [
+            change.indices[change.indptr[j] : change.indptr[j + 1]]
+            for j in range(self.network.n_reactions)
+        ]
+
+    def partition(self, a: NDArray, x: NDArray, interval: float) -> NDArray[np.bool_]:
+        """Boolean mask of the fast reactions."""
+        fast = a * interval >= self.min_events
+        for j in np.flatnonzero(fast):
+            fast[j] = np.all(x[self._changed[j]] >= self.min_copies)
+        return fast
+
+    def _run(self, x: NDArray, p: NDArray, time: NDArray, rng: np.random.Generator):
+        network = self.network
+        change = network.change
+        state = x[0].copy()
+        t = time[0]
+        # Integrated slow propensity and its threshold for the next slow reaction.
+        integral, threshold = 0.0, rng.exponential()
+
+        for k, t_end in enumerate(time[1:], start=1):
+            interval = t_end - time[k - 1]
+            while t < t_end:
+                a = network.propensities(t, state, p)
+                fast = self.partition(a, state, interval)
+
+                if not fast.any():
+                    # Propensities are constant until the next reaction.
+                    total = a.sum()
+                    if total <= 0:
+                        break
+                    tau = (threshold - integral) / total
+                    if t + tau > t_end:
+                        integral += total * (t_end - t)
+                        break
+                    t += tau
+                else:
+                    t, state, integral, fired = self._integrate(
+                        t, t_end, state, p, integral, threshold, fast
+                    )
+                    if not fired:
+                        break
+                    a = network.propensities(t, state, p)
+
+                a[fast] = 0
+                total = a.sum()
+                if total > 0:
+                    j = sample_reaction(a, total, rng.random())
+                    column = slice(change.indptr[j], change.indptr[j + 1])
+                    state[change.indices[column]] += change.data[column]
+                integral, threshold = 0.0, rng.exponential()
+
+            t = t_end
+            x[k] = state
+
+    def _integrate(
+        self,
+        t: float,
+        t_end: float,
+        state: NDArray,
+        p: NDArray,
+        integral: float,
+        threshold: float,
+        fast: NDArray[np.bool_],
+    ) -> tuple[float, NDArray, float, bool]:
+        """Integrate the fast reactions and the slow propensity
+        until t_end or until the next slow reaction."""
+        network = self.network
+        change = network.change[:, fast]
+        n = state.size
+
+        def rhs(t, z):
+            a = network.propensities(t, z[:n], p)
+            dz = np.empty_like(z)
+            dz[:n] = change @ a[fast]
+            dz[n] = a[~fast].sum()
+            return dz
+
+        def slow_reaction(t, z):
+            return z[n] - threshold
+
+        slow_reaction.terminal = True
+        slow_reaction.direction = 1
+
+        sol = solve_ivp(
+            rhs,
+            (t, t_end),
+            np.append(state, integral),
+            method="LSODA",
+            events=slow_reaction,
+            rtol=self.rtol,
+            atol=self.atol,
+        )
+        z = sol.y[:, -1]
+        return sol.t[-1], z[:n], z[n], sol.status == 1
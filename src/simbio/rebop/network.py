@@ -0,0 +1,273 @@
+"""
+simbio.rebop.network
+~~~~~~~~~~~~~~~~~~~~
+
+A compiled reaction network for stochastic simulation in copy numbers.
+
+Propensities follow the conventions of rebop:
+mass action reactions use the combinatorial form,
+e.g. ``k * A * (A - 1)`` for ``2 A -> B``,
+while other rate laws are evaluated as written.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import cached_property
+from types import ModuleType
+from typing import Any
+
+import numpy as np
+import pint
+import xarray as xr
+from numpy.typing import NDArray
+from poincare.reactions import MassAction
+from poincare.reactions.rebop import RebopSimulator
+from scipy import sparse
+from symbolite.core.symbolite_object import get_symbolite_info
+
+from .. import RateLaw, System, Variable
+from ..derivative import yield_leaves
+from ..stoichiometry import StoichiometryCompiler, compile_kernel, replace_algebraic
+
+
+@dataclass(frozen=True, kw_only=True)
+class ReactionNetwork:
+    """Stoichiometry and propensities of a reaction network.
+
+    ``change[i, j]`` is the net change of ``species[i]``
+    when ``reactions[j]`` fires.
+    For mass action reactions, ``reactants[i, j]`` is the order
+    of ``species[i]`` in the propensity of ``reactions[j]``.
+    """
+
+    species: Sequence[Variable]
+    reactions: Sequence[RateLaw]
+    change: sparse.csc_array
+    reactants: sparse.csc_array
+    mass_action: NDArray[np.bool_]
+    rate_constants: object | None
+    rate_laws: object | None
+    # Species indices on which each propensity depends.
+    depends_on: Sequence[NDArray[np.intp]]
+    # In vector form, the rate constant of each mass action reaction
+    # or the rate law of the others, to compile kernels for some reactions.
+    expressions: Sequence[Any] = ()
+    mapping: Mapping | None = None
+    libsl: ModuleType | None = None
+
+    @property
+    def n_reactions(self) -> int:
+        return len(self.reactions)
+
+    def propensities(
+        self,
+        t: float,
+        x: NDArray,
+        p: NDArray,
+        out: NDArray | None = None,
+    ) -> NDArray:
+        """Propensities of all reactions at copy numbers x."""
+        if out is None:
+            out = np.empty(self.n_reactions)
+        if self.rate_constants is not None:
+            c = self.rate_constants_at(t, x, p)
+            out[self.mass_action] = c * self.combinations(x)
+        if self.rate_laws is not None:
+            a = np.empty(np.count_nonzero(~self.mass_action))
+            self.rate_laws(t, x, p, a)
+            out[~self.mass_action] = a
+        return out
+
+    def kernel(
+        self, reactions: Sequence[int]
+    ) -> Callable[[float, NDArray, NDArray, NDArray], NDArray]:
+        """Compile ``func(t, x, p, out)``, which assigns the rate constant
+        (for mass action) or the propensity of each of the given reactions."""
+        return compile_kernel(
+            "a", [self.expressions[j] for j in reactions], self.mapping, self.libsl
+        )
+
+    def rate_constants_at(self, t: float, x: NDArray, p: NDArray) -> NDArray:
+        """Rate constants of the mass action reactions."""
+        c = np.empty(np.count_nonzero(self.mass_action))
+        if self.rate_constants is not None:
+            self.rate_constants(t, x, p, c)
+        return c
+
+    @cached_property
+    def _mass_action_reactants(self) -> sparse.coo_array:
+        return self.reactants[:, self.mass_action].tocoo()
+
+    def combinations(self, x: NDArray) -> NDArray:
+        """Number of distinct reactant combinations of each mass action reaction,
+        e.g. ``A * (A - 1)`` for ``2 A``."""
+        r = self._mass_action_reactants
+        h = np.ones(r.shape[1])
+        if r.nnz == 0:
+            return h
+        x = x[r.row]
+        term = np.maximum(x, 0)
+        for m in range(1, int(r.data.max())):
+            term *= np.where(r.data > m, np.maximum(x - m, 0), 1)
+        np.multiply.at(h, r.col, term)
+        return h
+
+    def dependency_graph(self) -> list[NDArray[np.intp]]:
+        """For each reaction, the reactions whose propensities change
+        when it fires (including itself, if affected)."""
+        affected: list[list[int]] = [[] for _ in range(len(self.species))]
+        for k, species in enumerate(self.depends_on):
+            for i in species:
+                affected[i].append(k)
+
+        change = self.change
+        graph = []
+        for j in range(self.n_reactions):
+            changed = change.indices[change.indptr[j] : change.indptr[j + 1]]
+            reactions = {k for i in changed for k in affected[i]}
+            graph.append(np.array(sorted(reactions), dtype=np.intp))
+        return graph
+
+
+def compile_network(model: System | type[System], /) -> ReactionNetwork:
+    """Compile the reactions of a model for stochastic simulation."""
+    compiler = StoichiometryCompiler(model)
+    st = compiler.stoichiometry
+    if not np.all(np.mod(st.matrix.data, 1) == 0):
+        raise NotImplementedError("Only integer stoichiometries are allowed")
+
+    index = {v: i for i, v in enumerate(st.species)}
+    mass_action = np.array(
+        [isinstance(r, MassAction) for r in st.reactions], dtype=bool
+    )
+    rows, cols, orders = [], [], []
+    for j, r in enumerate(st.reactions):
+        if not mass_action[j]:
+            continue
+        for reactant in r.reactants:
+            if not float(reactant.stoichiometry).is_integer():
+                raise NotImplementedError("Only integer stoichiometries are allowed")
+            rows.append(index[reactant.variable])
+            cols.append(j)
+            orders.append(reactant.stoichiometry)
+    reactants = sparse.csc_array(
+        (np.asarray(orders, dtype=float), (rows, cols)), shape=st.shape
+    )
+    reactants.sum_duplicates()
+
+    constants = replace_algebraic(
+        compiler.equation_maps,
+        {
+            ("rate_constant", j): r.rate
+            for j, r in enumerate(st.reactions)
+            if mass_action[j]
+        },
+    )
+    expressions = {
+        **{k: compiler.expressions[k] for k in compiler.keys["rate"]},
+        **constants,
+    }
+
+    def kernel(name: str, keys: list):
+        if len(keys) == 0:
+            return None
+        return compile_kernel(
+            name, [expressions[k] for k in keys], compiler.mapping, compiler.libsl
+        )
+
+    # Species on which each propensity depends.
+    y = get_symbolite_info(compiler.mapping["y"]).value
+    depends_on = []
+    for j in range(len(st.reactions)):
+        if mass_action[j]:
+            species = set(
+                reactants.indices[reactants.indptr[j] : reactants.indptr[j + 1]]
+            )
+            expr = expressions[("rate_constant", j)]
+        else:
+            species = set()
+            expr = expressions[("rate", j)]
+        species.update(
+            x[1] for x in yield_leaves(expr) if isinstance(x, tuple) and x[0] == y
+        )
+        depends_on.append(np.array(sorted(species), dtype=np.intp))
+
+    return ReactionNetwork(
+        species=st.species,
+        reactions=st.reactions,
+        change=sparse.csc_array(st.matrix.astype(np.int64)),
+        reactants=reactants,
+        mass_action=mass_action,
+        rate_constants=kernel(
+            "c", [("rate_constant", j) for j in np.flatnonzero(mass_action)]
+        ),
+        rate_laws=kernel("a", [("rate", j) for j in np.flatnonzero(~mass_action)]),
+        depends_on=depends_on,
+        expressions=[
+            expressions[("rate_constant", j) if mass_action[j] else ("rate", j)]
+            for j in range(len(st.reactions))
+        ],
+        mapping=compiler.mapping,
+        libsl=compiler.libsl,
+    )
+
+
+class NetworkSimulator(RebopSimulator):
+    """Base class of stochastic simulators on a compiled ReactionNetwork.
+
+    Subclasses implement ``_run``, which fills the copy numbers
+    at each of the sampled times.
+    """
+
+    def __init__(self, model: type[System], /):
+        super().__init__(model)
+        self.network = compile_network(model)
+
+    def solve(
+        self,
+        values: Mapping = {},
+        *,
+        upto_t: float,
+        n_points: int,
+        rng: np.random.Generator | int | None = None,
+    ) -> xr.Dataset:
+        """Simulate one trajectory sampled at ``n_points + 1`` equispaced times.
+
+        The output has the same layout as ``RebopSimulator.solve``.
+        """
+        problem = self._sim.create_problem(values)
+        for s in problem.scale:
+            if isinstance(s, pint.Quantity | pint.Unit):
+                raise TypeError("Stochastic simulation doesn't support units")
+
+        time = np.linspace(0, upto_t, n_points + 1)
+        x = np.empty((time.size, len(self.network.species)))
+        x[0] = np.asarray(problem.y, dtype=float).round()
+        self._run(x, np.asarray(problem.p), time, np.random.default_rng(rng))
+
+        names = [str(s) for s in self.network.species]
+        ds = xr.Dataset(
+            {name: ("time", x[:, i]) for i, name in enumerate(names)},
+            coords={"time": time},
+        )
+        return ds[sorted(names)]
+
+    def _run(
+        self,
+        x: NDArray,
+        p: NDArray,
+        time: NDArray,
+        rng: np.random.Generator,
+    ) -> None:
+        raise NotImplementedError
+
+
+def sample_reaction(a: NDArray, total: float, u: float) -> int:
+    """Index j such that ``sum(a[:j]) <= u * total < sum(a[:j + 1])``."""
+    j = int(np.searchsorted(np.cumsum(a), u * total, side="right"))
+    # Guard against rounding, never choosing a reaction with zero propensity.
+    while j >= len(a) or a[j] <= 0:
+        j -= 1
+    return j
@@ -0,0 +1,221 @@
+"""
+simbio.rebop.next_reaction
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Gibson and Bruck's next reaction method
+(J. Phys. Chem. A 104, 1876, 2000).
+
+The absolute firing time of every reaction is kept in an indexed
+priority queue. After each firing, only the propensities of the
+reactions that depend on the changed species are recomputed,
+and their firing times are rescaled instead of resampled.
+The cost per step is proportional to the number of dependent reactions
+times the logarithm of the number of reactions,
+instead of the total number of reactions,
+also for rate laws, which are evaluated by a kernel per firing reaction.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .. import System
+from ..io.graph.array import ProjectedGraph
+from .network import NetworkSimulator
+
+if TYPE_CHECKING:
+    from networkx import Graph
+
+
+class IndexedPriorityQueue:
+    """A binary min-heap of keys, indexed by item (0 to n - 1),
+    supporting updates of the key of any item in logarithmic time."""
+
+    def __init__(self, keys: NDArray):
+        self.keys = [float(k) for k in keys]
+        self.heap = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.position = [0] * len(self.heap)
+        for i, item in enumerate(self.heap):
+            self.position[item] = i
+
+    def top(self) -> tuple[int, float]:
+        """The item with the smallest key, and its key."""
+        item = self.heap[0]
+        return item, self.keys[item]
+
+    def update(self, item: int, key: float):
+        old = self.keys[item]
+        self.keys[item] = key
+        if key < old:
+            self._sift_up(self.position[item])
+        else:
+            self._sift_down(self.position[item])
+
+    def _swap(self, i: int, j: int):
+        heap, position = self.heap, self.position
+        heap[i], heap[j] = heap[j], heap[i]
+        position[heap[i]] = i
+        position[heap[j]] = j
+
+    def _sift_up(self, i: int):
+        keys, heap = self.keys, self.heap
+        while i > 0:
+            parent = (i - 1) // 2
+            if keys[heap[parent]] <= keys[heap[i]]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int):
+        keys, heap = self.keys, self.heap
+        n = len(heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and keys[heap[child]] < keys[heap[smallest]]:
+                    smallest = child
+            if smallest == i:
+                break
+            self._swap(i, smallest)
+            i = smallest
+
+
+class NextReactionSimulator(NetworkSimulator):
+    """Exact stochastic simulation with the next reaction method.
+
+    The dependency graph is computed from the propensities by default.
+    Alternatively, ``dependencies`` can be an undirected graph of reactions,
+    with nodes named as the reactions, where each reaction is connected
+    to every reaction whose propensity depends on a species it changes.
+    For mass action kinetics, reactions sharing a species suffice,
+    as in ``simbio.io.graph.array.graph(model).to_reaction_graph(directed=False)``.
+    """
+
+    def __init__(
+        self,
+        model: type[System],
+        /,
+        *,
+        dependencies: ProjectedGraph | Graph | None = None,
+    ):
+        super().__init__(model)
+        network = self.network
+        if dependencies is None:
+            self.dependencies = network.dependency_graph()
+        else:
+            if isinstance(dependencies, ProjectedGraph):
+                nodes = dependencies.nodes
+                dependencies = {
+                    node: [nodes[k] for k in dependencies.neighbors(i)]
+                    for i, node in enumerate(nodes)
+                }
+            index = {str(r): j for j, r in enumerate(network.reactions)}
+            self.dependencies = [
+                np.array(
+                    sorted({j, *(index[str(k)] for k in dependencies[str(r)])}),
+                    dtype=np.intp,
+                )
+                for j, r in enumerate(network.reactions)
+            ]
+
+        # Mass action propensities with constant rate constants
+        # are updated one at a time. The others are evaluated by a kernel
+        # per firing reaction, compiled on first use, for only the reactions
+        # it updates.
+        constant = np.zeros(network.n_reactions, dtype=bool)
+        reactants = network.reactants.tocsc()
+        self._reactants: list[list[tuple[int, int]]] = []
+        for j in range(network.n_reactions):
+            start, end = reactants.indptr[j], reactants.indptr[j + 1]
+            species = reactants.indices[start:end]
+            self._reactants.append(
+                list(
+                    zip(
+                        species.tolist(), reactants.data[start:end].astype(int).tolist()
+                    )
+                )
+            )
+            constant[j] = network.mass_action[j] and set(
+                network.depends_on[j].tolist()
+            ) <= set(species.tolist())
+        self._constant = constant
+        self._changes = [
+            list(
+                zip(
+                    network.change.indices[start:end].tolist(),
+                    network.change.data[start:end].tolist(),
+                )
+            )
+            for start, end in zip(network.change.indptr[:-1], network.change.indptr[1:])
+        ]
+        # The reaction that fires always draws a new firing time.
+        self._updated = [
+            np.union1d(d, [j]).astype(np.intp) for j, d in enumerate(self.dependencies)
+        ]
+        self._kernels: dict[int, tuple[list[int], Callable]] = {}
+
+    def _kernel(self, j: int) -> tuple[list[int], Callable]:
+        """The non-constant reactions updated when j fires, and their kernel."""
+        try:
+            return self._kernels[j]
+        except KeyError:
+            reactions = [m for m in self._updated[j].tolist() if not self._constant[m]]
+            self._kernels[j] = kernel = (reactions, self.network.kernel(reactions))
+            return kernel
+
+    def _run(self, x: NDArray, p: NDArray, time: NDArray, rng: np.random.Generator):
+        network = self.network
+        t = time[0]
+        state = x[0].copy()
+        a = network.propensities(t, state, p)
+        c = np.zeros(network.n_reactions)
+        c[network.mass_action] = network.rate_constants_at(t, state, p)
+        c, a = c.tolist(), a.tolist()
+
+        with np.errstate(divide="ignore"):
+            tau = t + rng.exponential(size=len(a)) / np.asarray(a)
+        queue = IndexedPriorityQueue(tau)
+
+        constant, reactants, changes = self._constant, self._reactants, self._changes
+        mass_action = network.mass_action.tolist()
+        updated = [d.tolist() for d in self._updated]
+        dynamic = [not all(constant[m] for m in d) for d in updated]
+        new: dict[int, float] = {}
+        k = 1
+        while k < len(time):
+            j, t_next = queue.top()
+            while k < len(time) and time[k] < t_next:
+                x[k] = state
+                k += 1
+            if k == len(time):
+                break
+
+            t = t_next
+            for i, change in changes[j]:
+                state[i] += change
+
+            if dynamic[j]:
+                dynamic_reactions, kernel = self._kernel(j)
+                values = np.empty(len(dynamic_reactions))
+                kernel(t, state, p, values)
+                new = dict(zip(dynamic_reactions, values.tolist()))
+            for m in updated[j]:
+                a_new = c[m] if constant[m] else new[m]
+                if mass_action[m]:
+                    for i, order in reactants[m]:
+                        for n in range(order):
+                            a_new *= max(state[i] - n, 0)
+
+                if m != j and a[m] > 0 and a_new > 0:
+                    key = t + (a[m] / a_new) * (queue.keys[m] - t)
+                elif a_new > 0:
+                    key = t + rng.exponential() / a_new
+                else:
+                    key = math.inf
+                a[m] = a_new
+                queue.update(m, key)
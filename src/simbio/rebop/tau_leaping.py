@@ -0,0 +1,201 @@
+"""
+simbio.rebop.tau_leaping
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Explicit tau-leaping with the step size selection of
+Cao, Gillespie and Petzold (J. Chem. Phys. 124, 044109, 2006).
+
+Each leap fires a Poisson number of every reaction,
+with the leap size bounded so that the relative change
+of each propensity is at most ``epsilon``.
+Critical reactions, which could exhaust one of their reactants
+in a few firings, fire at most once per leap.
+When the leap would be only a few times the expected time
+to the next reaction, it falls back to exact SSA steps.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy import sparse
+
+from .. import System
+from .network import NetworkSimulator, sample_reaction
+
+
+class TauLeapingSimulator(NetworkSimulator):
+    """Approximate stochastic simulation by explicit tau-leaping.
+
+    Parameters
+    ----------
+    epsilon
+        Bound on the relative change of propensities in each leap.
+    n_critical
+        A reaction is critical if it can fire fewer than
+        ``n_critical`` times before exhausting one of its reactants.
+    ssa_threshold, n_ssa
+        If the leap is shorter than ``ssa_threshold`` times
+        the expected time to the next reaction,
+        ``n_ssa`` exact SSA steps are performed instead.
+    """
+
+    def __init__(
+        self,
+        model: type[System],
+        /,
+        *,
+        epsilon: float = 0.03,
+        n_critical: int = 10,
+        ssa_threshold: float = 10,
+        n_ssa: int = 100,
+    ):
+        super().__init__(model)
+        self.epsilon = epsilon
+        self.n_critical = n_critical
+        self.ssa_threshold = ssa_threshold
+        self.n_ssa = n_ssa
+
+        change = self.network.change
+        self._change_squared = change.power(2)
+        consumption = sparse.csc_array(-change.minimum(0))
+        consumption.eliminate_zeros()
+        self._consumption = consumption
+        self._consumes = np.diff(consumption.indptr) > 0
+        self._rate_species = np.unique(
+            np.concatenate([np.empty(0, dtype=np.intp), *self.network.depends_on])
+        )
+        self._g = self._highest_order()
+
+    def _highest_order(self):
+        """Return g(x) for each species, from the highest order reaction
+        in which it is a reactant (Cao et al. 2006, eq. 27).
+
+        Reactions without mass action kinetics are treated as first order.
+        """
+        network = self.network
+        reactants = network.reactants.tocsc()
+        order = np.asarray(reactants.sum(axis=0)).ravel()
+        highest = np.zeros(len(network.species))
+        stoichiometry = np.zeros(len(network.species))
+        for j in np.flatnonzero(network.mass_action):
+            start, end = reactants.indptr[j], reactants.indptr[j + 1]
+            for i, s in zip(reactants.indices[start:end], reactants.data[start:end]):
+                if (order[j], s) > (highest[i], stoichiometry[i]):
+                    highest[i], stoichiometry[i] = order[j], s
+        highest = np.maximum(highest, 1)
+
+        def g(x: NDArray) -> NDArray:
+            x1 = np.maximum(x - 1, 1)
+            x2 = np.maximum(x - 2, 1)
+            result = highest.copy()
+            result = np.where((highest == 2) & (stoichiometry == 2), 2 + 1 / x1, result)
+            result = np.where(
+                (highest == 3) & (stoichiometry == 2), 1.5 * (2 + 1 / x1), result
+            )
+            result = np.where(
+                (highest == 3) & (stoichiometry == 3), 3 + 1 / x1 + 2 / x2, result
+            )
+            return result
+
+        return g
+
+    def _critical(self, a: NDArray, x: NDArray) -> NDArray[np.bool_]:
+        """Reactions that can fire fewer than n_critical times."""
+        c = self._consumption
+        firings = np.full(a.size, np.inf)
+        if c.nnz > 0:
+            remaining = np.floor(x[c.indices] / c.data)
+            starts = c.indptr[:-1][self._consumes]
+            firings[self._consumes] = np.minimum.reduceat(remaining, starts)
+        return (a > 0) & (firings < self.n_critical)
+
+    def _leap_size(self, a: NDArray, x: NDArray, critical: NDArray) -> float:
+        """Largest leap bounding the relative change of propensities
+        of the non-critical reactions (Cao et al. 2006, eq. 33).
+
+        The bound applies to every species on which a propensity depends,
+        not only reactants, so that reactions with zero propensity,
+        such as degradation of an absent species, also limit the leap.
+        """
+        species = self._rate_species
+        if species.size == 0:
+            return np.inf
+        a = np.where(critical, 0, a)
+        mu = (self.network.change @ a)[species]
+        sigma2 = (self._change_squared @ a)[species]
+        bound = np.maximum(self.epsilon * x[species] / self._g(x)[species], 1)
+        with np.errstate(divide="ignore"):
+            return min(
+                np.min(bound / np.abs(mu)),
+                np.min(bound**2 / sigma2),
+            )
+
+    def _run(self, x: NDArray, p: NDArray, time: NDArray, rng: np.random.Generator):
+        network = self.network
+        change = network.change
+        state = x[0].copy()
+        t = time[0]
+        a = np.empty(network.n_reactions)
+
+        for k, t_end in enumerate(time[1:], start=1):
+            while t < t_end:
+                network.propensities(t, state, p, a)
+                total = a.sum()
+                if total <= 0:
+                    break
+
+                critical = self._critical(a, state)
+                tau1 = self._leap_size(a, state, critical)
+                if tau1 < self.ssa_threshold / total:
+                    t = self._ssa(t, t_end, state, p, a, rng)
+                    continue
+
+                critical_total = a[critical].sum()
+                while True:
+                    tau2 = (
+                        rng.exponential(1 / critical_total)
+                        if critical_total > 0
+                        else np.inf
+                    )
+                    tau = min(tau1, tau2, t_end - t)
+                    firings = np.where(critical, 0, rng.poisson(a * tau))
+                    if tau == tau2:
+                        j = sample_reaction(
+                            np.where(critical, a, 0), critical_total, rng.random()
+                        )
+                        firings[j] += 1
+
+                    new = state + change @ firings
+                    if np.all(new >= 0):
+                        break
+                    tau1 = tau / 2
+
+                state = new
+                t += tau
+            t = t_end
+            x[k] = state
+
+    def _ssa(
+        self,
+        t: float,
+        t_end: float,
+        state: NDArray,
+        p: NDArray,
+        a: NDArray,
+        rng: np.random.Generator,
+    ) -> float:
+        """Perform up to n_ssa steps of Gillespie's direct method, in place."""
+        change = self.network.change
+        for _ in range(self.n_ssa):
+            total = a.sum()
+            if total <= 0:
+                return t_end
+            t += rng.exponential(1 / total)
+            if t >= t_end:
+                return t_end
+            j = sample_reaction(a, total, rng.random())
+            column = slice(change.indptr[j], change.indptr[j + 1])
+            state[change.indices[column]] += change.data[column]
+            self.network.propensities(t, state, p, a)
+        return t
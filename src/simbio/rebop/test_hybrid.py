@@ -0,0 +1,68 @@
+import numpy as np
+from pytest import importorskip
+
+importorskip("rebop")
+
+from .. import MassAction, RateLaw, Simulator, System, Variable, initial  # noqa: E402
+from ..reactions import Creation, Destruction  # noqa: E402
+from . import HybridSimulator  # noqa: E402
+from .network import compile_network  # noqa: E402
+
+
+class BirthDeath(System):
+    A: Variable = initial(default=0)
+    creation = Creation(A=A, rate=5)
+    destruction = Destruction(A=A, rate=1)
+
+
+class GeneExpression(System):
+    """Scarce mRNA translated into an abundant protein."""
+
+    M: Variable = initial(default=5)
+    X: Variable = initial(default=5000)
+    transcription = Creation(A=M, rate=1)
+    decay = Destruction(A=M, rate=0.2)
+    translation = MassAction(reactants=[M], products=[M, X], rate=1000)
+    degradation = Destruction(A=X, rate=1)
+
+
+def test_propensities():
+    class Model(System):
+        A: Variable = initial(default=10)
+        B: Variable = initial(default=3)
+        dimerization = MassAction(reactants=[2 * A], products=[B], rate=2)
+        saturation = RateLaw(reactants=[B], products=[A], rate_law=B / (1 + B))
+
+    network = compile_network(Model)
+    a = network.propensities(0, np.array([10.0, 3.0]), np.array([]))
+    np.testing.assert_allclose(a, [2 * 10 * 9, 3 / 4])
+    # dimerization changes A and B, on which both propensities depend
+    assert [list(x) for x in network.dependency_graph()] == [[0, 1], [0, 1]]
+
+
+def test_stochastic():
+    """Without fast reactions, it is an exact SSA."""
+    sim = HybridSimulator(BirthDeath)
+    rng = np.random.default_rng(0)
+    runs = [sim.solve(upto_t=5, n_points=5, rng=rng)["A"] for _ in range(300)]
+    result = np.mean(runs, axis=0)
+    expected = 5 * (1 - np.exp(-np.linspace(0, 5, 6)))
+    np.testing.assert_allclose(result, expected, atol=0.4)
+    np.testing.assert_array_equal(np.mod(runs, 1), 0)
+
+
+def test_hybrid():
+    sim = HybridSimulator(GeneExpression)
+    save_at = np.linspace(0, 10, 11)
+    rng = np.random.default_rng(0)
+    runs = [sim.solve(upto_t=10, n_points=10, rng=rng) for _ in range(50)]
+
+    # mRNA is simulated exactly, protein as an ODE
+    M = np.array([r["M"] for r in runs])
+    X = np.array([r["X"] for r in runs])
+    np.testing.assert_array_equal(np.mod(M, 1), 0)
+    assert np.any(np.mod(X, 1) != 0)
+
+    expected = Simulator(GeneExpression).solve(save_at=save_at)
+    np.testing.assert_allclose(M.mean(axis=0), expected["M"], rtol=0.2, atol=0.5)
+    np.testing.assert_allclose(X.mean(axis=0), expected["X"], rtol=0.1)
@@ -0,0 +1,103 @@
+import numpy as np
+from pytest import importorskip
+
+importorskip("rebop")
+
+from .. import MassAction, RateLaw, System, Variable, initial  # noqa: E402
+from ..io.graph.array import graph  # noqa: E402
+from ..reactions import Creation, Destruction  # noqa: E402
+from . import NextReactionSimulator  # noqa: E402
+from .next_reaction import IndexedPriorityQueue  # noqa: E402
+
+
+class BirthDeath(System):
+    A: Variable = initial(default=0)
+    creation = Creation(A=A, rate=100)
+    destruction = Destruction(A=A, rate=1)
+
+
+class Dimerization(System):
+    A: Variable = initial(default=100)
+    B: Variable = initial(default=0)
+    dimerization = MassAction(reactants=[2 * A], products=[B], rate=0.01)
+    dissociation = MassAction(reactants=[B], products=[2 * A], rate=0.1)
+
+
+def test_priority_queue():
+    rng = np.random.default_rng(0)
+    keys = rng.random(50)
+    queue = IndexedPriorityQueue(keys)
+    for _ in range(500):
+        item, key = queue.top()
+        assert item == np.argmin(keys)
+        assert key == keys.min()
+        i = rng.integers(keys.size)
+        keys[i] = rng.choice([rng.random(), np.inf])
+        queue.update(i, keys[i])
+
+
+def test_birth_death():
+    sim = NextReactionSimulator(BirthDeath)
+    rng = np.random.default_rng(0)
+    runs = np.array([sim.solve(upto_t=5, n_points=5, rng=rng)["A"] for _ in range(200)])
+    expected = 100 * (1 - np.exp(-np.linspace(0, 5, 6)))
+    np.testing.assert_allclose(runs.mean(axis=0), expected, rtol=0.05, atol=1)
+    # the stationary distribution is Poisson
+    np.testing.assert_allclose(runs[:, -1].var(), 100, rtol=0.3)
+
+
+def test_rate_law():
+    """Propensities that are not mass action are updated too."""
+
+    class Model(System):
+        A: Variable = initial(default=0)
+        E: Variable = initial(default=10)
+        creation = RateLaw(reactants=[], products=[A], rate_law=10 * E)
+        destruction = Destruction(A=A, rate=1)
+        degradation = Destruction(A=E, rate=1)
+
+    sim = NextReactionSimulator(Model)
+    rng = np.random.default_rng(0)
+    runs = [sim.solve(upto_t=2, n_points=4, rng=rng) for _ in range(300)]
+    t = runs[0]["time"].values
+    E = np.mean([r["E"] for r in runs], axis=0)
+    A = np.mean([r["A"] for r in runs], axis=0)
+    np.testing.assert_allclose(E, 10 * np.exp(-t), atol=0.5)
+    # dA/dt = 100 exp(-t) - A
+    np.testing.assert_allclose(A, 100 * t * np.exp(-t), rtol=0.05, atol=1)
+
+    # Only the rate laws that depend on the changed species are evaluated.
+    names = [str(r) for r in sim.network.reactions]
+    reactions, _ = sim._kernel(names.index("degradation.reaction"))
+    assert [names[m] for m in reactions] == ["creation"]
+    assert sim._kernel(names.index("destruction.reaction"))[0] == []
+
+
+def test_dependencies():
+    nx = importorskip("networkx")
+
+    # The reaction graph: reactions are connected if they share a species.
+    g = nx.Graph()
+    g.add_edge(str(Dimerization.dimerization), str(Dimerization.dissociation))
+
+    mean = {}
+    simulators = {
+        "default": NextReactionSimulator(Dimerization),
+        "graph": NextReactionSimulator(Dimerization, dependencies=g),
+        "array": NextReactionSimulator(
+            Dimerization,
+            dependencies=graph(Dimerization).to_reaction_graph(directed=False),
+        ),
+    }
+    for sim in simulators.values():
+        for d, expected in zip(sim.dependencies, simulators["default"].dependencies):
+            np.testing.assert_array_equal(d, expected)
+
+    for name, sim in simulators.items():
+        rng = np.random.default_rng(0)
+        runs = [sim.solve(upto_t=10, n_points=2, rng=rng) for _ in range(100)]
+        for r in runs:
+            np.testing.assert_array_equal(r["A"] + 2 * r["B"], 100)
+        mean[name] = np.mean([r["A"][-1] for r in runs])
+
+    assert mean["default"] == mean["graph"] == mean["array"]
@@ -0,0 +1,53 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from pytest import importorskip, mark, raises
+
+importorskip("rebop")
+
+from .. import System, Variable, initial  # noqa: E402
+from ..reactions import Creation, Destruction  # noqa: E402
+from . import ParallelRebopSimulator  # noqa: E402
+
+
+class Model(System):
+    A: Variable = initial(default=5)
+    B: Variable = initial(default=0)
+    creation = Creation(A=A, rate=10)
+    destruction = Destruction(A=A, rate=1)
+    creation_b = Creation(A=B, rate=2)
+
+
+def solve(max_workers: int, seed: int, pool=ThreadPoolExecutor):
+    sim = ParallelRebopSimulator(Model, chunk_size=3)
+    with pool(max_workers) as executor:
+        return sim.solve(
+            upto_t=5, n_points=10, n_replicates=10, seed=seed, executor=executor
+        )
+
+
+def test_shape():
+    result = solve(2, seed=0)
+    assert result.dims == ("replicate", "time", "variable")
+    assert result.shape == (10, 11, 2)
+    assert list(result["variable"].values) == ["A", "B"]
+    np.testing.assert_array_equal(result.isel(time=0).sel(variable="A"), 5)
+
+
+def test_deterministic_seeding():
+    result = solve(1, seed=42)
+    np.testing.assert_array_equal(result, solve(4, seed=42))
+    assert not np.array_equal(result, solve(1, seed=43))
+    # replicates are independent
+    assert not np.array_equal(result[0], result[1])
+
+
+def test_process_pool():
+    result = solve(2, seed=42, pool=ProcessPoolExecutor)
+    np.testing.assert_array_equal(result, solve(1, seed=42))
+
+
+@mark.parametrize("chunk_size", [0, -1])
+def test_invalid_chunk_size(chunk_size):
+    with raises(ValueError, match="chunk_size"):
+        ParallelRebopSimulator(Model, chunk_size=chunk_size)
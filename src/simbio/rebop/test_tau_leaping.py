@@ -0,0 +1,55 @@
+import numpy as np
+from pytest import importorskip
+
+importorskip("rebop")
+
+from .. import MassAction, System, Variable, initial  # noqa: E402
+from ..reactions import Creation, Destruction  # noqa: E402
+from . import TauLeapingSimulator  # noqa: E402
+
+
+class BirthDeath(System):
+    A: Variable = initial(default=0)
+    creation = Creation(A=A, rate=1000)
+    destruction = Destruction(A=A, rate=1)
+
+
+class Dimerization(System):
+    A: Variable = initial(default=1000)
+    B: Variable = initial(default=0)
+    dimerization = MassAction(reactants=[2 * A], products=[B], rate=0.001)
+    dissociation = MassAction(reactants=[B], products=[2 * A], rate=0.1)
+
+
+def test_birth_death():
+    sim = TauLeapingSimulator(BirthDeath)
+    rng = np.random.default_rng(0)
+    runs = np.array([sim.solve(upto_t=5, n_points=5, rng=rng)["A"] for _ in range(100)])
+    expected = 1000 * (1 - np.exp(-np.linspace(0, 5, 6)))
+    np.testing.assert_allclose(runs.mean(axis=0), expected, rtol=0.02, atol=1)
+    # the stationary distribution is Poisson
+    np.testing.assert_allclose(runs[:, -1].var(), 1000, rtol=0.4)
+    np.testing.assert_array_equal(np.mod(runs, 1), 0)
+
+
+def test_critical_reactions():
+    """Small populations are simulated exactly, and never become negative."""
+
+    class Model(System):
+        A: Variable = initial(default=5)
+        B: Variable = initial(default=0)
+        conversion = MassAction(reactants=[A], products=[B], rate=1)
+
+    sim = TauLeapingSimulator(Model)
+    rng = np.random.default_rng(0)
+    runs = np.array([sim.solve(upto_t=2, n_points=2, rng=rng)["A"] for _ in range(300)])
+    assert np.all(runs >= 0)
+    np.testing.assert_allclose(runs.mean(axis=0), 5 * np.exp(-np.arange(3)), atol=0.3)
+
+
+def test_conservation():
+    sim = TauLeapingSimulator(Dimerization)
+    result = sim.solve(upto_t=10, n_points=10, rng=0)
+    np.testing.assert_array_equal(result["A"] + 2 * result["B"], 1000)
+    assert np.all(result["A"] >= 0)
+    assert np.all(result["B"] >= 0)
@@ -0,0 +1,319 @@
+"""
+simbio.sensitivity
+~~~~~~~~~~~~~~~~~~
+
+Local sensitivities of trajectories with respect to parameters
+and initial conditions.
+
+Forward sensitivities ``s = dy/dθ`` are integrated together with the model,
+``ds/dt = J s + f_p @ dp/dθ``, and cost one extra ODE per parameter.
+The adjoint method computes the gradient of a scalar function
+of the sampled trajectory, e.g. a loss, with one backward integration
+whose cost does not depend on the number of parameters.
+
+Both use the analytic sparse Jacobians ``J = df/dy`` and ``f_p = df/dp``.
+Forward sensitivities are integrated with BDF by default,
+which keeps the Jacobian of the extended system sparse.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from numbers import Number
+
+import numpy as np
+import pint
+import xarray as xr
+from numpy.typing import ArrayLike, NDArray
+from poincare.simulator import Components, Problem
+from poincare.types import Initial
+from scipy import sparse
+from scipy.integrate import solve_ivp
+
+from . import System
+from .ensemble import has_dependents
+from .stoichiometry import SparseSimulator, StoichiometricJacobian
+
+
+class _SensitivitySimulator(SparseSimulator):
+    # Integration method of solve_ivp, if not given.
+    default_method: str = "LSODA"
+
+    def __init__(
+        self,
+        system: System | type[System],
+        /,
+        *,
+        cse: bool = True,
+        method: str | None = None,
+        rtol: float = 1e-6,
+        atol: float = 1e-9,
+    ):
+        super().__init__(system, cse=cse, jacobian=True)
+        self.parameter_jacobian: StoichiometricJacobian = (
+            self.compiler.parameter_jacobian()
+        )
+        self.method = self.default_method if method is None else method
+        self.rtol = rtol
+        self.atol = atol
+
+    def input_jacobian(
+        self,
+        parameters: Sequence[Components],
+        values: Mapping[Components, Initial] = {},
+    ) -> tuple[Problem, NDArray, NDArray]:
+        """Create a Problem and compute the derivatives of its
+        initial state ``dy0/dθ`` and parameters ``dp/dθ``.
+
+        Components that other values depend on are differentiated
+        by central finite differences of ``create_problem``,
+        which is exact up to rounding for linear dependencies.
+        """
+        problem = self.create_problem(values)
+        for s in problem.scale:
+            if isinstance(s, pint.Quantity | pint.Unit):
+                raise TypeError("Sensitivity analysis doesn't support units")
+
+        var_index = {v: i for i, v in enumerate(self.compiled.variables)}
+        par_index = {v: i for i, v in enumerate(self.compiled.parameters)}
+        dy0 = np.zeros((problem.y.size, len(parameters)))
+        dp = np.zeros((problem.p.size, len(parameters)))
+        for j, c in enumerate(parameters):
+            direct = not has_dependents(self.compiled, c)
+            if c in var_index and direct:
+                dy0[var_index[c], j] = 1
+                continue
+            elif c in par_index and direct:
+                dp[par_index[c], j] = 1
+                continue
+            elif c in var_index:
+                value = problem.y[var_index[c]]
+            elif c in par_index:
+                value = problem.p[par_index[c]]
+            else:
+                value = values.get(c, self.compiled.mapper.get(c))
+            if not isinstance(value, Number):
+                raise TypeError(f"cannot differentiate with respect to {c}")
+
+            h = 1e-6 * max(abs(value), 1)
+            plus = self.create_problem({**values, c: value + h})
+            minus = self.create_problem({**values, c: value - h})
+            dy0[:, j] = (plus.y - minus.y) / (2 * h)
+            dp[:, j] = (plus.p - minus.p) / (2 * h)
+        return problem, dy0, dp
+
+    def _solve_ivp(self, fun, t_span, y0, jac, **kwargs):
+        if self.method == "LSODA":
+            # As in simbio.solvers.LSODA, it requires a dense Jacobian.
+            sparse_jac = jac
+
+            def jac(t, y):
+                return sparse_jac(t, y).toarray()
+
+        sol = solve_ivp(
+            fun,
+            t_span,
+            y0,
+            method=self.method,
+            jac=jac,
+            rtol=self.rtol,
+            atol=self.atol,
+            **kwargs,
+        )
+        if not sol.success:
+            raise RuntimeError(sol.message)
+        return sol
+
+    def _variables(self) -> list[str]:
+        return [str(v) for v in self.compiled.variables]
+
+
+class ForwardSensitivity(_SensitivitySimulator):
+    """Forward sensitivities ``dy/dθ`` of all variables.
+
+    ``ForwardSensitivity(Model).solve([Model.k, Model.A], save_at=t)``
+    returns a Dataset with the trajectory ``y`` (time, variable)
+    and its ``sensitivity`` (time, variable, parameter).
+    Parameters can be any component with a numeric value,
+    including initial conditions.
+
+    Suited for a few parameters; for many, see ``AdjointSensitivity``.
+    The default method, BDF, uses the sparse Jacobian of the extended system,
+    which LSODA would evaluate as a dense matrix.
+    """
+
+    default_method = "BDF"
+
+    def solve(
+        self,
+        parameters: Sequence[Components],
+        values: Mapping[Components, Initial] = {},
+        /,
+        *,
+        save_at: ArrayLike,
+    ) -> xr.Dataset:
+        save_at = np.asarray(save_at, dtype=float)
+        problem, dy0, dp = self.input_jacobian(parameters, values)
+        rhs, p = problem.rhs, problem.p
+        n, m = problem.y.size, len(parameters)
+        jacobian = rhs.jacobian
+        parameter_jacobian = self.parameter_jacobian
+
+        def fun(t, z):
+            y = z[:n]
+            # s is stored by columns, one parameter after the other.
+            s = z[n:].reshape(m, n).T
+            dz = np.empty_like(z)
+            rhs(t, y, p, dz[:n])
+            ds = jacobian(t, y, p) @ s + parameter_jacobian(t, y, p) @ dp
+            dz[n:] = ds.T.ravel()
+            return dz
+
+        def jac(t, z):
+            # The coupling of s to y, through second derivatives, is dropped.
+            # It only affects the convergence of Newton iterations in the solver.
+            return sparse.kron(sparse.eye_array(m + 1), jacobian(t, z[:n], p)).tocsc()
+
+        z0 = np.concatenate([problem.y, dy0.T.ravel()])
+        sol = self._solve_ivp(fun, (problem.t[0], save_at[-1]), z0, jac, t_eval=save_at)
+        y = sol.y[:n].T
+        s = sol.y[n:].T.reshape(-1, m, n).transpose(0, 2, 1)
+        return xr.Dataset(
+            {
+                "y": (("time", "variable"), y),
+                "sensitivity": (("time", "variable", "parameter"), s),
+            },
+            coords={
+                "time": sol.t,
+                "variable": self._variables(),
+                "parameter": [str(c) for c in parameters],
+            },
+        )
+
+
+class AdjointSensitivity(_SensitivitySimulator):
+    """Gradients of a scalar function of the sampled trajectory
+    by the adjoint method.
+
+    ``loss_gradient`` receives the trajectory at ``save_at``,
+    an array (time, variable), and returns the derivative of the loss
+    with respect to it, with the same shape.
+    For instance, for ``0.5 * sum((y - data)**2)``, it is ``y - data``.
+
+    ``solve`` returns a Dataset with the trajectory ``y`` (time, variable)
+    and the ``gradient`` of the loss (parameter).
+    The cost of the backward integration does not depend
+    on the number of parameters.
+    """
+
+    def solve(
+        self,
+        parameters: Sequence[Components],
+        values: Mapping[Components, Initial] = {},
+        /,
+        *,
+        save_at: ArrayLike,
+        loss_gradient: Callable[[NDArray], ArrayLike],
+    ) -> xr.Dataset:
+        problem, dy0, dp = self.input_jacobian(parameters, values)
+        return self.solve_problem(
+            problem,
+            dy0,
+            dp,
+            parameters=parameters,
+            save_at=save_at,
+            loss_gradient=loss_gradient,
+        )
+
+    def solve_problem(
+        self,
+        problem: Problem,
+        dy0: NDArray,
+        dp: NDArray,
+        /,
+        *,
+        parameters: Sequence[Components],
+        save_at: ArrayLike,
+        loss_gradient: Callable[[NDArray], ArrayLike],
+    ) -> xr.Dataset:
+        """As solve, for a Problem and its input Jacobians
+        from ``input_jacobian``, which can be reused across calls."""
+        save_at = np.asarray(save_at, dtype=float)
+        rhs, p = problem.rhs, problem.p
+        n = problem.y.size
+        t0 = problem.t[0]
+        jacobian = rhs.jacobian
+        parameter_jacobian = self.parameter_jacobian
+
+        def fun(t, y):
+            return rhs(t, y, p, np.empty_like(y))
+
+        def jac(t, y):
+            return jacobian(t, y, p)
+
+        forward = self._solve_ivp(
+            fun, (t0, save_at[-1]), problem.y, jac, t_eval=save_at, dense_output=True
+        )
+        y = forward.y.T
+        g = np.asarray(loss_gradient(y), dtype=float)
+        if g.shape != y.shape:
+            raise ValueError(
+                f"loss_gradient must return an array of shape {y.shape}, got {g.shape}"
+            )
+
+        # Backward in time:
+        #   dλ/dt = -J.T @ λ, with jumps λ += g[k] at each sampled time,
+        #   dμ/dt = -f_p.T @ λ, so that μ(t0) is the integral of f_p.T @ λ.
+        n_p = p.size
+
+        def backward(t, z):
+            y = forward.sol(t)
+            lam = z[:n]
+            dz = np.empty_like(z)
+            dz[:n] = -jacobian.vjp(t, y, p, lam)
+            dz[n:] = -parameter_jacobian.vjp(t, y, p, lam)
+            return dz
+
+        def backward_jac(t, z):
+            y = forward.sol(t)
+            return sparse.block_array(
+                [
+                    [-jacobian(t, y, p).T, None],
+                    [-parameter_jacobian(t, y, p).T, sparse.csr_array((n_p, n_p))],
+                ]
+            ).tocsc()
+
+        z = np.zeros(n + n_p)
+        times = save_at if save_at[0] == t0 else np.append(t0, save_at)
+        g = g if save_at[0] == t0 else np.vstack([np.zeros(n), g])
+        z[:n] = g[-1]
+        # Each interval restarts the solver, from the last step size.
+        step = None
+        for k in range(len(times) - 1, 0, -1):
+            interval = times[k] - times[k - 1]
+            if interval > 0:
+                sol = self._solve_ivp(
+                    backward,
+                    (times[k], times[k - 1]),
+                    z,
+                    backward_jac,
+                    first_step=None if step is None else min(step, interval),
+                )
+                z = sol.y[:, -1]
+                if sol.t.size > 1:
+                    step = abs(sol.t[-1] - sol.t[-2])
+            z[:n] += g[k - 1]
+
+        lam, mu = z[:n], z[n:]
+        gradient = dy0.T @ lam + dp.T @ mu
+        return xr.Dataset(
+            {
+                "y": (("time", "variable"), y),
+                "gradient": ("parameter", gradient),
+            },
+            coords={
+                "time": forward.t,
+                "variable": self._variables(),
+                "parameter": [str(c) for c in parameters],
+            },
+        )
@@ -0,0 +1,102 @@
+"""
+simbio.solvers
+~~~~~~~~~~~~~~
+
+Implicit solvers that use the analytic Jacobian of the right-hand side,
+when available (see ``SparseSimulator(..., jacobian=True)``).
+
+Otherwise, they fall back to poincare's finite-difference Jacobians.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from numpy.typing import NDArray
+from poincare import solvers
+from poincare.simulator import Problem
+from poincare.solvers import _solve_ivp_scipy
+from scipy import integrate
+from scipy_events import Events
+
+__all__ = ["BDF", "LSODA", "Radau"]
+
+
+def _jacobian(problem: Problem, *, dense: bool = False):
+    jac = getattr(problem.rhs, "jacobian", None)
+    if jac is None or not dense:
+        return jac
+
+    def dense_jac(t, y, p, *args):
+        return jac(t, y, p).toarray()
+
+    return dense_jac
+
+
+class _WithJacobian:
+    def __call__(
+        self,
+        problem: Problem,
+        *,
+        save_at: NDArray | None = None,
+        events: Sequence[Events] = (),
+    ):
+        jac = _jacobian(problem)
+        if jac is None:
+            return super().__call__(problem, save_at=save_at, events=events)
+
+        return _solve_ivp_scipy(
+            problem,
+            self._solver_class,
+            options={
+                "rtol": self.rtol,
+                "atol": self.atol,
+                "first_step": self.first_step,
+                "max_step": self.max_step,
+                "jac": jac,
+            },
+            save_at=save_at,
+            events=events,
+        )
+
+
+class BDF(_WithJacobian, solvers.BDF, solver=integrate.BDF):
+    """BDF with an analytic sparse Jacobian."""
+
+
+class Radau(_WithJacobian, solvers.Radau, solver=integrate.Radau):
+    """Radau with an analytic sparse Jacobian."""
+
+
+class LSODA(solvers.LSODA, solver=integrate.LSODA):
+    """LSODA with an analytic Jacobian, evaluated as a dense matrix.
+
+    With a Jacobian, it always uses SciPy's LSODA,
+    as odeint and numbalsoda are not supported.
+    """
+
+    def __call__(
+        self,
+        problem: Problem,
+        *,
+        save_at: NDArray | None = None,
+        events: Sequence[Events] = (),
+    ):
+        jac = _jacobian(problem, dense=True)
+        if jac is None or self.implementation not in (None, "LSODA"):
+            return super().__call__(problem, save_at=save_at, events=events)
+
+        return _solve_ivp_scipy(
+            problem,
+            self._solver_class,
+            options={
+                "rtol": self.rtol,
+                "atol": self.atol,
+                "first_step": self.first_step,
+                "max_step": self.max_step,
+                "min_step": self.min_step,
+                "jac": jac,
+            },
+            save_at=save_at,
+            events=events,
+        )
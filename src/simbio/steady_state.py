@@ -0,0 +1,291 @@
+"""
+simbio.steady_state
+~~~~~~~~~~~~~~~~~~~
+
+Find steady states directly, instead of integrating for a long time.
+
+Fixed points are found by damped Newton iteration on the right-hand side,
+with the analytic sparse Jacobian. Conserved moieties are eliminated,
+as in ``ReducedSimulator``, so that the Newton system is not singular
+and the conserved totals are those of the initial conditions.
+When Newton fails, the model is integrated for increasingly long times,
+retrying Newton from each end point.
+
+Continuation over a parameter warm-starts each point
+from a linear extrapolation of the previous ones.
+"""
+
+from __future__ import annotations
+
+import warnings
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import numpy as np
+import pint
+import xarray as xr
+from numpy.typing import ArrayLike, NDArray
+from poincare.simulator import Components, Problem
+from poincare.types import Initial
+from scipy import sparse
+from scipy.integrate import solve_ivp
+from scipy.sparse.linalg import MatrixRankWarning, spsolve
+
+from . import System
+from .conservation import ReducedRHS, ReducedSimulator
+
+
+@dataclass(frozen=True, kw_only=True)
+class SteadyState:
+    """A steady state of a model.
+
+    ``y`` is the full state, in the order of ``compiled.variables``,
+    and ``z`` the independent species, after eliminating conserved moieties.
+    ``time`` is how long the model was integrated before Newton converged,
+    0 if it converged from the initial guess.
+    """
+
+    y: NDArray
+    z: NDArray
+    residual: float
+    iterations: int
+    time: float
+
+
+class SteadyStateSolver(ReducedSimulator):
+    """Find steady states of a model by Newton iteration.
+
+    A state is steady if ``|dy/dt| <= atol + rtol * |y|`` for every variable.
+    Steps that would make a species negative are damped.
+    The right-hand side is evaluated at the initial time,
+    so models should not depend explicitly on time.
+    """
+
+    def __init__(
+        self,
+        system: System | type[System],
+        /,
+        *,
+        transform=None,
+        cse: bool = True,
+        rtol: float = 1e-8,
+        atol: float = 1e-10,
+        max_iter: int = 50,
+        t_max: float = 1e8,
+    ):
+        super().__init__(system, transform=transform, cse=cse, jacobian=True)
+        self.rtol = rtol
+        self.atol = atol
+        self.max_iter = max_iter
+        self.t_max = t_max
+
+        index = {v: i for i, v in enumerate(self.compiled.variables)}
+        self._species = np.array(
+            sorted(index[s] for s in self.stoichiometry.species if s in index),
+            dtype=np.intp,
+        )
+
+        # Variables that never change, such as catalysts that are not produced
+        # or consumed, have zero rows in the Jacobian. Newton keeps them fixed.
+        rhs = self.compiled.func
+        changing = np.zeros(self._size, dtype=bool)
+        for matrix in (rhs.matrix, *rhs.scaled):
+            changing |= np.diff(sparse.csr_array(matrix).indptr) > 0
+        changing[rhs.extra_index] = True
+        fixed = np.zeros(self._size)
+        fixed[~changing] = 1
+        self._fixed = sparse.diags_array(fixed[self._independent]).tocsc()
+
+    def _converged(self, f: NDArray, z: NDArray) -> bool:
+        return bool(np.all(np.abs(f) <= self.atol + self.rtol * np.abs(z)))
+
+    def _admissible(self, rhs: ReducedRHS, z: NDArray) -> bool:
+        y = rhs.reconstruct(z)
+        return bool(np.all(y[self._species] >= -self.atol))
+
+    def newton(
+        self, rhs: ReducedRHS, t: float, z: NDArray, p: NDArray
+    ) -> tuple[NDArray, NDArray, int, bool]:
+        """Damped Newton iteration from z.
+
+        Returns the last iterate, its residual, the number of iterations
+        and whether it converged.
+        """
+        z = np.array(z, dtype=float)
+        f = rhs(t, z, p, np.empty_like(z))
+        for iteration in range(self.max_iter + 1):
+            if not np.all(np.isfinite(f)):
+                break
+            if self._converged(f, z):
+                return z, f, iteration, True
+            if iteration == self.max_iter:
+                break
+
+            jac = sparse.csc_array(rhs.jacobian(t, z, p)) + self._fixed
+            with np.errstate(all="ignore"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", MatrixRankWarning)
+                step = np.atleast_1d(spsolve(jac, -f))
+            if not np.all(np.isfinite(step)):
+                break
+
+            # Backtrack until the residual decreases (Armijo condition).
+            norm = np.linalg.norm(f)
+            damping = 1.0
+            while damping >= 1e-4:
+                z_new = z + damping * step
+                if self._admissible(rhs, z_new):
+                    f_new = rhs(t, z_new, p, np.empty_like(z))
+                    if np.linalg.norm(f_new) <= (1 - 1e-4 * damping) * norm:
+                        break
+                damping /= 2
+            else:
+                break
+            z, f = z_new, f_new
+
+        return z, f, iteration, False
+
+    def _integrate(self, rhs: ReducedRHS, t: float, z: NDArray, p: NDArray):
+        """Integrate for increasingly long times, yielding each end point."""
+
+        def fun(t, z):
+            return rhs(t, z, p, np.empty_like(z))
+
+        def jac(t, z):
+            return rhs.jacobian(t, z, p)
+
+        elapsed, interval = 0.0, 1.0
+        while elapsed < self.t_max:
+            interval = min(interval, self.t_max - elapsed)
+            sol = solve_ivp(
+                fun,
+                (t + elapsed, t + elapsed + interval),
+                z,
+                method="BDF",
+                jac=jac,
+                rtol=1e-6,
+                atol=self.atol,
+            )
+            if not sol.success:
+                return
+            elapsed += interval
+            interval *= 10
+            z = sol.y[:, -1]
+            yield elapsed, z
+
+    def find(self, problem: Problem, /, *, guess: NDArray | None = None) -> SteadyState:
+        """Find a steady state of a Problem created by ``create_problem``.
+
+        Newton starts from ``guess``, if given, or from the initial state.
+        Integration, if Newton fails, always starts from the initial state.
+        """
+        rhs: ReducedRHS = problem.rhs
+        t = problem.t[0]
+        p = problem.p
+        for z in (problem.y,) if guess is None else (guess, problem.y):
+            z, f, iterations, converged = self.newton(rhs, t, z, p)
+            if converged:
+                return self._result(rhs, z, f, iterations, 0.0)
+
+        for elapsed, z in self._integrate(rhs, t, problem.y, p):
+            z, f, iterations, converged = self.newton(rhs, t, z, p)
+            if converged:
+                return self._result(rhs, z, f, iterations, elapsed)
+
+        raise RuntimeError(
+            f"steady state not found after integrating up to t={self.t_max}"
+        )
+
+    def _result(self, rhs: ReducedRHS, z, f, iterations: int, time: float):
+        return SteadyState(
+            y=rhs.reconstruct(z),
+            z=z,
+            residual=float(np.max(np.abs(f), initial=0)),
+            iterations=iterations,
+            time=time,
+        )
+
+    def _output(self, problem: Problem, state: SteadyState) -> dict[str, float]:
+        for s in problem.scale:
+            if isinstance(s, pint.Quantity | pint.Unit):
+                raise TypeError("Steady state solver doesn't support units")
+        out = np.empty(len(problem.scale))
+        problem.transform(problem.t[0], state.z, problem.p, out)
+        return {
+            str(k): x * s
+            for k, s, x in zip(self.transform.output.keys(), problem.scale, out)
+        }
+
+    def solve(
+        self,
+        values: Mapping[Components, Initial] = {},
+        *,
+        guess: Mapping[Components, float] = {},
+    ) -> xr.Dataset:
+        """Steady state starting from the given values.
+
+        Initial values also fix the conserved totals.
+        ``guess`` optionally overrides the starting point of Newton iteration,
+        without changing the conserved totals.
+        """
+        problem = self.create_problem(values)
+        z = None
+        if len(guess) > 0:
+            y = problem.rhs.reconstruct(problem.y)
+            index = {v: i for i, v in enumerate(self.compiled.variables)}
+            for k, v in guess.items():
+                y[index[k]] = v
+            z = y[self._independent]
+        state = self.find(problem, guess=z)
+        return xr.Dataset(self._output(problem, state))
+
+    def continuation(
+        self,
+        component: Components,
+        values: ArrayLike,
+        /,
+        *,
+        common: Mapping[Components, Initial] = {},
+    ) -> xr.Dataset:
+        """Steady states along the given values of a component,
+        e.g. a dose-response curve.
+
+        Each point starts Newton iteration from a linear extrapolation
+        of the previous two, following a branch of steady states,
+        or from the previous solution if both values are equal.
+        """
+        values = np.asarray(values, dtype=float)
+        if values.ndim != 1:
+            raise ValueError("values must be one-dimensional")
+
+        rows = []
+        previous: list[tuple[float, NDArray]] = []
+        for value in values:
+            problem = self.create_problem({**common, component: value})
+            guess = None
+            if len(previous) == 1:
+                guess = previous[-1][1]
+            elif len(previous) == 2:
+                (v0, z0), (v1, z1) = previous
+                if v1 == v0:
+                    guess = z1
+                else:
+                    guess = z1 + (z1 - z0) * ((value - v1) / (v1 - v0))
+            state = self.find(problem, guess=guess)
+            rows.append(self._output(problem, state))
+            previous = [*previous[-1:], (value, state.z)]
+
+        name = str(component)
+        return xr.Dataset(
+            {k: (name, [row[k] for row in rows]) for k in rows[0]} if rows else {},
+            coords={name: values},
+        )
+
+
+def steady_state(
+    model: System | type[System],
+    values: Mapping[Components, Initial] = {},
+    /,
+    **kwargs,
+) -> xr.Dataset:
+    """Steady state of a model, see ``SteadyStateSolver``."""
+    return SteadyStateSolver(model, **kwargs).solve(values)
@@ -0,0 +1,607 @@
+"""
+simbio.stoichiometry
+~~~~~~~~~~~~~~~~~~~~
+
+Matrix form of a reaction network.
+
+Instead of building one symbolic expression per species,
+the right-hand side is evaluated as ``S @ v(t, y, p)``,
+where ``S`` is a sparse stoichiometry matrix
+and ``v`` is a vector of rate-law kernels.
+"""
+
+from __future__ import annotations
+
+import warnings
+from collections import defaultdict
+from collections.abc import Callable, Hashable, Mapping, Sequence
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from typing import Any
+
+import numpy as np
+import pint
+import symbolite.abstract as libabstract
+from numpy.typing import ArrayLike, NDArray
+from poincare import solvers
+from poincare._node import Node
+from poincare._utils import eval_content
+from poincare.compile import (
+    Compiled,
+    ExprRHS,
+    build_equation_maps,
+    get_libsl,
+    vector_mapping,
+    yield_equations,
+)
+from poincare.reactions.reactions import compensate_volume
+from poincare.simulator import Components
+from poincare.types import Initial, Number
+from scipy import sparse
+from scipy_events import Events
+from symbolite import Real, substitute, translate, vector
+from symbolite.abstract.lang import Assign, Block
+from symbolite.core.symbolite_object import get_symbolite_info
+
+from . import RateLaw, Simulator, System, Variable
+from .core import Species, system_parent_index
+from .cse import eliminate_common_subexpressions
+from .derivative import derivative, yield_leaves
+from .solvers import BDF, LSODA, Radau
+
+
+@dataclass(frozen=True, kw_only=True)
+class Stoichiometry:
+    """Net stoichiometry of a reaction network.
+
+    ``matrix[i, j]`` is the net number of ``species[i]``
+    produced (or consumed, if negative) by ``reactions[j]``.
+    """
+
+    species: Sequence[Variable]
+    reactions: Sequence[RateLaw]
+    matrix: sparse.csr_array
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.matrix.shape
+
+
+def yield_net_stoichiometry(reaction: RateLaw, /):
+    """Yield (Variable, net stoichiometry) pairs of a reaction,
+    in the same order as the reaction equations."""
+    species_stoich: dict[Variable, float] = defaultdict(float)
+    for r in reaction.reactants:
+        species_stoich[r.variable] -= r.stoichiometry
+    for p in reaction.products:
+        species_stoich[p.variable] += p.stoichiometry
+    yield from species_stoich.items()
+
+
+def yield_species(model: System | type[System], /):
+    """Yield Species and reaction Variables of a model,
+    in order of first appearance and without repetitions."""
+    seen = set()
+    for x in model._yield(Species | RateLaw):  # type: ignore
+        if isinstance(x, RateLaw):
+            variables = (r.variable for r in (*x.reactants, *x.products))
+        else:
+            variables = (x,)
+        for v in variables:
+            if v not in seen:
+                seen.add(v)
+                yield v
+
+
+def stoichiometry(
+    model: System | type[System],
+    /,
+    *,
+    species: Sequence[Variable] | None = None,
+) -> Stoichiometry:
+    """Construct the sparse (CSR) stoichiometry matrix of a model.
+
+    Rows follow ``species`` if given,
+    or the order in which they appear in the model otherwise.
+    """
+    if species is None:
+        species = tuple(yield_species(model))
+    reactions = tuple(model._yield(RateLaw))  # type: ignore
+
+    index = {s: i for i, s in enumerate(species)}
+    rows, cols, data = [], [], []
+    for j, r in enumerate(reactions):
+        for s, st in yield_net_stoichiometry(r):
+            if st != 0:
+                rows.append(index[s])
+                cols.append(j)
+                data.append(st)
+
+    matrix = sparse.csr_array(
+        (np.asarray(data, dtype=float), (rows, cols)),
+        shape=(len(species), len(reactions)),
+    )
+    return Stoichiometry(species=tuple(species), reactions=reactions, matrix=matrix)
+
+
+def replace_algebraic(
+    maps: Compiled,
+    expressions: Mapping[Hashable, ExprRHS],
+) -> dict[Hashable, ExprRHS]:
+    """Replace algebraic parameters in expressions
+    by their definitions in terms of time, variables and parameters."""
+    root = {maps.independent[0], *maps.variables, *maps.parameters}
+
+    def is_root(x):
+        return bool(isinstance(x, Number | pint.Quantity) or x in root)
+
+    content = {
+        **maps.mapper,
+        **maps.func[1],
+        **{x: x for x in root},
+        **expressions,
+    }
+    content = eval_content(
+        content,
+        libabstract,
+        is_root=is_root,
+        is_dependency=lambda x: isinstance(x, Node),
+    )
+    return {k: content[k] for k in expressions}
+
+
+def compile_kernel(
+    name: str,
+    expressions: Sequence[ExprRHS],
+    mapping: Mapping,
+    libsl,
+    *,
+    cse: bool = True,
+) -> Callable[[float, NDArray, NDArray, NDArray], NDArray]:
+    """Compile expressions into ``func(t, y, p, out)``,
+    which assigns the i-th expression to ``out[i]``.
+
+    With ``cse``, repeated subexpressions are computed once.
+    """
+    out = vector.Vector(name)
+    expressions = [substitute(expr, mapping) for expr in expressions]
+    if cse:
+        temporaries, expressions = eliminate_common_subexpressions(
+            expressions, prefix=f"_{name}_cse_"
+        )
+    else:
+        temporaries = []
+    block = Block(
+        inputs=(mapping["t"], mapping["y"], mapping["p"], out),
+        lines=(
+            *temporaries,
+            *(Assign(out[i], expr) for i, expr in enumerate(expressions)),
+        ),
+        outputs=(out,),
+    )
+    return translate(block, libsl)
+
+
+@dataclass(frozen=True, kw_only=True)
+class StoichiometricRHS:
+    """Right-hand side ``dy = S @ v(t, y, p)``.
+
+    Entries of ``S`` that must be compensated by a time-dependent volume
+    are stored in ``scaled``, each multiplied by the corresponding ``factors``.
+    Equations that do not come from reactions are added by ``extra``.
+
+    Arrays may have a trailing batch dimension,
+    which is broadcasted through the kernels.
+    """
+
+    matrix: sparse.csr_array
+    rates: Callable[..., NDArray]
+    scaled: Sequence[sparse.csr_array] = ()
+    factors: Callable[..., NDArray] | None = None
+    extra: Callable[..., NDArray] | None = None
+    extra_index: NDArray[np.intp] = field(
+        default_factory=lambda: np.empty(0, dtype=np.intp)
+    )
+    # Used by simbio.solvers, if available.
+    jacobian: StoichiometricJacobian | None = None
+
+    @property
+    def n_reactions(self) -> int:
+        return self.matrix.shape[1]
+
+    def rate_vector(self, t: float, y: NDArray, p: NDArray) -> NDArray:
+        v = np.empty((self.n_reactions, *np.shape(y)[1:]))
+        self.rates(t, y, p, v)
+        return v
+
+    def __call__(self, t: float, y: NDArray, p: NDArray, dy: NDArray) -> NDArray:
+        v = self.rate_vector(t, y, p)
+        dy[...] = self.matrix @ v
+        if self.factors is not None:
+            f = np.empty((len(self.scaled), *np.shape(y)[1:]))
+            self.factors(t, y, p, f)
+            for factor, matrix in zip(f, self.scaled):
+                dy += factor * (matrix @ v)
+        if self.extra is not None:
+            e = np.empty((len(self.extra_index), *np.shape(y)[1:]))
+            self.extra(t, y, p, e)
+            dy[self.extra_index] += e
+        return dy
+
+
+@dataclass(frozen=True, kw_only=True)
+class SparseKernel:
+    """Evaluates a sparse matrix with fixed sparsity pattern (CSR)."""
+
+    shape: tuple[int, int]
+    indices: NDArray[np.intp]
+    indptr: NDArray[np.intp]
+    func: Callable[..., NDArray] | None
+
+    @classmethod
+    def empty(cls, shape: tuple[int, int]):
+        return cls(
+            shape=shape,
+            indices=np.empty(0, dtype=np.intp),
+            indptr=np.zeros(shape[0] + 1, dtype=np.intp),
+            func=None,
+        )
+
+    @property
+    def sparsity(self) -> sparse.csr_array:
+        data = np.ones(self.indices.size)
+        return sparse.csr_array((data, self.indices, self.indptr), shape=self.shape)
+
+    def __call__(self, t: float, y: NDArray, p: NDArray) -> sparse.csr_array:
+        data = np.zeros(self.indices.size)
+        if self.func is not None:
+            self.func(t, y, p, data)
+        return sparse.csr_array((data, self.indices, self.indptr), shape=self.shape)
+
+    @cached_property
+    def _rows(self) -> NDArray[np.intp]:
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def rmatvec(self, t: float, y: NDArray, p: NDArray, w: NDArray) -> NDArray:
+        """``w @ M``, without building the sparse matrix."""
+        if self.func is None:
+            return np.zeros(self.shape[1])
+        data = np.empty(self.indices.size)
+        self.func(t, y, p, data)
+        return np.bincount(
+            self.indices, weights=data * w[self._rows], minlength=self.shape[1]
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class StoichiometricJacobian:
+    """Jacobian of a StoichiometricRHS with respect to y (or p).
+
+    ``J = (S + sum_k f_k S_k) @ dv/dy + sum_k (S_k @ v) df_k/dy + de/dy``
+    """
+
+    rhs: StoichiometricRHS
+    rates: SparseKernel
+    factors: SparseKernel | None = None
+    extra: SparseKernel | None = None
+
+    def _extra_rows(self) -> sparse.csr_array:
+        index = self.rhs.extra_index
+        n = self.rhs.matrix.shape[0]
+        return sparse.csr_array(
+            (np.ones(index.size), (index, np.arange(index.size))),
+            shape=(n, index.size),
+        )
+
+    def _assemble(self, dv, f, df, v, de) -> sparse.csr_array:
+        jac = self.rhs.matrix @ dv
+        if df is not None:
+            for k, matrix in enumerate(self.rhs.scaled):
+                jac += f[k] * (matrix @ dv)
+                jac += sparse.csr_array((matrix @ v)[:, None]) @ df[[k]]
+        if de is not None:
+            jac += self._extra_rows() @ de
+        return sparse.csr_array(jac)
+
+    @property
+    def sparsity(self) -> sparse.csr_array:
+        """Structurally non-zero entries of the Jacobian."""
+        f = df = v = de = None
+        if self.factors is not None:
+            f = np.ones(self.factors.shape[0])
+            df = self.factors.sparsity
+            v = np.ones(self.rates.shape[0])
+        if self.extra is not None:
+            de = self.extra.sparsity
+        abs_rhs = replace(
+            self,
+            rhs=replace(
+                self.rhs,
+                matrix=abs(self.rhs.matrix),
+                scaled=tuple(abs(m) for m in self.rhs.scaled),
+            ),
+        )
+        jac = abs_rhs._assemble(self.rates.sparsity, f, df, v, de)
+        jac.data[:] = 1
+        return jac
+
+    def __call__(self, t: float, y: NDArray, p: NDArray, *args) -> sparse.csr_array:
+        dv = self.rates(t, y, p)
+        f = df = v = de = None
+        if self.factors is not None:
+            f = np.empty(self.factors.shape[0])
+            self.rhs.factors(t, y, p, f)
+            df = self.factors(t, y, p)
+            v = self.rhs.rate_vector(t, y, p)
+        if self.extra is not None:
+            de = self.extra(t, y, p)
+        return self._assemble(dv, f, df, v, de)
+
+    @cached_property
+    def _transposed(self) -> tuple[sparse.csr_array, list[sparse.csr_array]]:
+        return (
+            sparse.csr_array(self.rhs.matrix.T),
+            [sparse.csr_array(m.T) for m in self.rhs.scaled],
+        )
+
+    def vjp(self, t: float, y: NDArray, p: NDArray, w: NDArray) -> NDArray:
+        """Vector-Jacobian product ``w @ J``, without assembling J."""
+        rhs = self.rhs
+        matrix_t, scaled_t = self._transposed
+        u = matrix_t @ w
+        out = np.zeros(self.rates.shape[1])
+        if self.factors is not None:
+            f = np.empty(self.factors.shape[0])
+            rhs.factors(t, y, p, f)
+            v = rhs.rate_vector(t, y, p)
+            c = np.empty(len(rhs.scaled))
+            for k, (matrix, transposed) in enumerate(zip(rhs.scaled, scaled_t)):
+                u += f[k] * (transposed @ w)
+                c[k] = w @ (matrix @ v)
+            out += self.factors.rmatvec(t, y, p, c)
+        out += self.rates.rmatvec(t, y, p, u)
+        if self.extra is not None:
+            out += self.extra.rmatvec(t, y, p, w[rhs.extra_index])
+        return out
+
+
+class StoichiometryCompiler:
+    """Compiles a model into a StoichiometricRHS.
+
+    Each reaction rate law is compiled once as a kernel,
+    and the per-species sum is delegated to a sparse matrix product.
+    Subexpressions shared between rate laws are computed once,
+    unless ``cse=False``.
+    """
+
+    def __init__(self, system: System | type[System], /, *, cse: bool = True):
+        self.system = system
+        self.cse = cse
+        self.equation_maps = build_equation_maps(system=system)
+        for v in self.equation_maps.variables:
+            if v.equation_order not in (None, 1):
+                raise NotImplementedError(
+                    f"higher order equations are not supported: {v}"
+                )
+
+        self.stoichiometry = stoichiometry(system, species=self.equation_maps.variables)
+        with system_parent_index(self.stoichiometry.species):
+            self.compiled = self._compile()
+
+    def _split_volume_factors(self):
+        """Split the stoichiometry into a constant matrix
+        and matrices scaled by volume-dependent factors."""
+        st = self.stoichiometry
+        index = {s: i for i, s in enumerate(st.species)}
+        constant = st.matrix.tolil()
+        scaled: dict[Real, Any] = {}
+        for j, r in enumerate(st.reactions):
+            for s, coeff in yield_net_stoichiometry(r):
+                if coeff == 0:
+                    continue
+                i = index[s]
+                factor = compensate_volume(
+                    s, 1, reaction_is_concentration=r.concentration
+                )
+                if isinstance(factor, Number):
+                    constant[i, j] = coeff * factor
+                else:
+                    constant[i, j] = 0
+                    if factor not in scaled:
+                        scaled[factor] = sparse.lil_array(st.shape)
+                    scaled[factor][i, j] = coeff
+        constant = sparse.csr_array(constant)
+        constant.eliminate_zeros()
+        return constant, {k: sparse.csr_array(v) for k, v in scaled.items()}
+
+    def _extra_equations(self) -> dict[Variable, ExprRHS]:
+        reaction_equations = {
+            id(eq) for r in self.stoichiometry.reactions for eq in r.equations
+        }
+        extra: dict[Variable, list[ExprRHS]] = defaultdict(list)
+        for eq in yield_equations(self.system):
+            if id(eq) not in reaction_equations:
+                extra[eq.lhs.variable].append(eq.rhs)
+        return {k: sum(v[1:], start=v[0]) for k, v in extra.items()}
+
+    def _compile(self) -> Compiled:
+        maps = self.equation_maps
+        reactions = self.stoichiometry.reactions
+        constant, scaled = self._split_volume_factors()
+        extra = self._extra_equations()
+
+        self.libsl = get_libsl("numpy")
+        self.mapping = vector_mapping(
+            maps.independent[0], maps.variables, maps.parameters
+        )
+        expressions = replace_algebraic(
+            maps,
+            {("rate", i): r.rate_law for i, r in enumerate(reactions)}
+            | {("factor", i): f for i, f in enumerate(scaled)}
+            | {("extra", k): v for k, v in extra.items()},
+        )
+        # In vector form, i.e. in terms of t, y[i] and p[j].
+        self.expressions = {
+            k: substitute(v, self.mapping) for k, v in expressions.items()
+        }
+        self.keys = {
+            "rate": [("rate", i) for i in range(len(reactions))],
+            "factor": [("factor", i) for i in range(len(scaled))],
+            "extra": [("extra", k) for k in extra],
+        }
+
+        def kernel(name: str, keys: Sequence[Hashable]):
+            if len(keys) == 0:
+                return None
+            exprs = [self.expressions[k] for k in keys]
+            return compile_kernel(name, exprs, self.mapping, self.libsl, cse=self.cse)
+
+        index = {v: i for i, v in enumerate(maps.variables)}
+        rhs = StoichiometricRHS(
+            matrix=constant,
+            rates=kernel("v", self.keys["rate"]) or _no_reactions,
+            scaled=tuple(scaled.values()),
+            factors=kernel("f", self.keys["factor"]),
+            extra=kernel("e", self.keys["extra"]),
+            extra_index=np.fromiter(
+                (index[k] for k in extra), dtype=np.intp, count=len(extra)
+            ),
+        )
+        return Compiled(
+            independent=maps.independent,
+            variables=maps.variables,
+            parameters=maps.parameters,
+            mapper=maps.mapper,
+            func=rhs,
+            output={str(v): v for v in maps.variables},
+            libsl=self.libsl,
+        )
+
+    def sparse_derivative(
+        self, name: str, keys: Sequence[Hashable], wrt: vector.Vector, size: int
+    ) -> SparseKernel | None:
+        """Compile the derivatives of expressions with respect to
+        the items of a vector (``y`` or ``p``), keeping only non-zero entries."""
+        if len(keys) == 0:
+            return None
+
+        target = get_symbolite_info(wrt).value
+        indptr, indices, entries = [0], [], []
+        for k in keys:
+            expr = self.expressions[k]
+            columns = {
+                x[1]
+                for x in yield_leaves(expr)
+                if isinstance(x, tuple) and x[0] == target
+            }
+            for c in sorted(columns):
+                d = derivative(expr, wrt[c])
+                if not (isinstance(d, Number) and d == 0):
+                    indices.append(c)
+                    entries.append(d)
+            indptr.append(len(indices))
+
+        return SparseKernel(
+            shape=(len(keys), size),
+            indices=np.asarray(indices, dtype=np.intp),
+            indptr=np.asarray(indptr, dtype=np.intp),
+            func=compile_kernel(name, entries, self.mapping, self.libsl, cse=self.cse)
+            if len(entries) > 0
+            else None,
+        )
+
+    def jacobian(self) -> StoichiometricJacobian:
+        """Compile the analytic Jacobian of the right-hand side."""
+        rhs: StoichiometricRHS = self.compiled.func
+        y, n = self.mapping["y"], len(self.equation_maps.variables)
+        return StoichiometricJacobian(
+            rhs=rhs,
+            rates=self.sparse_derivative("dv", self.keys["rate"], y, n)
+            or SparseKernel.empty((0, n)),
+            factors=self.sparse_derivative("df", self.keys["factor"], y, n),
+            extra=self.sparse_derivative("de", self.keys["extra"], y, n),
+        )
+
+    def parameter_jacobian(self) -> StoichiometricJacobian:
+        """Compile the analytic Jacobian of the right-hand side
+        with respect to the parameters p."""
+        rhs: StoichiometricRHS = self.compiled.func
+        p, n = self.mapping["p"], len(self.equation_maps.parameters)
+        return StoichiometricJacobian(
+            rhs=rhs,
+            rates=self.sparse_derivative("dvdp", self.keys["rate"], p, n)
+            or SparseKernel.empty((0, n)),
+            factors=self.sparse_derivative("dfdp", self.keys["factor"], p, n),
+            extra=self.sparse_derivative("dedp", self.keys["extra"], p, n),
+        )
+
+
+def _no_reactions(t, y, p, v):
+    return v
+
+
+class SparseSimulator(Simulator):
+    """A Simulator whose right-hand side is evaluated as ``S @ v(t, y, p)``.
+
+    The stoichiometry matrix is built once per model
+    and reused across parameter sets.
+
+    With ``jacobian=True``, the analytic Jacobian is used
+    by the solvers in ``simbio.solvers``, and the default solver is
+    their BDF, which keeps it sparse. Their LSODA densifies it,
+    and must be passed explicitly.
+    """
+
+    def __init__(
+        self,
+        system: System | type[System],
+        /,
+        *,
+        transform=None,
+        cse: bool = True,
+        jacobian: bool = False,
+    ):
+        self.model = system
+        self.compiler = compiler = StoichiometryCompiler(self.model, cse=cse)
+        self.stoichiometry = compiler.stoichiometry
+        self.compiled = compiler.compiled
+        if jacobian:
+            rhs = replace(self.compiled.func, jacobian=compiler.jacobian())
+            self.compiled = replace(self.compiled, func=rhs)
+        self.transform = self._compile_transform(transform)
+
+    def default_solver(self) -> solvers.Solver:
+        """LSODA, or BDF from simbio.solvers if the Jacobian was built."""
+        if getattr(self.compiled.func, "jacobian", None) is None:
+            return solvers.LSODA()
+        return BDF()
+
+    def check_solver(self, solver: solvers.Solver) -> None:
+        """Warn if a solver would ignore the Jacobian that was built."""
+        if getattr(self.compiled.func, "jacobian", None) is None:
+            return
+        if not isinstance(solver, BDF | Radau | LSODA) or (
+            isinstance(solver, LSODA) and solver.implementation not in (None, "LSODA")
+        ):
+            warnings.warn(
+                f"{type(solver).__name__} ignores the analytic Jacobian,"
+                " use the solvers in simbio.solvers",
+                stacklevel=3,
+            )
+
+    def solve(
+        self,
+        values: Mapping[Components, Initial] = {},
+        *,
+        t_span: tuple[float, float] | None = None,
+        save_at: ArrayLike | None = None,
+        solver: solvers.Solver | None = None,
+        events: Sequence[Events] = (),
+    ):
+        if solver is None:
+            solver = self.default_solver()
+        else:
+            self.check_solver(solver)
+        return super().solve(
+            values, t_span=t_span, save_at=save_at, solver=solver, events=events
+        )
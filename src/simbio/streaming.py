@@ -0,0 +1,115 @@
+"""
+simbio.streaming
+~~~~~~~~~~~~~~~~
+
+Solve a model in consecutive time windows,
+yielding each chunk of the solution as soon as it is computed.
+
+Only one window is kept in memory at a time,
+so memory usage does not grow with the simulated horizon.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from dataclasses import replace
+from os import PathLike
+from pathlib import Path
+
+import numpy as np
+import pint
+import pint_xarray
+import xarray as xr
+from numpy.typing import ArrayLike, NDArray
+from poincare import solvers
+from poincare.compile import identity_transform
+from poincare.simulator import Components, Simulator
+from poincare.types import Initial, Number
+
+
+def _to_dataset(
+    names: Sequence[str],
+    scale: Sequence[Number | pint.Quantity],
+    t: NDArray,
+    y: NDArray,
+) -> xr.Dataset:
+    data = {}
+    for k, s, x in zip(names, scale, y.T):
+        if isinstance(s, pint.Quantity):
+            data[k] = xr.DataArray(
+                data=x * s.magnitude, dims="time", coords={"time": t}
+            ).pint.quantify(s.units, pint_xarray.setup_registry(s.units._REGISTRY))
+            s.units._REGISTRY.force_ndarray_like = False
+        else:
+            data[k] = xr.DataArray(data=x * s, dims="time", coords={"time": t})
+    return xr.Dataset(data)
+
+
+def solve_chunks(
+    sim: Simulator,
+    values: Mapping[Components, Initial] = {},
+    /,
+    *,
+    save_at: ArrayLike,
+    chunk_size: int,
+    solver: solvers.Solver = solvers.LSODA(),
+) -> Iterator[xr.Dataset]:
+    """Yield the solution in chunks of at most ``chunk_size`` time points.
+
+    Each window is integrated from the last state of the previous one.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    save_at = np.asarray(save_at)
+
+    problem = sim.create_problem(values, t_span=(0, save_at[-1]))
+    names = list(sim.transform.output.keys())
+    # Integrate the raw state, and apply the transform to each chunk.
+    integration = replace(
+        problem, transform=identity_transform, scale=[1] * len(problem.y)
+    )
+
+    t0, y0 = problem.t[0], problem.y
+    for start in range(0, save_at.size, chunk_size):
+        t = save_at[start : start + chunk_size]
+        solution = solver(replace(integration, t=(t0, t[-1]), y=y0), save_at=t)
+        t0, y0 = solution.t[-1], solution.y[-1]
+
+        out = np.empty((solution.t.size, len(problem.scale)))
+        out = problem.transform(solution.t, solution.y.T, problem.p, out.T).T
+        yield _to_dataset(names, problem.scale, solution.t, out)
+
+
+def solve_to(
+    sink: Callable[[xr.Dataset], None],
+    sim: Simulator,
+    values: Mapping[Components, Initial] = {},
+    /,
+    *,
+    save_at: ArrayLike,
+    chunk_size: int,
+    solver: solvers.Solver = solvers.LSODA(),
+) -> None:
+    """Solve in chunks, passing each one to sink."""
+    for chunk in solve_chunks(
+        sim, values, save_at=save_at, chunk_size=chunk_size, solver=solver
+    ):
+        sink(chunk)
+
+
+class NetCDFSink:
+    """Write each chunk to a numbered netCDF file in a directory.
+
+    The full solution can be read back by concatenating ``sink.files`` along time.
+    """
+
+    def __init__(self, directory: str | PathLike, *, prefix: str = "chunk"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.files: list[Path] = []
+
+    def __call__(self, chunk: xr.Dataset) -> None:
+        file = self.directory / f"{self.prefix}_{len(self.files):06d}.nc"
+        chunk.to_netcdf(file)
+        self.files.append(file)
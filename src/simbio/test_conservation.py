@@ -0,0 +1,128 @@
+import numpy as np
+from pytest import mark, raises
+
+from . import (
+    Compartment,
+    MassAction,
+    Simulator,
+    Species,
+    System,
+    Variable,
+    Volume,
+    initial,
+)
+from .conservation import ReducedSimulator, _null_space, conservation_laws
+from .core import amount, concentration, volume
+from .reactions import MichaelisMenten
+from .reactions.test_reactions import reactions
+from .solvers import LSODA
+from .stoichiometry import stoichiometry
+from .test_stoichiometry import Enzymatic
+
+
+def assert_same_solution(model, values={}, **kwargs):
+    save_at = np.linspace(0, 10, 11)
+    solver = LSODA(rtol=1e-10, atol=1e-12)
+    expected = Simulator(model).solve(values, save_at=save_at, solver=solver)
+    result = ReducedSimulator(model, **kwargs).solve(
+        values, save_at=save_at, solver=solver
+    )
+    assert list(result.data_vars) == list(expected.data_vars)
+    np.testing.assert_allclose(
+        result.to_array(), expected.to_array(), rtol=1e-6, atol=1e-9
+    )
+
+
+def test_conservation_laws():
+    laws = conservation_laws(Enzymatic)
+    assert laws.species == [Enzymatic.E, Enzymatic.ES, Enzymatic.P, Enzymatic.S]
+    assert len(laws) == 2
+    assert laws.dependent == (0, 1)
+    assert laws.independent == [2, 3]
+    # E + ES and ES + P + S, in reduced row echelon form,
+    # with E and ES as dependent species.
+    np.testing.assert_array_equal(laws.matrix, [[1, 0, -1, -1], [0, 1, 1, 1]])
+
+    st = stoichiometry(Enzymatic, species=laws.species)
+    np.testing.assert_array_equal(laws.matrix @ st.matrix.toarray(), 0)
+
+    # The most abundant species, S and then E, are chosen as dependent.
+    laws = laws.select_dependent([1, 0, 0, 5])
+    assert laws.dependent == (3, 0)
+    np.testing.assert_array_equal(laws.matrix, [[0, 1, 1, 1], [1, 1, 0, 0]])
+
+
+def test_fractional_stoichiometry():
+    class Model(System):
+        A: Variable = initial(default=1)
+        B: Variable = initial(default=0)
+        r = MassAction(reactants=[0.5 * A], products=[1.5 * B], rate=1)
+
+    laws = conservation_laws(Model)
+    # 3 A + B
+    np.testing.assert_array_equal(laws.matrix, [[1, 1 / 3]])
+
+
+def test_null_space_overflow():
+    # Fraction-free elimination would overflow int64.
+    big = 3**30
+    matrix = np.array([[big, 1, 0], [0, big, 1]])
+    basis = _null_space(matrix)
+    assert basis.tolist() == [[1, -big, big**2]]
+    assert (basis @ matrix.T.astype(object)).tolist() == [[0, 0]]
+
+
+def test_no_conservation_laws():
+    class Model(System):
+        x: Variable = initial(default=1)
+        decay = MassAction(reactants=[x], products=[], rate=1)
+
+    laws = conservation_laws(Model)
+    assert len(laws) == 0
+    assert laws.independent == [0]
+    assert_same_solution(Model)
+
+
+@mark.parametrize("reaction", reactions)
+def test_reactions(reaction):
+    model = reaction(**dict.fromkeys(reaction._required, 1))
+    assert_same_solution(model)
+
+
+def test_compartment():
+    sim = ReducedSimulator(Enzymatic)
+    # V, ES and P, with the most abundant E and S eliminated.
+    laws = sim.conservation_laws
+    assert {laws.species[i] for i in laws.dependent} == {Enzymatic.E, Enzymatic.S}
+    assert sim.create_problem().y.size == 3
+    assert_same_solution(Enzymatic)
+    assert_same_solution(Enzymatic, {Enzymatic.E: 3, Enzymatic.mm.forward_rate: 3})
+    assert_same_solution(Enzymatic, jacobian=True)
+
+
+def test_small_species():
+    """A scarce enzyme is not computed from the large substrate pool."""
+
+    class Model(Compartment):
+        V: Volume = volume(default=1)
+        E: Species = concentration(default=1e-6)
+        S: Species = concentration(default=1e6)
+        ES: Species = concentration(default=0)
+        P: Species = concentration(default=0)
+        mm = MichaelisMenten(
+            E=E, S=S, ES=ES, P=P, forward_rate=1, reverse_rate=1, catalytic_rate=1
+        )
+
+    assert_same_solution(Model)
+
+
+def test_changing_volume():
+    class Model(Compartment):
+        V: Volume = volume(default=1)
+        A: Species = concentration(default=1)
+        B: Species = amount(default=0)
+        r = MassAction(reactants=[A], products=[B], rate=1)
+        eq = V.derive() << 1
+
+    with raises(NotImplementedError):
+        ReducedSimulator(Model)
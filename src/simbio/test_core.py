@@ -18,9 +18,12 @@
     amount,
     compensate_volume,
     concentration,
+    first_system_parent,
     make_concentration,
     reaction_amount,
     reaction_concentration,
+    system_parent_index,
+    system_parents,
     volume,
 )
 
@@ -296,6 +299,57 @@ class Model(Compartment):
     assert Model.nested._simbio_volume == Model.nested.V
 
 
+def test_first_system_parent():
+    class Nested(Compartment):
+        V: Volume = volume(default=1)
+        A: Species = amount(default=1)
+
+    class Model(Compartment):
+        V: Volume = volume(default=1)
+        A: Species = amount(default=1)
+        nested = Nested()
+
+    assert first_system_parent(Model.A) is Model
+    assert first_system_parent(Model.nested.A) is Model.nested
+
+    species = amount(default=1)
+    assert first_system_parent(species) is None
+    species.__set_name__(Model, "B")
+    assert first_system_parent(species) is Model
+
+    # A new parent anywhere in the chain is taken into account.
+    reactant = reaction_amount(default=1)
+    reactant.variable.__set_name__(reactant, "C")
+    assert first_system_parent(reactant.variable) is None
+    reactant.__set_name__(Model, "C")
+    assert first_system_parent(reactant.variable) is Model
+
+
+def test_system_parent_index():
+    class Nested(Compartment):
+        V: Volume = volume(default=1)
+        A: Species = amount(default=1)
+
+    class Model(Compartment):
+        V: Volume = volume(default=1)
+        A: Species = amount(default=1)
+        nested = Nested()
+        r = MassAction(reactants=[A], products=[nested.A], rate=1)
+
+    species = amount(default=1)
+    nodes = [Model.A, Model.nested.A, Model.r.reactants[0].variable, species]
+    assert system_parents(nodes) == {
+        Model.A: Model,
+        Model.nested.A: Model.nested,
+        species: None,
+    }
+
+    with system_parent_index([Model.A]):
+        assert first_system_parent(Model.A) is Model
+        # Not indexed, looked up in its parent chain.
+        assert first_system_parent(Model.nested.A) is Model.nested
+
+
 def test_species_in_reactant():
     class Nested(Compartment):
         V: Volume = Volume(initial=2)
@@ -0,0 +1,43 @@
+import numpy as np
+from symbolite import vector
+from symbolite.core.symbolite_object import get_symbolite_info
+
+from .cse import eliminate_common_subexpressions
+from .stoichiometry import SparseSimulator
+from .test_stoichiometry import Enzymatic
+
+y = vector.Vector("y")
+p = vector.Vector("p")
+
+
+def test_hoisting():
+    S, V, K = y[0], p[0], p[1]
+    expressions = [S / (K + S) / V, 2 * S / (K + S), y[1] / V, 3]
+    temporaries, rewritten = eliminate_common_subexpressions(expressions)
+
+    assert len(temporaries) == 1
+    lhs, rhs = get_symbolite_info(temporaries[0])
+    assert str(rhs) == str(K + S)
+    assert str(rewritten[0]) == str(S / lhs / V)
+    assert str(rewritten[1]) == str(2 * S / lhs)
+    assert str(rewritten[2]) == str(y[1] / V)
+    assert rewritten[3] == 3
+
+
+def test_no_repeated_work():
+    # (K + S) is only used by the hoisted product.
+    S, K = y[0], p[1]
+    temporaries, _ = eliminate_common_subexpressions([(K + S) * 2, (K + S) * 2 + 1])
+    assert len(temporaries) == 1
+
+
+def test_same_rhs():
+    with_cse = SparseSimulator(Enzymatic).create_problem(t_span=(0, 1))
+    without_cse = SparseSimulator(Enzymatic, cse=False).create_problem(t_span=(0, 1))
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        y0 = rng.uniform(size=with_cse.y.size)
+        np.testing.assert_allclose(
+            with_cse.rhs(0, y0, with_cse.p, np.empty_like(y0)),
+            without_cse.rhs(0, y0, without_cse.p, np.empty_like(y0)),
+        )
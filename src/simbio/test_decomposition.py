@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from pytest import mark, raises
+from symbolite.abstract import real
+
+from . import MassAction, Parameter, Simulator, System, Variable, assign, initial
+from .decomposition import DecomposedSimulator, decompose
+from .solvers import LSODA
+
+
+class Pathways(System):
+    A: Variable = initial(default=1)
+    B: Variable = initial(default=0)
+    C: Variable = initial(default=2)
+    D: Variable = initial(default=0)
+    E: Variable = initial(default=0)
+    k: Parameter = assign(default=1)
+    ab = MassAction(reactants=[A], products=[B], rate=k)
+    cd = MassAction(reactants=[C], products=[D], rate=100 * k)
+    # E has no reactants, and is not coupled to anything.
+    production = MassAction(reactants=[], products=[E], rate=0.5)
+
+
+class Modifier(System):
+    # The enzyme is not consumed, but couples its product to itself.
+    enzyme: Variable = initial(default=2)
+    X: Variable = initial(default=0)
+    Y: Variable = initial(default=1)
+    catalysis = MassAction(reactants=[], products=[X], rate=enzyme)
+    decay = MassAction(reactants=[Y], products=[], rate=1)
+
+
+class Cascade(System):
+    A: Variable = initial(default=1)
+    B: Variable = initial(default=0)
+    C: Variable = initial(default=0)
+    forward = MassAction(reactants=[A], products=[B], rate=2)
+    reverse = MassAction(reactants=[B], products=[A], rate=1)
+    downstream = MassAction(reactants=[B], products=[C], rate=1)
+
+
+class Gamma(System):
+    # Rate laws are not differentiated to build the coupling graph.
+    A: Variable = initial(default=1)
+    B: Variable = initial(default=0)
+    C: Variable = initial(default=1)
+    ab = MassAction(reactants=[A], products=[B], rate=real.gamma(A))
+    decay = MassAction(reactants=[C], products=[], rate=1)
+
+
+def names(decomposition, groups):
+    return [{str(decomposition.variables[i]) for i in g} for g in groups]
+
+
+def test_components():
+    d = decompose(Pathways)
+    assert sorted(names(d, d.components), key=sorted) == [
+        {"A", "B"},
+        {"C", "D"},
+        {"E"},
+    ]
+
+    d = decompose(Modifier)
+    assert {"X", "enzyme"} in names(d, d.components)
+    assert {"Y"} in names(d, d.components)
+
+    d = decompose(Gamma)
+    assert sorted(names(d, d.components), key=sorted) == [{"A", "B"}, {"C"}]
+
+
+def test_blocks():
+    d = decompose(Cascade)
+    assert len(d.components) == 1
+    assert names(d, d.blocks) == [{"A", "B"}, {"C"}]
+
+
+@mark.parametrize("model", [Pathways, Modifier, Cascade])
+@mark.parametrize("jacobian", [False, True])
+def test_matches_simulator(model, jacobian):
+    save_at = np.linspace(0, 2, 11)
+    solver = LSODA(rtol=1e-10, atol=1e-12)
+    expected = Simulator(model).solve(save_at=save_at, solver=solver)
+    sim = DecomposedSimulator(model, jacobian=jacobian, max_workers=1)
+    result = sim.solve(save_at=save_at, solver=solver)
+    for k in expected.data_vars:
+        np.testing.assert_allclose(result[k], expected[k], rtol=1e-7, atol=1e-9)
+
+
+def test_executor():
+    save_at = np.linspace(0, 2, 11)
+    values = {Pathways.k: 2, Pathways.C: 3}
+    sim = DecomposedSimulator(Pathways, max_workers=1)
+    expected = sim.solve(values, save_at=save_at)
+    with ThreadPoolExecutor(2) as executor:
+        result = sim.solve(values, save_at=save_at, executor=executor, n_tasks=2)
+    for k in expected.data_vars:
+        np.testing.assert_allclose(result[k], expected[k])
+
+
+def test_solve_arguments():
+    sim = DecomposedSimulator(Pathways, max_workers=1)
+    save_at = np.linspace(0, 2, 11)
+    expected = sim.solve(save_at=save_at)
+    result = sim.solve(t_span=(0, 3), save_at=save_at)
+    for k in expected.data_vars:
+        np.testing.assert_allclose(result[k], expected[k], rtol=1e-5)
+
+    with raises(TypeError, match="save_at"):
+        sim.solve(t_span=(0, 2))
+    with raises(NotImplementedError):
+        sim.solve(save_at=save_at, events=[object()])
+
+
+def test_tasks():
+    sim = DecomposedSimulator(Pathways)
+    tasks = sim._tasks(2)
+    assert sorted(i for task in tasks for i in task) == [0, 1, 2]
+    assert len(sim._tasks(10)) == 3
@@ -0,0 +1,103 @@
+import numpy as np
+from poincare.solvers import LSODA
+from pytest import mark
+
+from . import Compartment, Parameter, Simulator, Species, Volume, assign
+from .core import concentration, volume
+from .ensemble import EnsembleSimulator
+from .reactions import MichaelisMenten
+from .solvers import BDF
+from .stoichiometry import SparseSimulator
+from .test_jacobian import ChangingVolume
+
+
+class Model(Compartment):
+    V: Volume = volume(default=1)
+    k: Parameter = assign(default=1)
+    E: Species = concentration(default=1)
+    S: Species = concentration(default=10 * k)
+    ES: Species = concentration(default=0)
+    P: Species = concentration(default=0)
+
+    mm = MichaelisMenten(
+        E=E, S=S, ES=ES, P=P, forward_rate=k, reverse_rate=1, catalytic_rate=1
+    )
+
+
+save_at = np.linspace(0, 10, 11)
+solver = LSODA(rtol=1e-8, atol=1e-10)
+
+
+def assert_same_as_loop(components, values):
+    result = EnsembleSimulator(Model).solve(
+        components, values, save_at=save_at, solver=BDF(rtol=1e-8, atol=1e-10)
+    )
+    sim = Simulator(Model)
+    assert result.dims == ("run", "time", "variable")
+    assert result.shape == (len(values), save_at.size, len(sim.compiled.variables))
+
+    for run, row in zip(result, values):
+        expected = sim.solve(dict(zip(components, row)), save_at=save_at, solver=solver)
+        np.testing.assert_allclose(
+            run.transpose("variable", "time"),
+            expected.to_array(),
+            rtol=1e-5,
+            atol=1e-8,
+        )
+
+
+def test_parameter_sets():
+    values = [[1, 1], [2, 1], [1, 3]]
+    assert_same_as_loop([Model.mm.reverse_rate, Model.mm.catalytic_rate], values)
+
+
+def test_initial_conditions():
+    values = [[1, 0], [2, 0.5], [0.5, 1]]
+    assert_same_as_loop([Model.E, Model.ES], values)
+
+
+def test_dependent_initials():
+    values = [[1], [2], [3]]
+    assert_same_as_loop([Model.k], values)
+
+
+@mark.parametrize("jacobian", [False, True])
+def test_default_solver(jacobian):
+    values = [[1, 1], [2, 1]]
+    components = [Model.mm.reverse_rate, Model.mm.catalytic_rate]
+    result = EnsembleSimulator(Model, jacobian=jacobian).solve(
+        components, values, save_at=save_at
+    )
+    expected = EnsembleSimulator(Model, jacobian=False).solve(
+        components, values, save_at=save_at, solver=solver
+    )
+    # Within the default tolerances of the solvers.
+    np.testing.assert_allclose(result, expected, rtol=1e-2, atol=1e-4)
+
+
+@mark.parametrize(
+    "model, components, values",
+    [
+        (Model, [Model.k, Model.E], [[1, 1], [2, 0.5], [3, 2]]),
+        (ChangingVolume, [ChangingVolume.A, ChangingVolume.V], [[1, 1], [2, 3]]),
+    ],
+)
+def test_block_diagonal_jacobian(model, components, values):
+    ensemble = EnsembleSimulator(model)
+    problem = ensemble.create_problem(components, values)
+    n, n_runs = problem.rhs.shape
+    rng = np.random.default_rng(0)
+    y = rng.uniform(0.5, 2, size=(n, n_runs))
+    jac = problem.rhs.jacobian(0.5, y.ravel(), problem.p)
+    assert jac.shape == (n * n_runs, n * n_runs)
+
+    sim = SparseSimulator(model, jacobian=True)
+    pattern = sim.compiled.func.jacobian.sparsity
+    for r in range(n_runs):
+        expected = sim.compiled.func.jacobian(0.5, y[:, r], problem.p[:, r])
+        block = jac[r::n_runs][:, r::n_runs]
+        np.testing.assert_allclose(block.toarray(), expected.toarray())
+    # Runs are not coupled, and share the sparsity pattern.
+    rows, cols = jac.nonzero()
+    assert np.all(rows % n_runs == cols % n_runs)
+    assert jac.nnz == n_runs * pattern.nnz
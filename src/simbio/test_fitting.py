@@ -0,0 +1,110 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from pytest import mark, raises
+
+from . import MassAction, Parameter, Simulator, System, Variable, assign, initial
+from .fitting import Fitter
+from .solvers import LSODA
+
+
+class Model(System):
+    A: Variable = initial(default=5)
+    B: Variable = initial(default=0)
+    k1: Parameter = assign(default=1)
+    k2: Parameter = assign(default=1)
+    forward = MassAction(reactants=[A], products=[B], rate=k1)
+    decay = MassAction(reactants=[B], products=[], rate=k2)
+
+
+true = {Model.k1: 0.7, Model.k2: 0.3}
+time = np.linspace(0, 10, 21)
+data = (
+    Simulator(Model)
+    .solve(true, save_at=time, solver=LSODA(rtol=1e-10, atol=1e-12))
+    .to_dataframe()[["A", "B"]]
+    .rename_axis(None)
+    .iloc[1:]
+)
+
+
+def test_gradient():
+    fitter = Fitter(
+        Model,
+        data,
+        [Model.k1, Model.k2],
+        sigma={"A": 1, "B": 0.5},
+        rtol=1e-10,
+        atol=1e-12,
+    )
+    x = np.log([1.0, 0.5])
+    _, gradient = fitter.objective(x)
+    h = 1e-6
+    for i in range(x.size):
+        dx = np.zeros_like(x)
+        dx[i] = h
+        expected = (fitter.objective(x + dx)[0] - fitter.objective(x - dx)[0]) / (2 * h)
+        np.testing.assert_allclose(gradient[i], expected, rtol=1e-4)
+    assert fitter.n_evaluations == 5
+
+
+def test_fit():
+    fitter = Fitter(Model, data, [Model.k1, Model.k2])
+    result = fitter.fit()
+    assert result.success
+    assert result.loss < 1e-6
+    np.testing.assert_allclose(result.parameters["k1"], 0.7, rtol=1e-3)
+    np.testing.assert_allclose(result.parameters["k2"], 0.3, rtol=1e-3)
+
+
+def test_missing_values():
+    partial = data.copy()
+    partial.iloc[::2, 0] = np.nan
+    partial.iloc[1::2, 1] = np.nan
+    result = Fitter(Model, partial, [Model.k1, Model.k2]).fit()
+    np.testing.assert_allclose(result.parameters["k1"], 0.7, rtol=1e-3)
+    np.testing.assert_allclose(result.parameters["k2"], 0.3, rtol=1e-3)
+
+
+@mark.parametrize("pool", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_multistart(pool):
+    fitter = Fitter(Model, data[["B"]], [Model.k1, Model.k2])
+    with pool(2) as executor:
+        results = fitter.multistart(
+            4, bounds=[(0.01, 10), (0.01, 10)], seed=0, executor=executor
+        )
+    assert len(results) == 4
+    losses = [r.loss for r in results]
+    assert losses == sorted(losses)
+    assert results[0].loss < 1e-6
+
+
+def test_positive_in_log_space():
+    fitter = Fitter(Model, data, [Model.k1, Model.k2], values={Model.k2: 0})
+    with raises(ValueError, match="initial value of k2"):
+        fitter.fit()
+    with raises(ValueError, match="lower bound of k1"):
+        fitter.fit(np.zeros(2), bounds=[(0, 1), (0.1, 1)])
+    with raises(ValueError, match="lower bound of k2"):
+        fitter.multistart(2, bounds=[(0.1, 1), (-1, 1)])
+
+    fitter = Fitter(Model, data, [Model.k1, Model.k2], values={Model.k2: 0}, log=False)
+    fitter.fit(bounds=[(0, 1), (0, 1)])
+
+
+def test_dependent_parameter():
+    class Dependent(System):
+        A: Variable = initial(default=5)
+        B: Variable = initial(default=0)
+        k: Parameter = assign(default=1)
+        k1: Parameter = assign(default=0.7 * k)
+        forward = MassAction(reactants=[A], products=[B], rate=k1)
+        decay = MassAction(reactants=[B], products=[], rate=0.3 * k)
+
+    result = Fitter(Dependent, data, [Dependent.k]).fit()
+    np.testing.assert_allclose(result.parameters["k"], 1, rtol=1e-3)
+
+
+def test_unknown_column():
+    with raises(ValueError):
+        Fitter(Model, data.rename(columns={"A": "C"}), [Model.k1])
@@ -0,0 +1,118 @@
+import numpy as np
+from poincare import solvers
+from pytest import mark, warns
+from symbolite import Real, substitute, translate, vector
+from symbolite.abstract import real
+from symbolite.core.function import Function
+from symbolite.impl import libstd
+
+from . import Compartment, Independent, MassAction, Species, Volume
+from .core import amount, concentration, volume
+from .derivative import derivative
+from .reactions.test_reactions import reactions
+from .solvers import BDF, LSODA, Radau
+from .stoichiometry import SparseSimulator
+from .test_stoichiometry import Enzymatic
+
+y = vector.Vector("y")
+p = vector.Vector("p")
+
+
+def test_derivative():
+    x, k = y[0], p[0]
+    assert derivative(k * y[1], x) == 0
+    assert str(derivative(k * x, x)) == str(k)
+    assert str(derivative(x**2, x)) == str(2 * x)
+    assert str(derivative(real.exp(k * x), x)) == str(real.exp(k * x) * k)
+    # Functions of constants are not dispatched.
+    assert derivative(real.abs(k) * real.gamma(k), x) == 0
+
+
+a, b = Real("a"), Real("b")
+maximum = Function("max", "real", output_type=Real)
+minimum = Function("min", "real", output_type=Real)
+piecewise = Function("piecewise", "real", output_type=Real)
+
+
+@mark.parametrize(
+    "expr, expected",
+    [
+        (real.abs(a * b), lambda a, b: np.sign(a * b) * b),
+        (maximum(a, b, 1), lambda a, b: float(a >= b and a >= 1)),
+        (minimum(a**2, b), lambda a, b: 2 * a * (a**2 <= b)),
+        (piecewise(a**2, b > 0, b), lambda a, b: 2 * a * (b > 0)),
+    ],
+)
+@mark.parametrize("values", [(2.0, 3.0), (-2.0, 0.5), (1.5, -1.0)])
+def test_derivative_piecewise(expr, expected, values):
+    functions = {
+        maximum: max,
+        minimum: min,
+        piecewise: lambda value, condition, otherwise: (
+            value if condition else otherwise
+        ),
+    }
+    result = substitute(derivative(expr, a), {a: values[0], b: values[1], **functions})
+    assert translate(result, libstd) == expected(*values)
+
+
+class ChangingVolume(Compartment):
+    t: Independent = Independent()
+    V: Volume = volume(default=1)
+    A: Species = concentration(default=1)
+    B: Species = concentration(default=2)
+    AB: Species = amount(default=0)
+
+    eq = MassAction(reactants=[A, 2 * B], products=[AB], rate=1)
+    vol_eq = V.derive() << t * A
+
+
+def assert_jacobian(model):
+    problem = SparseSimulator(model, jacobian=True).create_problem(t_span=(0, 1))
+    jacobian = problem.rhs.jacobian
+
+    def rhs(y):
+        return problem.rhs(0.5, y, problem.p, np.empty_like(y)).copy()
+
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        y0 = rng.uniform(0.5, 2, size=problem.y.size)
+        eps = 1e-6
+        expected = np.stack(
+            [
+                (rhs(y0 + eps * e) - rhs(y0 - eps * e)) / (2 * eps)
+                for e in np.eye(y0.size)
+            ],
+            axis=1,
+        )
+        result = jacobian(0.5, y0, problem.p)
+        np.testing.assert_allclose(result.toarray(), expected, atol=1e-6)
+        assert np.all(jacobian.sparsity.toarray()[result.toarray() != 0])
+
+
+@mark.parametrize("reaction", reactions)
+def test_reactions(reaction):
+    assert_jacobian(reaction(**dict.fromkeys(reaction._required, 1)))
+
+
+@mark.parametrize("model", [Enzymatic, ChangingVolume])
+def test_models(model):
+    assert_jacobian(model)
+
+
+@mark.parametrize("solver", [BDF, Radau, LSODA])
+def test_solvers(solver):
+    sim = SparseSimulator(Enzymatic, jacobian=True)
+    save_at = np.linspace(0, 10, 11)
+    with warns(UserWarning, match="ignores the analytic Jacobian"):
+        expected = sim.solve(
+            save_at=save_at, solver=solvers.LSODA(rtol=1e-10, atol=1e-12)
+        )
+    result = sim.solve(save_at=save_at, solver=solver(rtol=1e-8, atol=1e-10))
+    np.testing.assert_allclose(result.to_array(), expected.to_array(), atol=1e-6)
+
+
+def test_default_solver():
+    # Sparse, unlike LSODA which densifies the Jacobian.
+    assert isinstance(SparseSimulator(Enzymatic, jacobian=True).default_solver(), BDF)
+    assert not isinstance(SparseSimulator(Enzymatic).default_solver(), LSODA | BDF)
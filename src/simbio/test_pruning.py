@@ -0,0 +1,125 @@
+import numpy as np
+from symbolite import Real
+
+from . import (
+    MassAction,
+    Parameter,
+    RateLaw,
+    Simulator,
+    System,
+    Variable,
+    assign,
+    initial,
+)
+from .derivative import leaf_key
+from .pruning import prune, vanishes
+
+
+class Branches(System):
+    A: Variable = initial(default=1)
+    B: Variable = initial(default=0)
+    catalyst: Variable = initial(default=2)
+    # An inactive branch: C is zero and never produced.
+    C: Variable = initial(default=0)
+    D: Variable = initial(default=0)
+    E: Variable = initial(default=0)
+    unused: Variable = initial(default=3)
+    k: Parameter = assign(default=1)
+    k_dead: Parameter = assign(default=2)
+    Km: Parameter = assign(default=1)
+    k_unused: Parameter = assign(default=4)
+    ab = MassAction(reactants=[A], products=[B], rate=k * catalyst)
+    cd = MassAction(reactants=[C], products=[D], rate=k_dead)
+    de = RateLaw(reactants=[D], products=[E], rate_law=k_dead * D / (Km + D))
+
+
+class Chain(System):
+    A: Variable = initial(default=1)
+    B: Variable = initial(default=0)
+    C: Variable = initial(default=0)
+    D: Variable = initial(default=0)
+    # B becomes non-zero, which activates the following reaction.
+    ab = MassAction(reactants=[A], products=[B], rate=1)
+    bc = MassAction(reactants=[B], products=[C], rate=1)
+    # Catalyzed by D, which is never produced.
+    cd = RateLaw(reactants=[C], products=[A], rate_law=C * D)
+
+
+def test_dead_branch():
+    pruned, report = prune(Branches)
+    assert report.reactions == ["cd", "de"]
+    assert report.species == {"C": 0, "D": 0, "E": 0, "unused": 3}
+    assert report.parameters == ["Km", "k_dead", "k_unused"]
+    assert {str(v) for v in pruned._yield(Variable)} == {"A", "B", "catalyst"}
+
+    save_at = np.linspace(0, 2, 5)
+    expected = Simulator(Branches).solve(save_at=save_at)
+    result = Simulator(pruned).solve(save_at=save_at)
+    for k in result.data_vars:
+        np.testing.assert_allclose(result[k], expected[k], rtol=1e-6)
+
+
+def test_values():
+    _, report = prune(Branches, {Branches.C: 1})
+    assert report.reactions == []
+    assert report.species == {"unused": 3}
+    assert report.parameters == ["k_unused"]
+
+
+def test_conservative():
+    class Leaky(System):
+        C: Variable = initial(default=0)
+        D: Variable = initial(default=0)
+        k: Parameter = assign(default=1)
+        leak = RateLaw(reactants=[], products=[C], rate_law=k + C)
+        cd = MassAction(reactants=[C], products=[D], rate=1)
+
+    # leak does not vanish, so C and D may become non-zero.
+    _, report = prune(Leaky)
+    assert len(report) == 0
+
+    class Vanishing(System):
+        C: Variable = initial(default=0)
+        k: Parameter = assign(default=1)
+        leak = RateLaw(reactants=[], products=[C], rate_law=0 * k + C**2 + 0)
+
+    _, report = prune(Vanishing)
+    assert report.reactions == ["leak"]
+    assert report.parameters == ["k"]
+
+
+def test_fixed_point():
+    pruned, report = prune(Chain)
+    assert report.reactions == ["cd"]
+    # D is referenced by no remaining reaction.
+    assert report.species == {"D": 0}
+
+    pruned, report = prune(Chain, {Chain.D: 1})
+    assert len(report) == 0
+    assert pruned is Chain
+
+    pruned, report = prune(Chain, {Chain.A: 0})
+    assert report.reactions == ["ab", "bc", "cd"]
+
+
+def test_vanishes():
+    x, y, k = Real("x"), Real("y"), Real("k")
+    zeros = {leaf_key(x)}
+    assert vanishes(2 * x * y, zeros)
+    assert vanishes(x / 2, zeros)
+    assert not vanishes(x + y, zeros)
+    # 0 / 0 is not zero.
+    assert not vanishes(x / x, zeros)
+    assert not vanishes(x / (x**2), zeros)
+    # Denominators must be non-zero constants.
+    assert not vanishes(x / y, zeros)
+    assert not vanishes(x / (k + x), zeros)
+    assert vanishes(x / (k + x), zeros, {leaf_key(k): 1})
+    assert not vanishes(x / (k + x), zeros, {leaf_key(k): 0})
+    assert not vanishes(x / (k - 1), zeros, {leaf_key(k): 1})
+
+
+def test_zero_denominator():
+    # With Km = 0, the rate law of de is D / D, which does not vanish.
+    _, report = prune(Branches, {Branches.Km: 0})
+    assert report.reactions == ["cd"]
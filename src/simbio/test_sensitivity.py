@@ -0,0 +1,91 @@
+import numpy as np
+from pytest import mark
+
+from . import MassAction, Parameter, Simulator, System, Variable, assign, initial
+from .sensitivity import AdjointSensitivity, ForwardSensitivity
+from .solvers import LSODA
+from .test_stoichiometry import Enzymatic
+
+
+class Decay(System):
+    A: Variable = initial(default=2)
+    k: Parameter = assign(default=0.5)
+    decay = MassAction(reactants=[A], products=[], rate=k)
+
+
+class Derived(System):
+    A: Variable = initial(default=3)
+    B: Variable = initial(default=0)
+    k: Parameter = assign(default=1)
+    kr: Parameter = assign(default=2 * k)
+    forward = MassAction(reactants=[2 * A], products=[B], rate=k)
+    reverse = MassAction(reactants=[B], products=[2 * A], rate=kr)
+
+
+def finite_differences(model, parameters, save_at, h=1e-6):
+    solver = LSODA(rtol=1e-12, atol=1e-14)
+    sim = Simulator(model)
+    problem = sim.create_problem()
+    current = {
+        **dict(zip(sim.compiled.variables, problem.y)),
+        **dict(zip(sim.compiled.parameters, problem.p)),
+    }
+    columns = []
+    for c in parameters:
+        value = current.get(c, sim.compiled.mapper[c])
+        plus = sim.solve({c: value + h}, save_at=save_at, solver=solver)
+        minus = sim.solve({c: value - h}, save_at=save_at, solver=solver)
+        columns.append((plus - minus).to_array("variable").T / (2 * h))
+    return np.stack(columns, axis=-1)
+
+
+def test_decay():
+    t = np.linspace(0, 4, 5)
+    sim = ForwardSensitivity(Decay, rtol=1e-10, atol=1e-12)
+    # The sparse Jacobian is not densified, as with LSODA.
+    assert sim.method == "BDF"
+    result = sim.solve([Decay.k, Decay.A], save_at=t)
+    assert result["sensitivity"].dims == ("time", "variable", "parameter")
+    assert list(result["parameter"].values) == ["k", "A"]
+    np.testing.assert_allclose(result["y"][:, 0], 2 * np.exp(-0.5 * t), rtol=1e-8)
+    s = result["sensitivity"][:, 0]
+    np.testing.assert_allclose(s[:, 0], -2 * t * np.exp(-0.5 * t), atol=1e-8)
+    np.testing.assert_allclose(s[:, 1], np.exp(-0.5 * t), rtol=1e-8)
+
+
+@mark.parametrize(
+    "model, parameters",
+    [
+        (Derived, [Derived.k, Derived.kr, Derived.A]),
+        (Enzymatic, [Enzymatic.mm.forward_rate, Enzymatic.V, Enzymatic.S]),
+    ],
+)
+def test_finite_differences(model, parameters):
+    t = np.linspace(0, 5, 6)
+    sim = ForwardSensitivity(model, rtol=1e-10, atol=1e-12)
+    result = sim.solve(parameters, save_at=t)
+    expected = finite_differences(model, parameters, t)
+    np.testing.assert_allclose(result["sensitivity"], expected, rtol=1e-5, atol=1e-6)
+
+
+@mark.parametrize("save_at", [np.linspace(0, 5, 6), np.linspace(1, 5, 5)])
+def test_adjoint(save_at):
+    parameters = [Derived.k, Derived.kr, Derived.A, Derived.B]
+    data = np.ones((save_at.size, 2))
+
+    def loss_gradient(y):
+        return y - data
+
+    forward = ForwardSensitivity(Derived, rtol=1e-10, atol=1e-12).solve(
+        parameters, save_at=save_at
+    )
+    expected = np.einsum(
+        "tv,tvp->p", forward["y"].values - data, forward["sensitivity"].values
+    )
+
+    adjoint = AdjointSensitivity(Derived, rtol=1e-10, atol=1e-12).solve(
+        parameters, save_at=save_at, loss_gradient=loss_gradient
+    )
+    assert adjoint["gradient"].dims == ("parameter",)
+    np.testing.assert_allclose(adjoint["y"], forward["y"], rtol=1e-7)
+    np.testing.assert_allclose(adjoint["gradient"], expected, rtol=1e-5)
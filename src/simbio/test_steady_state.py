@@ -0,0 +1,116 @@
+import numpy as np
+from pytest import raises
+
+from . import MassAction, Parameter, Simulator, System, Variable, assign, initial
+from .solvers import LSODA
+from .steady_state import SteadyStateSolver, steady_state
+from .test_stoichiometry import Enzymatic
+
+
+class Reversible(System):
+    A: Variable = initial(default=3)
+    B: Variable = initial(default=1)
+    kf: Parameter = assign(default=1)
+    kr: Parameter = assign(default=3)
+    forward = MassAction(reactants=[A], products=[B], rate=kf)
+    reverse = MassAction(reactants=[B], products=[A], rate=kr)
+
+
+class Dimerization(System):
+    A: Variable = initial(default=10)
+    B: Variable = initial(default=0)
+    k: Parameter = assign(default=1)
+    dimerization = MassAction(reactants=[2 * A], products=[B], rate=k)
+    dissociation = MassAction(reactants=[B], products=[2 * A], rate=1)
+
+
+class Production(System):
+    A: Variable = initial(default=0)
+    k: Parameter = assign(default=1)
+    production = MassAction(reactants=[], products=[A], rate=k)
+    degradation = MassAction(reactants=[A], products=[], rate=2)
+
+
+def assert_integrated(model, result):
+    save_at = np.array([0, 1e3])
+    solver = LSODA(rtol=1e-10, atol=1e-12)
+    expected = Simulator(model).solve(save_at=save_at, solver=solver)
+    for k in expected.data_vars:
+        np.testing.assert_allclose(result[k], expected[k][-1], rtol=1e-6, atol=1e-6)
+
+
+def test_conserved_totals():
+    result = steady_state(Reversible)
+    # A + B = 4 and kf * A = kr * B
+    np.testing.assert_allclose(result["A"], 3)
+    np.testing.assert_allclose(result["B"], 1)
+
+    result = steady_state(Reversible, {Reversible.A: 1, Reversible.B: 7})
+    np.testing.assert_allclose(result["A"], 6)
+    np.testing.assert_allclose(result["B"], 2)
+
+
+def test_nonlinear():
+    sim = SteadyStateSolver(Dimerization)
+    problem = sim.create_problem()
+    state = sim.find(problem)
+    assert state.time == 0
+    assert state.iterations > 1
+    assert np.all(state.y >= 0)
+    assert_integrated(Dimerization, sim.solve())
+
+
+def test_michaelis_menten():
+    assert_integrated(Enzymatic, steady_state(Enzymatic))
+
+
+def test_integration_fallback():
+    sim = SteadyStateSolver(Dimerization, max_iter=1)
+    state = sim.find(sim.create_problem())
+    assert state.time > 0
+    assert_integrated(Dimerization, sim.solve())
+
+
+def test_not_found():
+    class Accumulation(System):
+        A: Variable = initial(default=0)
+        production = MassAction(reactants=[], products=[A], rate=1)
+
+    with raises(RuntimeError):
+        steady_state(Accumulation, t_max=10)
+
+
+def test_guess():
+    sim = SteadyStateSolver(Reversible)
+    result = sim.solve(guess={Reversible.A: 0})
+    np.testing.assert_allclose(result["A"], 3)
+    np.testing.assert_allclose(result["B"], 1)
+
+
+def test_continuation():
+    sim = SteadyStateSolver(Production)
+    k = np.linspace(0, 10, 11)
+    result = sim.continuation(Production.k, k)
+    assert result["A"].dims == ("k",)
+    np.testing.assert_allclose(result["A"], k / 2)
+
+    sim = SteadyStateSolver(Dimerization)
+    k = np.logspace(-2, 2, 9)
+    result = sim.continuation(Dimerization.k, k)
+    for i, value in enumerate(k):
+        expected = sim.solve({Dimerization.k: value})
+        np.testing.assert_allclose(result["A"][i], expected["A"])
+        np.testing.assert_allclose(result["B"][i], expected["B"])
+    # the total is conserved along the curve
+    np.testing.assert_allclose(result["A"] + 2 * result["B"], 10)
+
+
+def test_continuation_repeated_values():
+    sim = SteadyStateSolver(Dimerization)
+    k = np.array([0.1, 1, 1, 10])
+    with np.errstate(all="raise"):
+        result = sim.continuation(Dimerization.k, k)
+    np.testing.assert_allclose(result["A"][1], result["A"][2])
+    np.testing.assert_allclose(
+        result["A"][3], sim.solve({Dimerization.k: 10})["A"], rtol=1e-6
+    )
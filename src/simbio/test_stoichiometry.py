@@ -0,0 +1,87 @@
+import numpy as np
+from pytest import mark
+
+from . import Compartment, Independent, MassAction, Simulator, Species, Volume
+from .core import amount, concentration, volume
+from .reactions import MichaelisMenten
+from .reactions.test_reactions import reactions
+from .stoichiometry import SparseSimulator, stoichiometry
+
+
+class Enzymatic(Compartment):
+    V: Volume = volume(default=2)
+    E: Species = concentration(default=1)
+    S: Species = amount(default=10)
+    ES: Species = concentration(default=0)
+    P: Species = concentration(default=0)
+
+    mm = MichaelisMenten(
+        E=E, S=S, ES=ES, P=P, forward_rate=1, reverse_rate=1, catalytic_rate=1
+    )
+
+
+def assert_same_solution(model, values=None):
+    if values is None:
+        values = {}
+    save_at = np.linspace(0, 10, 11)
+    expected = Simulator(model).solve(values, save_at=save_at)
+    result = SparseSimulator(model).solve(values, save_at=save_at)
+    assert list(result.data_vars) == list(expected.data_vars)
+    np.testing.assert_allclose(
+        result.to_array(), expected.to_array(), rtol=1e-6, atol=1e-9
+    )
+
+
+def test_stoichiometry_matrix():
+    st = stoichiometry(Enzymatic)
+    assert st.species == (Enzymatic.E, Enzymatic.S, Enzymatic.ES, Enzymatic.P)
+    assert st.shape == (4, 3)
+    np.testing.assert_array_equal(
+        st.matrix.toarray(),
+        [
+            [-1, 1, 1],
+            [-1, 1, 0],
+            [1, -1, -1],
+            [0, 0, 1],
+        ],
+    )
+
+
+@mark.parametrize("reaction", reactions)
+def test_reactions(reaction):
+    model = reaction(**dict.fromkeys(reaction._required, 1))
+    assert_same_solution(model)
+
+
+def test_compartment():
+    assert_same_solution(Enzymatic)
+    assert_same_solution(Enzymatic, {Enzymatic.mm.forward_rate: 3})
+
+
+def test_changing_volume():
+    class Model(Compartment):
+        t: Independent = Independent()
+        V: Volume = volume(default=1)
+        A: Species = concentration(default=1)
+        B: Species = concentration(default=2)
+        AB: Species = amount(default=0)
+
+        eq = MassAction(reactants=[A, 2 * B], products=[AB], rate=1)
+        vol_eq = V.derive() << t
+
+    assert_same_solution(Model)
+
+
+def test_nested_compartments():
+    class Nested(Compartment):
+        V: Volume = volume(default=2)
+        A: Species = amount(default=1)
+        B: Species = concentration(default=2)
+
+    class Model(Compartment):
+        V: Volume = volume(default=4)
+        C: Species = amount(default=1)
+        nested = Nested()
+        eq = MassAction(reactants=[nested.A, nested.B], products=[2 * C], rate=1)
+
+    assert_same_solution(Model)
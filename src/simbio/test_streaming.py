@@ -0,0 +1,39 @@
+import numpy as np
+import xarray as xr
+from poincare.solvers import LSODA
+
+from . import Simulator
+from .streaming import NetCDFSink, solve_chunks, solve_to
+from .test_stoichiometry import Enzymatic
+
+save_at = np.linspace(0, 10, 101)
+solver = LSODA(rtol=1e-8, atol=1e-10)
+
+
+def test_chunks():
+    sim = Simulator(Enzymatic)
+    chunks = list(solve_chunks(sim, save_at=save_at, chunk_size=30, solver=solver))
+    assert [c.sizes["time"] for c in chunks] == [30, 30, 30, 11]
+
+    expected = sim.solve(save_at=save_at, solver=solver)
+    result = xr.concat(chunks, "time")
+    np.testing.assert_array_equal(result["time"], save_at)
+    np.testing.assert_allclose(result.to_array(), expected.to_array(), rtol=1e-5)
+
+
+def test_transform():
+    sim = Simulator(Enzymatic, transform={"total": Enzymatic.E + Enzymatic.ES})
+    result = xr.concat(list(solve_chunks(sim, save_at=save_at, chunk_size=7)), "time")
+    assert list(result.data_vars) == ["total"]
+    np.testing.assert_allclose(result["total"], 1)
+
+
+def test_netcdf_sink(tmp_path):
+    sim = Simulator(Enzymatic)
+    sink = NetCDFSink(tmp_path)
+    solve_to(sink, sim, save_at=save_at, chunk_size=50, solver=solver)
+    assert len(sink.files) == 3
+
+    result = xr.concat([xr.load_dataset(f) for f in sink.files], "time")
+    expected = sim.solve(save_at=save_at, solver=solver)
+    np.testing.assert_allclose(result.to_array(), expected.to_array(), rtol=1e-5)